@@ -40,16 +40,23 @@ SffCharaViewer - 格闘ゲーム用スプライトファイル(.sff)とアニメ
 """
 
 from __future__ import annotations
-import os, sys, re, logging
+import os, sys, re, logging, threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, as_completed, wait
 from typing import Dict, List, Tuple, Optional, Union
 from dataclasses import dataclass
 
 try:
-    from PIL import Image
+    from PIL import Image, ImageChops
     PIL_AVAILABLE = True
 except ImportError:
     PIL_AVAILABLE = False
 
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
 # PyQt5のインポート（GUI機能用）
 try:
     from PyQt5.QtWidgets import (
@@ -58,7 +65,7 @@ try:
         QSpinBox, QCheckBox, QDialog, QDialogButtonBox, QRadioButton, QMessageBox, QComboBox,
         QMenuBar, QMenu, QAction, QStatusBar, QSlider
     )
-    from PyQt5.QtGui import QPixmap, QImage, QColor, QPainter, qRgb, qRgba, QPen, QBrush, QTransform
+    from PyQt5.QtGui import QPixmap, QPixmapCache, QImage, QImageWriter, QColor, QPainter, qRgb, qRgba, QPen, QBrush, QTransform
     from PyQt5.QtCore import Qt, QTimer, pyqtSignal
     from PyQt5 import QtCore
     PYQT5_AVAILABLE = True
@@ -69,7 +76,7 @@ except ImportError:
 
 # 新しいモジュールのインポート
 from src.ui_components import LanguageManager, ImageCache, UIHelper, StatusBarManager
-from src.air_parser import AIRParser, parse_air
+from src.air_parser import AIRParser, parse_air as new_parse_air
 from src.sff_core import SFFParser, parse_sff
 
 from src.sff_parser import SFFv1Reader as SFFReader
@@ -136,6 +143,15 @@ class SFFViewerConfig:
 Config = SFFViewerConfig
 
 
+# パレットが取れない時に使う線形グレースケールの RGB パレット（256色×3）
+_GRAY_PALETTE = bytes(v for v in range(256) for _ in range(3))
+
+# パレット→ARGB32 LUTのキャッシュ（id(palette) -> (palette, len, lut)）
+_argb_lut_cache = {}
+_argb_lut_cache_max_size = 32
+_argb_lut_cache_lock = threading.Lock()
+
+
 class SFFRenderer:
     """SFF画像レンダリング処理クラス"""
     
@@ -143,8 +159,15 @@ class SFFRenderer:
         self.config = config
     
     def render_sprite(self, reader, index: int, palette_idx: Optional[int] = None, 
-                     is_v2: bool = False, act_palettes: Optional[List] = None) -> Tuple[QImage, List[Tuple[int,int,int,int]]]:
-        """スプライトをQImageにレンダリング"""
+                     is_v2: bool = False, act_palettes: Optional[List] = None,
+                     dst: Optional[QImage] = None, target_size: Optional[Tuple[int, int]] = None,
+                     scale: Optional[float] = None) -> Tuple[QImage, List[Tuple[int,int,int,int]]]:
+        """スプライトをQImageにレンダリング
+
+        dst にサイズ・フォーマットが一致するQImageを渡すと、新規確保せずにその画像へ直接書き込む
+        target_size / scale を指定すると縮小した画像を返す（整数倍の縮小分は
+        パレット展開前のピクセルを間引くため、原寸のQImageは作成しない）
+        """
         if self.config.debug_mode:
 
             pass
@@ -178,23 +201,99 @@ class SFFRenderer:
             decoded, palette, w, h = reader.get_image(index, s.get('pal_idx', 0), palette_override=palette_override)
             mode = 'indexed'
         
-        return self._create_qimage(decoded, palette, w, h, mode)
+        fit = self._fit_size(w, h, target_size, scale)
+        if fit is None:
+            return self._create_qimage(decoded, palette, w, h, mode, dst)
+        
+        step = max(1, min(w // fit[0], h // fit[1]))
+        if step > 1:
+            decoded, w, h = self._subsample(decoded, w, h, step, 4 if mode == 'rgba' else 1)
+        img, palette = self._create_qimage(decoded, palette, w, h, mode, dst)
+        if (w, h) != fit:
+            img = img.scaled(fit[0], fit[1], Qt.IgnoreAspectRatio, Qt.FastTransformation)
+        return img, palette
+    
+    @staticmethod
+    def _fit_size(w: int, h: int, target_size: Optional[Tuple[int, int]],
+                  scale: Optional[float]) -> Optional[Tuple[int, int]]:
+        """縮小後のサイズを計算（縦横比維持・拡大はしない）。縮小不要ならNone"""
+        if w <= 0 or h <= 0:
+            return None
+        if target_size is not None:
+            ratio = min(target_size[0] / w, target_size[1] / h)
+        elif scale is not None:
+            ratio = scale
+        else:
+            return None
+        if ratio >= 1.0:
+            return None
+        return max(1, int(w * ratio)), max(1, int(h * ratio))
+    
+    @staticmethod
+    def _subsample(decoded, w: int, h: int, step: int, bpp: int):
+        """デコード済みピクセルを step 間隔で間引く（最近傍縮小）"""
+        mv = memoryview(bytes(decoded[:w * h * bpp]))
+        if bpp == 4:
+            mv = mv.cast('I')
+        out = b''.join(mv[y * w:(y + 1) * w:step].tobytes() for y in range(0, h, step))
+        return out, (w + step - 1) // step, (h + step - 1) // step
+    
+    @staticmethod
+    def _target_image(dst: Optional[QImage], w: int, h: int, fmt) -> QImage:
+        """dst が再利用可能ならそれを、そうでなければ新しいQImageを返す"""
+        if (dst is not None and not dst.isNull() and dst.width() == w
+                and dst.height() == h and dst.format() == fmt):
+            return dst
+        return QImage(w, h, fmt)
+    
+    @staticmethod
+    def _write_rows(img: QImage, data, row_bytes: int, h: int) -> None:
+        """行単位のピクセルデータをQImageのバッファへストライドを考慮して書き込む"""
+        stride = img.bytesPerLine()
+        ptr = img.bits(); ptr.setsize(stride * h)
+        mv = memoryview(ptr)
+        if stride == row_bytes:
+            mv[:row_bytes * h] = data[:row_bytes * h]
+        elif NUMPY_AVAILABLE:
+            # 行パディングがある場合も2次元ビュー同士の1回のコピーで済ませる
+            rows = np.frombuffer(ptr, dtype=np.uint8).reshape(h, stride)
+            rows[:, :row_bytes] = np.frombuffer(data, dtype=np.uint8, count=row_bytes * h).reshape(h, row_bytes)
+        else:
+            for y in range(h):
+                src_off = y * row_bytes
+                dst_off = y * stride
+                mv[dst_off:dst_off+row_bytes] = data[src_off:src_off+row_bytes]
+    
+    @staticmethod
+    def _qimage_to_pil(qimg: QImage) -> 'Image.Image':
+        """QImage を RGBA の PIL.Image に変換（行を連結し直さず、ストライド指定で1回だけコピー）"""
+        qimg = qimg.convertToFormat(QImage.Format_RGBA8888)
+        w, h = qimg.width(), qimg.height()
+        if w <= 0 or h <= 0:
+            return Image.new('RGBA', (max(w, 0), max(h, 0)))
+        ptr = qimg.constBits(); ptr.setsize(qimg.byteCount())
+        # frombuffer は QImage のバッファを参照するだけなので、QImage 解放後も使えるよう copy する
+        return Image.frombuffer('RGBA', (w, h), ptr, 'raw', 'RGBA', qimg.bytesPerLine(), 1).copy()
     
-    def _qimage_from_indexed(self, indices: bytes, palette: list[tuple[int,int,int]], w: int, h: int, transparent_zero: bool) -> QImage:
+    def _qimage_from_indexed(self, indices: bytes, palette: list[tuple[int,int,int]], w: int, h: int, transparent_zero: bool,
+                             dst: Optional[QImage] = None) -> QImage:
         """インデックスデータからARGB32形式のQImageを作成（透過対応）"""
         # indices: 長さ w*h の 0..255
         # palette: [(r,g,b), ...] 256 個想定
-        # Debug output removed
-        
-        # インデックス統計 (デバッグ情報削除済み)
-        unique_indices = set(indices)
-        
-        # パレット情報 (デバッグ情報削除済み)
+        if NUMPY_AVAILABLE:
+            # パレット→ARGB32のLUTを作り、1回のgatherでパレット参照・チャンネル順・透過を処理
+            lut = self._argb_lut(palette, transparent_zero)
+            argb = lut[np.frombuffer(indices, dtype=np.uint8, count=w * h)]
+            img = self._target_image(dst, w, h, QImage.Format_ARGB32)
+            stride = img.bytesPerLine()
+            ptr = img.bits(); ptr.setsize(stride * h)
+            rows = np.frombuffer(ptr, dtype=np.uint8).reshape(h, stride)
+            rows[:, :w * 4] = argb.view(np.uint8).reshape(h, w * 4)
+            return img
         
         argb = bytearray(w * h * 4)
         p0a = 0 if transparent_zero else 255
         
-        transparent_count = 0
         for y in range(h):
             base = y * w
             for x in range(w):
@@ -204,40 +303,65 @@ class SFFRenderer:
                 else:
                     r, g, b = 0, 0, 0  # 範囲外は黒
                 a = p0a if idx == 0 else 255
-                if idx == 0 and transparent_zero:
-                    transparent_count += 1
                 o = (base + x) * 4
                 argb[o+0] = b
                 argb[o+1] = g
                 argb[o+2] = r
                 argb[o+3] = a
         
-        # Debug output removed
-        
-        img = QImage(bytes(argb), w, h, w*4, QImage.Format_ARGB32)
+        # QImage自身が所有するバッファへコピー（一時バッファを参照させない）
+        img = self._target_image(dst, w, h, QImage.Format_ARGB32)
+        self._write_rows(img, argb, w * 4, h)
         # Debug output removed
         
         # デバッグ用スプライト保存機能は削除済み
         
         return img
     
-    def _create_qimage(self, decoded, palette, w: int, h: int, mode: str) -> Tuple[QImage, List[Tuple[int,int,int,int]]]:
+    @staticmethod
+    def _argb_lut(palette, transparent_zero: bool):
+        """パレットから uint32[256] のARGB32ルックアップテーブルを取得（範囲外は不透明の黒）
+
+        リーダーが保持するパレットは多数のスプライトで共有されるため、
+        パレットオブジェクト単位でキャッシュして再構築を省く
+        """
+        cache_key = (id(palette), transparent_zero)
+        entry = _argb_lut_cache.get(cache_key)
+        if entry is not None and entry[0] is palette and entry[1] == len(palette):
+            return entry[2]
+        
+        lut = SFFRenderer._build_argb_lut(palette, transparent_zero)
+        with _argb_lut_cache_lock:
+            if len(_argb_lut_cache) >= _argb_lut_cache_max_size:
+                del _argb_lut_cache[next(iter(_argb_lut_cache))]
+            # パレット自体も保持してidの再利用による誤ヒットを防ぐ
+            _argb_lut_cache[cache_key] = (palette, len(palette), lut)
+        return lut
+    
+    @staticmethod
+    def _build_argb_lut(palette, transparent_zero: bool):
+        """パレットから uint32[256] のARGB32ルックアップテーブルを作成"""
+        lut = np.full(256, 0xFF000000, dtype=np.uint32)
+        n = min(len(palette), 256)
+        if n:
+            if isinstance(palette, np.ndarray):
+                # SFFv2 のパレットは (色数, 4) の uint8 配列なので列をそのまま取り出す
+                rgb = palette[:n, :3].astype(np.uint32)
+            else:
+                rgb = np.array([tuple(c[:3]) for c in palette[:n]], dtype=np.uint32).reshape(n, 3)
+            lut[:n] |= (rgb[:, 0] << 16) | (rgb[:, 1] << 8) | rgb[:, 2]
+        if transparent_zero:
+            lut[0] &= 0x00FFFFFF
+        return lut
+    
+    def _create_qimage(self, decoded, palette, w: int, h: int, mode: str,
+                       dst: Optional[QImage] = None) -> Tuple[QImage, List[Tuple[int,int,int,int]]]:
         """デコードされたデータからQImageを作成"""
         
         if mode == 'rgba':
-            img = QImage(w, h, QImage.Format_RGBA8888)
-            stride = img.bytesPerLine()
-            row_bytes = w * 4
+            img = self._target_image(dst, w, h, QImage.Format_RGBA8888)
             try:
-                ptr = img.bits(); ptr.setsize(stride * h)
-                mv = memoryview(ptr)
-                if stride == row_bytes:
-                    mv[:row_bytes * h] = decoded[:row_bytes * h]
-                else:
-                    for y in range(h):
-                        src_off = y * row_bytes
-                        dst_off = y * stride
-                        mv[dst_off:dst_off+row_bytes] = decoded[src_off:src_off+row_bytes]
+                self._write_rows(img, decoded, w * 4, h)
             except Exception as e:
                 if self.config.debug_mode:
                     logging.warning(f"RGBA copy fallback (stride issue): {e}")
@@ -266,7 +390,7 @@ class SFFRenderer:
                         is_stripe = all(first_row[i] == second_row[i] for i in range(w))
 
             
-            img = self._qimage_from_indexed(bytes(decoded[:w*h]), palette, w, h, transparent_zero)
+            img = self._qimage_from_indexed(bytes(decoded[:w*h]), palette, w, h, transparent_zero, dst)
                 
         return img, palette
     
@@ -822,7 +946,6 @@ class DEFParser:
 # レガシー関数（後方互換性のため）
 def parse_air(path: str) -> Dict[int, List[Dict[str, int]]]:
     """レガシー関数 - 新しい air_parser モジュールを使用"""
-    from src.air_parser import parse_air as new_parse_air
     return new_parse_air(path)
 
 
@@ -1067,6 +1190,8 @@ class SFFViewer(QMainWindow):
         self.last_opened_dir = settings.get('last_opened_dir', self.script_dir)
         
         self.image_cache = ImageCache(max_cache_size=200)  # キャッシュサイズ200枚
+        # 合成済みキャンバスのQPixmapキャッシュ（単位KB、アニメ再生・再描画用）
+        QPixmapCache.setCacheLimit(64 * 1024)
         
         # ウィンドウタイトルを言語対応
         self.update_window_title()
@@ -1611,13 +1736,13 @@ class SFFViewer(QMainWindow):
         self.current_sprite_index = 0
         self.current_palette_index = 0
         
-        # リーダーをクリア（一時的）
-        old_reader = self.reader
-        self.reader = None
+        # リーダーをクリア（mmap を保持していれば解放する）
+        self._close_reader()
         
         # キャッシュをクリア
         if hasattr(self, 'image_cache'):
             self.image_cache.clear()
+        QPixmapCache.clear()
         
         # 画像ウィンドウをクリア
         if hasattr(self, 'image_window') and hasattr(self.image_window, 'scene'):
@@ -1981,6 +2106,8 @@ class SFFViewer(QMainWindow):
         self._is_dedicated_palette_active = False
         self._user_selected_palette = False
 
+        # 前のリーダーが mmap を保持していれば解放する
+        self._close_reader()
         
         with open(path,'rb') as f:
             sig = f.read(12)
@@ -2003,10 +2130,11 @@ class SFFViewer(QMainWindow):
         # 読み込み順序
 
         if self.is_v2:
-            with open(path,'rb') as f:
-                self.reader.read_header(f)
-                self.reader.read_palettes(f)
-                self.reader.read_sprites(f)
+            # 表の解析だけ mmap で行い、すぐに閉じる。表示中もファイルを上書き・切り詰めできるよう、
+            # スプライトデータはデコード時に毎回ファイルから読む
+            self.reader.load(keep_mapped=False)
+            # 同じスプライトの再表示が多いので展開結果をキャッシュする
+            self.reader.enable_decode_cache()
         else:
             with open(path,'rb') as f:
                 self.reader.read_header(f)
@@ -2636,8 +2764,8 @@ class SFFViewer(QMainWindow):
             
             print(f"[DEBUG] 画像描画開始")
             self.draw_image(qimg, axis_x, axis_y)
-            if palette: 
-                print(f"[RLE8_DEBUG] パレット更新: {len(palette)}色, 最初の色: {palette[0] if palette else 'N/A'}")
+            if palette is not None and len(palette): 
+                print(f"[RLE8_DEBUG] パレット更新: {len(palette)}色, 最初の色: {[int(c) for c in palette[0]]}")
                 self.update_palette_preview(palette)
             else:
                 # RLE8形式かチェック
@@ -2948,7 +3076,7 @@ class SFFViewer(QMainWindow):
                 print(f"[DEBUG] アニメーション - 表示軸: ({axis_x}, {axis_y}), AIRオフセット: ({air_x}, {air_y})")
                 
                 self.draw_image(qimg, axis_x, axis_y, frame_data=frame)
-                if palette: 
+                if palette is not None and len(palette): 
                     self.update_palette_preview(palette)
                 else:
                     print(f"[DEBUG] アニメーション - パレットが None - プレビュー更新スキップ")
@@ -3307,21 +3435,24 @@ class SFFViewer(QMainWindow):
                 self.timer.isActive() and 
                 self.current_anim in self.animations)
 
+    def _canvas_pixmap_key(self, qimg: QImage, axis_x: int, axis_y: int, flip_h: bool, flip_v: bool,
+                           canvas_w: int, canvas_h: int, frame_data: Optional[Dict]) -> str:
+        """draw_imageの合成結果を識別するQPixmapCache用キー"""
+        scale_x, scale_y = self.calculate_combined_scale(debug=False)
+        key = (f"sffv:{qimg.cacheKey()}:{axis_x}:{axis_y}:{int(flip_h)}{int(flip_v)}:"
+               f"{int(bool(self.no_alpha))}:{canvas_w}x{canvas_h}:{scale_x:.3f}:{scale_y:.3f}")
+        if self.config.show_clsn and frame_data:
+            key += (f":{frame_data.get('clsn1', [])!r}:{frame_data.get('clsn2', [])!r}:"
+                    f"{self.config.clsn1_color}:{self.config.clsn2_color}:{self.config.clsn_line_width}")
+        return key
+
     def _apply_flip_transform(self, qimg: QImage, flip_h: bool, flip_v: bool) -> QImage:
         """画像に反転変換を適用"""
         if not flip_h and not flip_v:
             return qimg
         
-        # QTransformを使用して反転を適用
-        transform = QTransform()
-        
-        if flip_h:
-            transform.scale(-1, 1)  # 水平反転
-        if flip_v:
-            transform.scale(1, -1)  # 垂直反転
-        
-        # 変換を適用
-        flipped_img = qimg.transformed(transform, QtCore.Qt.FastTransformation)
+        # QImage.mirroredで反転（行単位のコピーで済み、汎用の座標変換を通さない）
+        flipped_img = qimg.mirrored(flip_h, flip_v)
         
         print(f"[DEBUG] 反転処理完了: 元サイズ={qimg.width()}x{qimg.height()}, 変換後={flipped_img.width()}x{flipped_img.height()}")
         return flipped_img
@@ -3507,84 +3638,90 @@ class SFFViewer(QMainWindow):
         
         # ====== STEP 4: キャンバス作成と画像描画 ======
         
-        # チェッカーボード背景のキャンバスを作成
-        canvas = QImage(canvas_w, canvas_h, QImage.Format_ARGB32)
-        self._fill_checkerboard_background(canvas)
+        # 同じ画像・配置・スケールの合成結果はQPixmapCacheから再利用
+        pixmap_key = self._canvas_pixmap_key(qimg, axis_x, axis_y, flip_h, flip_v,
+                                             canvas_w, canvas_h, frame_data)
+        pixmap = QPixmapCache.find(pixmap_key)
+        if pixmap is None or pixmap.isNull():
+            # チェッカーボード背景のキャンバスを作成
+            canvas = QImage(canvas_w, canvas_h, QImage.Format_ARGB32)
+            self._fill_checkerboard_background(canvas)
         
-        print(f"[DEBUG] キャンバス作成: {canvas_w}x{canvas_h} (チェッカーボード背景)")
+            print(f"[DEBUG] キャンバス作成: {canvas_w}x{canvas_h} (チェッカーボード背景)")
         
-        # QPainterで画像を描画
-        painter = QPainter(canvas)
-        painter.setRenderHint(QPainter.Antialiasing, True)
-        print(f"[DEBUG] QPainter状態初期化完了")
+            # QPainterで画像を描画
+            painter = QPainter(canvas)
+            painter.setRenderHint(QPainter.Antialiasing, True)
+            print(f"[DEBUG] QPainter状態初期化完了")
         
-        # 画像を描画
-        painter.drawImage(int(draw_x), int(draw_y), base_img)
-        print(f"[DEBUG] 画像描画: 位置({int(draw_x)},{int(draw_y)}), サイズ({base_img_w}x{base_img_h})")
+            # 画像を描画
+            painter.drawImage(int(draw_x), int(draw_y), base_img)
+            print(f"[DEBUG] 画像描画: 位置({int(draw_x)},{int(draw_y)}), サイズ({base_img_w}x{base_img_h})")
+        
+            # Clsn描画（必要に応じて）
+            if self.config.show_clsn and frame_data:
+                print(f"[DEBUG] Clsn描画開始 - show_clsn={self.config.show_clsn}, frame_data存在={frame_data is not None}")
+                if frame_data:
+                    clsn1_data = frame_data.get('clsn1', [])
+                    clsn2_data = frame_data.get('clsn2', [])
+                    print(f"[DEBUG] Clsn1データ: {len(clsn1_data)}個, Clsn2データ: {len(clsn2_data)}個")
+                    if clsn1_data:
+                        print(f"[DEBUG] Clsn1詳細: {clsn1_data}")
+                    if clsn2_data:
+                        print(f"[DEBUG] Clsn2詳細: {clsn2_data}")
+                # Clsn描画処理（画像と同じ座標系で）
+                # 画像軸位置を基準として、CLSNボックスを描画
+                axis_screen_x = draw_x + axis_x  # 画像内の軸位置をスクリーン座標に変換
+                axis_screen_y = draw_y + axis_y
+                self._draw_clsn_boxes_qt(painter, axis_screen_x, axis_screen_y, draw_x, draw_y, 1.0, 1.0, frame_data)
+            else:
+                print(f"[DEBUG] Clsn描画スキップ - show_clsn={self.config.show_clsn}, frame_data存在={frame_data is not None}")
         
-        # Clsn描画（必要に応じて）
-        if self.config.show_clsn and frame_data:
-            print(f"[DEBUG] Clsn描画開始 - show_clsn={self.config.show_clsn}, frame_data存在={frame_data is not None}")
-            if frame_data:
-                clsn1_data = frame_data.get('clsn1', [])
-                clsn2_data = frame_data.get('clsn2', [])
-                print(f"[DEBUG] Clsn1データ: {len(clsn1_data)}個, Clsn2データ: {len(clsn2_data)}個")
-                if clsn1_data:
-                    print(f"[DEBUG] Clsn1詳細: {clsn1_data}")
-                if clsn2_data:
-                    print(f"[DEBUG] Clsn2詳細: {clsn2_data}")
-            # Clsn描画処理（画像と同じ座標系で）
-            # 画像軸位置を基準として、CLSNボックスを描画
-            axis_screen_x = draw_x + axis_x  # 画像内の軸位置をスクリーン座標に変換
-            axis_screen_y = draw_y + axis_y
-            self._draw_clsn_boxes_qt(painter, axis_screen_x, axis_screen_y, draw_x, draw_y, 1.0, 1.0, frame_data)
-        else:
-            print(f"[DEBUG] Clsn描画スキップ - show_clsn={self.config.show_clsn}, frame_data存在={frame_data is not None}")
+            painter.end()
         
-        painter.end()
+            # ====== STEP 5: スケーリング適用 ======
         
-        # ====== STEP 5: スケーリング適用 ======
+            # 統合スケールを計算
+            combined_scale_x, combined_scale_y = self.calculate_combined_scale(debug=False)
         
-        # 統合スケールを計算
-        combined_scale_x, combined_scale_y = self.calculate_combined_scale(debug=False)
+            # スケーリングが必要な場合のみ適用
+            if abs(combined_scale_x - 1.0) > 0.01 or abs(combined_scale_y - 1.0) > 0.01:
+                scaled_w = int(canvas_w * combined_scale_x)
+                scaled_h = int(canvas_h * combined_scale_y)
+            
+                # 最大サイズ制限を適用（より高い制限値に変更）
+                max_w, max_h = 8000, 6000  # 従来の1600x1200から8000x6000に拡張
+                if scaled_w > max_w or scaled_h > max_h:
+                    scale_factor = min(max_w / scaled_w, max_h / scaled_h)
+                    scaled_w = int(scaled_w * scale_factor)
+                    scaled_h = int(scaled_h * scale_factor)
+                    print(f"[DEBUG] 出力サイズ制限適用: 最終サイズ({scaled_w}x{scaled_h})")
+            
+                canvas = canvas.scaled(scaled_w, scaled_h, Qt.KeepAspectRatio, Qt.FastTransformation)
+                print(f"[DEBUG] 最終スケーリング適用: {canvas_w}x{canvas_h} → {scaled_w}x{scaled_h}")
+            else:
+                print(f"[DEBUG] スケーリングなし")
         
-        # スケーリングが必要な場合のみ適用
-        if abs(combined_scale_x - 1.0) > 0.01 or abs(combined_scale_y - 1.0) > 0.01:
-            scaled_w = int(canvas_w * combined_scale_x)
-            scaled_h = int(canvas_h * combined_scale_y)
-            
-            # 最大サイズ制限を適用（より高い制限値に変更）
-            max_w, max_h = 8000, 6000  # 従来の1600x1200から8000x6000に拡張
-            if scaled_w > max_w or scaled_h > max_h:
-                scale_factor = min(max_w / scaled_w, max_h / scaled_h)
-                scaled_w = int(scaled_w * scale_factor)
-                scaled_h = int(scaled_h * scale_factor)
-                print(f"[DEBUG] 出力サイズ制限適用: 最終サイズ({scaled_w}x{scaled_h})")
-            
-            canvas = canvas.scaled(scaled_w, scaled_h, Qt.KeepAspectRatio, Qt.FastTransformation)
-            print(f"[DEBUG] 最終スケーリング適用: {canvas_w}x{canvas_h} → {scaled_w}x{scaled_h}")
-        else:
-            print(f"[DEBUG] スケーリングなし")
+            print(f"[DEBUG] 描画処理完了")
         
-        print(f"[DEBUG] 描画処理完了")
+            # QPixmapに変換してキャッシュ
+            pixmap = QPixmap.fromImage(canvas)
+            QPixmapCache.insert(pixmap_key, pixmap)
         
         # ====== STEP 6: 画像表示更新 ======
         
-        # QPixmapに変換して表示
-        pixmap = QPixmap.fromImage(canvas)
-        
         # 既存のPixmapItemがあれば更新、なければ新規作成
         if hasattr(self.image_window, 'current_pixmap_item') and self.image_window.current_pixmap_item:
             self.image_window.current_pixmap_item.setPixmap(pixmap)
             # PixmapItemを原点(0,0)に配置
             self.image_window.current_pixmap_item.setPos(0, 0)
-            print(f"[DEBUG] 既存のPixmapItem更新 (スケール適用キャンバス: {canvas.width()}x{canvas.height()})")
+            print(f"[DEBUG] 既存のPixmapItem更新 (スケール適用キャンバス: {pixmap.width()}x{pixmap.height()})")
         else:
             # 新規PixmapItemを作成し、原点(0,0)に配置
             self.image_window.current_pixmap_item = QGraphicsPixmapItem(pixmap)
             self.image_window.current_pixmap_item.setPos(0, 0)
             self.image_window.scene.addItem(self.image_window.current_pixmap_item)
-            print(f"[DEBUG] 新規PixmapItem作成 (スケール適用キャンバス: {canvas.width()}x{canvas.height()})")
+            print(f"[DEBUG] 新規PixmapItem作成 (スケール適用キャンバス: {pixmap.width()}x{pixmap.height()})")
         
         # シーンの境界を更新 - pixmapの実際のサイズに設定
         scene_rect = QtCore.QRectF(0, 0, pixmap.width(), pixmap.height())
@@ -3831,19 +3968,7 @@ class SFFViewer(QMainWindow):
                 base = Image.new("RGBA", (canvas_w, canvas_h), (0, 0, 0, 0))
                 
                 # QImage -> PIL変換
-                qimg_rgba = qimg.convertToFormat(QImage.Format_RGBA8888)
-                ptr = qimg_rgba.constBits()
-                ptr.setsize(qimg_rgba.byteCount())
-                
-                # バイト配列を正しく取得
-                img_bytes = bytearray()
-                bytes_per_line = qimg_rgba.bytesPerLine()
-                for y in range(h):
-                    line_start = y * bytes_per_line
-                    line_end = line_start + w * 4
-                    img_bytes.extend(ptr[line_start:line_end])
-                
-                pil = Image.frombytes('RGBA', (w, h), bytes(img_bytes))
+                pil = SFFRenderer._qimage_to_pil(qimg)
                 
                 # 反転・合成処理を適用
                 flip_h = fr.get('flip_h', False)
@@ -4318,7 +4443,8 @@ class SFFViewer(QMainWindow):
 
     def update_palette_preview(self, palette: List[Tuple[int,int,int,int]]):
         """パレットプレビューを更新"""
-        if not palette:
+        # SFFv2 のパレットは numpy 配列のため真偽値ではなく長さで判定する
+        if palette is None or len(palette) == 0:
             return
             
         prev = QImage(16, 16, QImage.Format_ARGB32)
@@ -4547,8 +4673,19 @@ class SFFViewer(QMainWindow):
                                key=lambda i: abs(self.scale_values[i] - 100))
             self.scale_combo.setCurrentIndex(closest_index)
 
+    def _close_reader(self, detach=True):
+        """SFFv2 リーダーが mmap を保持していれば閉じる（detach=True ならリーダーも破棄する）"""
+        reader = getattr(self, 'reader', None)
+        if detach:
+            self.reader = None
+        close = getattr(reader, 'close', None)
+        if close is not None:
+            close()
+
     def closeEvent(self, e):
         """ウィンドウ閉じるイベント"""
+        # 再表示される場合があるのでリーダーは残し、ファイルのマップだけ解放する
+        self._close_reader(detach=False)
         if hasattr(self, '_standalone_mode') and self._standalone_mode:
             QApplication.instance().quit()
         super().closeEvent(e)
@@ -4589,19 +4726,8 @@ class SFFViewer(QMainWindow):
                 return
             
             # QImageをPIL Imageに変換
-            qimg_rgba = qimg.convertToFormat(QImage.Format_RGBA8888)
-            w, h = qimg_rgba.width(), qimg_rgba.height()
-            ptr = qimg_rgba.constBits()
-            ptr.setsize(qimg_rgba.byteCount())
-            
-            img_bytes = bytearray()
-            bytes_per_line = qimg_rgba.bytesPerLine()
-            for y in range(h):
-                line_start = y * bytes_per_line
-                line_end = line_start + w * 4
-                img_bytes.extend(ptr[line_start:line_end])
-            
-            pil_img = Image.frombytes('RGBA', (w, h), bytes(img_bytes))
+            pil_img = SFFRenderer._qimage_to_pil(qimg)
+            w, h = pil_img.size
             
             # 画像をトリミング（透明領域を削除）
             trimmed_img = self._trim_single_image(pil_img)
@@ -4644,17 +4770,7 @@ class SFFViewer(QMainWindow):
                             palette_img.putpalette(palette)
                         
                         # 透明部分をマゼンタ色に変換
-                        pixels = list(palette_img.getdata())
-                        rgb_pixels = list(rgb_img.getdata())
-                        new_pixels = []
-                        
-                        for j, pixel in enumerate(pixels):
-                            if rgb_pixels[j] == transparent_color:
-                                new_pixels.append(255)  # マゼンタのインデックス
-                            else:
-                                new_pixels.append(pixel)
-                        
-                        palette_img.putdata(new_pixels)
+                        self._fill_index_where_color(palette_img, rgb_img, transparent_color, 255)  # マゼンタのインデックス
                         palette_img.save(file_path, 'GIF', transparency=255)
                         
                     except Exception as e:
@@ -5133,36 +5249,13 @@ class SFFViewer(QMainWindow):
                         normal_count += 1
                     
                     # QImageをPIL Imageに変換
-                    qimg_rgba = qimg.convertToFormat(QImage.Format_RGBA8888)
-                    w, h = qimg_rgba.width(), qimg_rgba.height()
+                    pil_img = SFFRenderer._qimage_to_pil(qimg)
+                    w, h = pil_img.size
                     
                     if w <= 0 or h <= 0:
                         print(f"[1枚スプライトシート] スキップ: スプライト {sprite_idx} (サイズ無効: {w}x{h})")
                         continue
                     
-                    ptr = qimg_rgba.constBits()
-                    ptr.setsize(qimg_rgba.byteCount())
-                    
-                    img_bytes = bytearray()
-                    bytes_per_line = qimg_rgba.bytesPerLine()
-                    for y in range(h):
-                        line_start = y * bytes_per_line
-                        line_end = line_start + w * 4
-                        if line_end <= len(ptr):
-                            img_bytes.extend(ptr[line_start:line_end])
-                        else:
-                            # バイト不足の場合は残りを0で埋める
-                            img_bytes.extend(ptr[line_start:])
-                            img_bytes.extend([0] * (line_end - len(ptr)))
-                    
-                    # PIL Image作成
-                    if len(img_bytes) == w * h * 4:
-                        pil_img = Image.frombytes('RGBA', (w, h), bytes(img_bytes))
-                    else:
-                        # バイト数が合わない場合はスキップ
-                        print(f"[1枚スプライトシート] スキップ: スプライト {sprite_idx} バイト数不整合 (期待:{w*h*4}, 実際:{len(img_bytes)})")
-                        continue
-                    
                     # プレースホルダー画像はスキップ
                     if is_placeholder:
                         print(f"[1枚スプライトシート] スキップ: スプライト {sprite_idx} プレースホルダー画像")
@@ -5439,19 +5532,7 @@ class SFFViewer(QMainWindow):
                     continue
                 
                 # QImageをPIL Imageに変換
-                qimg_rgba = qimg.convertToFormat(QImage.Format_RGBA8888)
-                w, h = qimg_rgba.width(), qimg_rgba.height()
-                ptr = qimg_rgba.constBits()
-                ptr.setsize(qimg_rgba.byteCount())
-                
-                img_bytes = bytearray()
-                bytes_per_line = qimg_rgba.bytesPerLine()
-                for y in range(h):
-                    line_start = y * bytes_per_line
-                    line_end = line_start + w * 4
-                    img_bytes.extend(ptr[line_start:line_end])
-                
-                pil_img = Image.frombytes('RGBA', (w, h), bytes(img_bytes))
+                pil_img = SFFRenderer._qimage_to_pil(qimg)
                 pil_frames.append(pil_img)
                 durations.append(max(1, int(frame.get('duration', 1))) * (1000 // 60))
             
@@ -5668,16 +5749,7 @@ class SFFViewer(QMainWindow):
                 if qimg is None or qimg.isNull():
                     continue
                     
-                qimg = qimg.convertToFormat(QImage.Format_RGBA8888)
-                w, h = qimg.width(), qimg.height()
-                ptr = qimg.constBits(); ptr.setsize(qimg.byteCount())
-                bpl = qimg.bytesPerLine()
-
-                buf = bytearray()
-                for y in range(h):
-                    start = y * bpl
-                    buf.extend(ptr[start:start + w*4])
-                img = Image.frombytes('RGBA', (w, h), bytes(buf))
+                img = SFFRenderer._qimage_to_pil(qimg)
 
                 img = self._trim_single_image(img)  # 透明縁を除去
                 groups[group_no].append((img, sprite.get('sprite_no', 0), sprite_idx))
@@ -5916,26 +5988,15 @@ class SFFViewer(QMainWindow):
         try:
             debug_print(f"[create_qimage] サイズ: {width}x{height}, モード: {mode}")
             debug_print(f"[create_qimage] データ長: {len(decoded_data)}")
-            debug_print(f"[create_qimage] パレット長: {len(palette) if palette else 0}")
+            has_palette = palette is not None and len(palette) > 0
+            debug_print(f"[create_qimage] パレット長: {len(palette) if has_palette else 0}")
             
             if mode == 'rgba':
                 # RGBA形式の場合
                 img = QImage(width, height, QImage.Format_RGBA8888)
-                stride = img.bytesPerLine()
-                row_bytes = width * 4
                 
                 try:
-                    ptr = img.bits()
-                    ptr.setsize(stride * height)
-                    mv = memoryview(ptr)
-                    
-                    if stride == row_bytes:
-                        mv[:row_bytes * height] = decoded_data[:row_bytes * height]
-                    else:
-                        for y in range(height):
-                            src_off = y * row_bytes
-                            dst_off = y * stride
-                            mv[dst_off:dst_off+row_bytes] = decoded_data[src_off:src_off+row_bytes]
+                    SFFRenderer._write_rows(img, decoded_data, width * 4, height)
                     return img
                 except Exception as e:
                     debug_print(f"[create_qimage] RGBA memoryview失敗、fallback: {e}")
@@ -5954,13 +6015,13 @@ class SFFViewer(QMainWindow):
                     debug_print(f"[create_qimage] デコード済みデータサンプル: {sample_hex}")
                 
                 # パレットの内容をサンプル表示
-                if palette:
+                if has_palette:
                     sample_palette = palette[:8]  # 最初の8色
                     debug_print(f"[create_qimage] パレットサンプル: {sample_palette}")
                 
                 img = QImage(width, height, QImage.Format_Indexed8)
                 
-                if palette:
+                if has_palette:
                     color_table = []
                     for i, (r, g, b, a) in enumerate(palette):
                         rgba_value = QColor(r, g, b, a).rgba()
@@ -5976,32 +6037,16 @@ class SFFViewer(QMainWindow):
                 debug_print(f"[create_qimage] 画像stride: {stride}, 幅: {width}")
                 
                 try:
-                    ptr = img.bits()
-                    ptr.setsize(stride * height)
-                    mv = memoryview(ptr)
-                    
-                    if stride == width:
-                        mv[:width*height] = decoded_data[:width*height]
-                        debug_print(f"[create_qimage] データコピー完了（stride=width）")
-                    else:
-                        for y in range(height):
-                            src_off = y * width
-                            dst_off = y * stride
-                            mv[dst_off:dst_off+width] = decoded_data[src_off:src_off+width]
-                        debug_print(f"[create_qimage] データコピー完了（stride≠width, {stride}≠{width}）")
+                    SFFRenderer._write_rows(img, decoded_data, width, height)
+                    debug_print(f"[create_qimage] データコピー完了（stride={stride}, 幅={width}）")
                     
                     debug_print(f"[create_qimage] QImage作成完了: {img.width()}x{img.height()}")
                     return img
                 except Exception as e:
                     debug_print(f"[create_qimage] インデックス memoryview失敗、RGBA fallback: {e}")
                     # RGBAフォールバック
-                    rgba = bytearray()
-                    for i in decoded_data[:width*height]:
-                        if palette and 0 <= i < len(palette):
-                            r, g, b, a = palette[i]
-                        else:
-                            r = g = b = 0; a = 0
-                        rgba.extend([r, g, b, a])
+                    rgba = SFFV2Reader.apply_palette(bytes(decoded_data[:width*height]),
+                                                     palette if has_palette else None).tobytes()
                     
                     debug_print(f"[create_qimage] RGBAフォールバック完了: {len(rgba)}バイト")
                     img = QImage(bytes(rgba), width, height, QImage.Format_RGBA8888)
@@ -6047,16 +6092,13 @@ class SFFViewer(QMainWindow):
                 pal_idx = sprite.get('pal_idx', 0)
                 if 0 <= pal_idx < len(self.reader.palettes):
                     palette_data = self.reader.palettes[pal_idx]
-                    palette = []
-                    for r, g, b, a in palette_data:
-                        palette.extend([r, g, b])
+                    # (色数, 4) の RGBA 配列から RGB 列だけを1次元に並べる
+                    palette = np.asarray(palette_data, dtype=np.uint8)[:, :3].ravel().tolist()
                     print(f"[indexed_render] SFFv2パレット {pal_idx} を使用")
                 else:
                     print(f"[indexed_render] SFFv2: 無効なパレットインデックス {pal_idx}")
                     # デフォルトパレット（グレースケール）
-                    palette = []
-                    for i in range(256):
-                        palette.extend([i, i, i])
+                    palette = _GRAY_PALETTE
             else:
                 # SFFv1の場合の既存処理
                 pal_group = sprite.get('pal_group', 1)
@@ -6067,9 +6109,7 @@ class SFFViewer(QMainWindow):
                     palette = self.reader.palettes[pal_key]
                 else:
                     # デフォルトパレット（グレースケール）
-                    palette = []
-                    for i in range(256):
-                        palette.extend([i, i, i])
+                    palette = _GRAY_PALETTE
             
             # QImageを作成（インデックスカラー）
             qimg = QImage(width, height, QImage.Format_Indexed8)
@@ -6089,15 +6129,14 @@ class SFFViewer(QMainWindow):
             
             qimg.setColorTable(colors)
             
-            # 画像データを設定
-            for y in range(height):
-                for x in range(width):
-                    idx = y * width + x
-                    if idx < len(img_data):
-                        pixel_value = img_data[idx] if isinstance(img_data[idx], int) else ord(img_data[idx])
-                        qimg.setPixel(x, y, pixel_value)
-                    else:
-                        qimg.setPixel(x, y, 0)
+            # 画像データを設定（1画素ずつ setPixel せず、確保済みバッファから行単位でまとめて書き込む）
+            size = width * height
+            if isinstance(img_data, str):
+                img_data = img_data.encode('latin-1')
+            pixels = bytearray(size)  # データが足りない画素は0
+            src = bytes(img_data[:size])
+            pixels[:len(src)] = src
+            SFFRenderer._write_rows(qimg, pixels, width, height)
             
             # インデックス0を透明に設定
             if len(colors) > 0:
@@ -6215,19 +6254,8 @@ class SFFViewer(QMainWindow):
                 continue
             
             # QImageをPIL Imageに変換
-            qimg_rgba = qimg.convertToFormat(QImage.Format_RGBA8888)
-            w, h = qimg_rgba.width(), qimg_rgba.height()
-            ptr = qimg_rgba.constBits()
-            ptr.setsize(qimg_rgba.byteCount())
-            
-            img_bytes = bytearray()
-            bytes_per_line = qimg_rgba.bytesPerLine()
-            for y in range(h):
-                line_start = y * bytes_per_line
-                line_end = line_start + w * 4
-                img_bytes.extend(ptr[line_start:line_end])
-            
-            pil_img = Image.frombytes('RGBA', (w, h), bytes(img_bytes))
+            pil_img = SFFRenderer._qimage_to_pil(qimg)
+            w, h = pil_img.size
             sprite_images.append(pil_img)
             
             max_height = max(max_height, h)
@@ -6256,6 +6284,16 @@ class SFFViewer(QMainWindow):
         
         return spritesheet
 
+    @staticmethod
+    def _fill_index_where_color(palette_img, rgb_img, color, index):
+        """rgb_img の画素が color と一致する位置だけ palette_img（Pモード）のインデックスを index にする
+
+        画素をPythonのリストに展開せず、チャンネル毎の一致マスクの最小値（AND）をマスクにして貼り付ける
+        """
+        bands = [band.point(lambda v, t=t: 255 if v == t else 0) for band, t in zip(rgb_img.split(), color)]
+        mask = ImageChops.darker(ImageChops.darker(bands[0], bands[1]), bands[2])
+        palette_img.paste(index, mask=mask)
+    
     def _trim_single_image(self, image):
         """単一画像の不要な透過領域をトリミング（キャンバスサイズを最小化）"""
         if not PIL_AVAILABLE:
@@ -6267,24 +6305,36 @@ class SFFViewer(QMainWindow):
                 # より厳密な境界検出：アルファチャンネルと色情報の両方を使用
                 if image.mode == 'RGBA':
                     # RGBAの場合、ピクセル単位で詳細チェック
-                    data = image.getdata()
                     width, height = image.size
                     
                     # 実際にコンテンツがあるピクセルを探す
                     min_x, min_y = width, height
                     max_x, max_y = -1, -1
                     
-                    for y in range(height):
-                        for x in range(width):
-                            idx = y * width + x
-                            r, g, b, a = data[idx]
-                            
-                            # アルファが閾値以上、または色が黒以外の場合
-                            if a > 16 or (r > 8 or g > 8 or b > 8):  # より厳しい閾値
-                                min_x = min(min_x, x)
-                                min_y = min(min_y, y)
-                                max_x = max(max_x, x)
-                                max_y = max(max_y, y)
+                    if NUMPY_AVAILABLE:
+                        # 判定をピクセル毎のループではなく配列演算でまとめて行い、
+                        # 内容のある行・列の範囲だけを取り出す
+                        arr = np.asarray(image)
+                        # アルファが閾値以上、または色が黒以外の場合
+                        content = (arr[:, :, 3] > 16) | (arr[:, :, :3] > 8).any(axis=2)
+                        rows = np.flatnonzero(content.any(axis=1))
+                        cols = np.flatnonzero(content.any(axis=0))
+                        if rows.size:
+                            min_y, max_y = int(rows[0]), int(rows[-1])
+                            min_x, max_x = int(cols[0]), int(cols[-1])
+                    else:
+                        data = image.getdata()
+                        for y in range(height):
+                            for x in range(width):
+                                idx = y * width + x
+                                r, g, b, a = data[idx]
+                                
+                                # アルファが閾値以上、または色が黒以外の場合
+                                if a > 16 or (r > 8 or g > 8 or b > 8):  # より厳しい閾値
+                                    min_x = min(min_x, x)
+                                    min_y = min(min_y, y)
+                                    max_x = max(max_x, x)
+                                    max_y = max(max_y, y)
                     
                     if max_x >= min_x and max_y >= min_y:
                         # 見つかった境界で切り取り
@@ -6473,19 +6523,7 @@ class SFFViewer(QMainWindow):
                 base = Image.new("RGBA", (canvas_w, canvas_h), (0, 0, 0, 0))
                 
                 # QImage -> PIL変換
-                qimg_rgba = qimg.convertToFormat(QImage.Format_RGBA8888)
-                ptr = qimg_rgba.constBits()
-                ptr.setsize(qimg_rgba.byteCount())
-                
-                # バイト配列を正しく取得
-                img_bytes = bytearray()
-                bytes_per_line = qimg_rgba.bytesPerLine()
-                for y in range(h):
-                    line_start = y * bytes_per_line
-                    line_end = line_start + w * 4
-                    img_bytes.extend(ptr[line_start:line_end])
-                
-                pil = Image.frombytes('RGBA', (w, h), bytes(img_bytes))
+                pil = SFFRenderer._qimage_to_pil(qimg)
                 
                 # 反転処理
                 if flip_h:
@@ -6605,17 +6643,7 @@ class SFFViewer(QMainWindow):
                         palette_frame.info['transparency'] = 255
                         
                         # 透明部分をマゼンタ色に変換
-                        pixels = list(palette_frame.getdata())
-                        rgb_pixels = list(rgb_frame.getdata())
-                        new_pixels = []
-                        
-                        for j, pixel in enumerate(pixels):
-                            if rgb_pixels[j] == transparent_color:
-                                new_pixels.append(255)  # マゼンタのインデックス
-                            else:
-                                new_pixels.append(pixel)
-                        
-                        palette_frame.putdata(new_pixels)
+                        self._fill_index_where_color(palette_frame, rgb_frame, transparent_color, 255)  # マゼンタのインデックス
                         converted_frames.append(palette_frame)
                         
                     except Exception as e:
@@ -6772,6 +6800,23 @@ def main():
 # Library API Methods
 # ===============================
 
+# ヘッドレスリーダーのキャッシュ（同一ファイルへのAPI呼び出しでヘッダー・パレットの再解析を省く）
+_headless_reader_cache = {}
+_headless_reader_cache_max_size = 8
+_headless_reader_cache_lock = threading.Lock()
+
+
+def _release_headless_reader(value):
+    """キャッシュから外した (reader, is_v2) の mmap を閉じる
+
+    マップしたままだと Windows ではファイルの上書き・切り詰めができず、
+    (パス, mtime, サイズ) による無効化の前提となるファイル更新そのものを妨げる
+    """
+    reader, is_v2 = value
+    if is_v2:
+        reader.close()
+
+
 class SFFViewerAPI:
     """
     High-level API for SFF Viewer library usage
@@ -6782,12 +6827,50 @@ class SFFViewerAPI:
         """
         Create a headless SFF reader without GUI.
         
+        Parsed readers are cached by (absolute path, mtime, size), so repeated
+        calls against an unchanged file skip header/palette parsing.
+        
         Args:
             file_path (str): Path to SFF file
             
         Returns:
             tuple: (reader, is_v2) - SFF reader object and version flag
         """
+        try:
+            st = os.stat(file_path)
+        except OSError as e:
+            raise ValueError(f"Could not read SFF file: {e}")
+        cache_key = (os.path.abspath(file_path), st.st_mtime_ns, st.st_size)
+        
+        with _headless_reader_cache_lock:
+            value = _headless_reader_cache.pop(cache_key, None)
+            if value is not None:
+                # LRU: アクセスしたアイテムを最後に移動
+                _headless_reader_cache[cache_key] = value
+                return value
+        
+        value = SFFViewerAPI._read_headless(file_path)
+        
+        with _headless_reader_cache_lock:
+            # 同じパスの古いエントリ（ファイル更新前）は破棄
+            for key in [k for k in _headless_reader_cache if k[0] == cache_key[0]]:
+                _release_headless_reader(_headless_reader_cache.pop(key))
+            if len(_headless_reader_cache) >= _headless_reader_cache_max_size:
+                _release_headless_reader(_headless_reader_cache.pop(next(iter(_headless_reader_cache))))
+            _headless_reader_cache[cache_key] = value
+        return value
+    
+    @staticmethod
+    def clear_reader_cache():
+        """Clear the cached headless readers"""
+        with _headless_reader_cache_lock:
+            for value in _headless_reader_cache.values():
+                _release_headless_reader(value)
+            _headless_reader_cache.clear()
+    
+    @staticmethod
+    def _read_headless(file_path):
+        """SFFファイルを解析してリーダーを作成（キャッシュなし）"""
         # SFFファイルの形式を判定
         try:
             with open(file_path, 'rb') as f:
@@ -6799,11 +6882,9 @@ class SFFViewerAPI:
                     f.seek(0)
                     if ver in [(0,0,0,2),(0,1,0,2)]:
                         # SFFv2
-                        reader = SFFV2Reader(file_path)
-                        with open(file_path, 'rb') as f2:
-                            reader.read_header(f2)
-                            reader.read_palettes(f2)
-                            reader.read_sprites(f2)
+                        # スプライトデータは mmap から直接デコードする（スプライト毎の open/read を省く）。
+                        # mmap はリーダーがキャッシュから外れた時点で close() される
+                        reader = SFFV2Reader(file_path).load()
                         return reader, True
                     else:
                         # SFFv1 (Elecbyte形式)
@@ -6882,7 +6963,61 @@ class SFFViewerAPI:
         return sprites_info
     
     @staticmethod
-    def extract_sprite_image(file_path, sprite_index, output_path=None):
+    def get_sprite_table(file_path):
+        """
+        Get the sprite directory as a NumPy structured array.
+        
+        One record per sprite with the fields listed in ``SPRITE_TABLE_DTYPE``
+        (group, image, w, h, x, y, offset, size, palette, fmt).
+        
+        Args:
+            file_path (str): Path to SFF file
+            
+        Returns:
+            numpy.ndarray: Structured array of sprite records
+        """
+        if not NUMPY_AVAILABLE:
+            raise ImportError("get_sprite_table requires numpy")
+        reader, _ = SFFViewerAPI.create_headless_reader(file_path)
+        return np.array(SFFViewerAPI._sprite_rows(reader), dtype=SFFViewerAPI.SPRITE_TABLE_DTYPE)
+    
+    @staticmethod
+    def get_sprite_list(file_path):
+        """
+        Get the sprite directory as a list of dictionaries.
+        
+        Same fields as ``get_sprite_table``, one dict per sprite.
+        
+        Args:
+            file_path (str): Path to SFF file
+            
+        Returns:
+            list: List of sprite record dictionaries
+        """
+        reader, _ = SFFViewerAPI.create_headless_reader(file_path)
+        names = [name for name, _ in SFFViewerAPI.SPRITE_TABLE_DTYPE]
+        return [dict(zip(names, row)) for row in SFFViewerAPI._sprite_rows(reader)]
+    
+    # get_sprite_table のレコード型
+    SPRITE_TABLE_DTYPE = [
+        ('group', 'i4'), ('image', 'i4'), ('w', 'u2'), ('h', 'u2'),
+        ('x', 'i2'), ('y', 'i2'), ('offset', 'u8'), ('size', 'u4'),
+        ('palette', 'i2'), ('fmt', 'u1'),
+    ]
+    
+    @staticmethod
+    def _sprite_rows(reader):
+        """リーダーのスプライト情報を SPRITE_TABLE_DTYPE 順のタプルに変換"""
+        return [
+            (s.get('group_no', 0), s.get('sprite_no', 0), s.get('width', 0), s.get('height', 0),
+             s.get('x_axis', 0), s.get('y_axis', 0), s.get('data_ofs', 0), s.get('data_len', 0),
+             s.get('pal_idx', 0), s.get('fmt', 0) or 0)
+            for s in reader.sprites
+        ]
+    
+    @staticmethod
+    def extract_sprite_image(file_path, sprite_index, output_path=None, dst=None,
+                             target_size=None, scale=None, png_compression=1):
         """
         Extract a sprite as an image file.
         
@@ -6890,29 +7025,117 @@ class SFFViewerAPI:
             file_path (str): Path to SFF file
             sprite_index (int): Index of the sprite
             output_path (str, optional): Output image path. If None, returns QImage
+            dst (QImage, optional): Previously returned QImage to decode into.
+                Reused in place when its size and format match the sprite
+            target_size (tuple, optional): (width, height) box to shrink the
+                sprite into, keeping its aspect ratio
+            scale (float, optional): Downscale factor (< 1.0) used when
+                target_size is not given
+            png_compression (int): zlib level 0-9 used when output_path is a PNG
             
         Returns:
             QImage or bool: QImage object if output_path is None, 
                            success status if output_path is provided
         """
-        from PyQt5.QtGui import QImage
-        
         reader, is_v2 = SFFViewerAPI.create_headless_reader(file_path)
-        config = Config()
-        renderer = SFFRenderer(config)
-        
-        if sprite_index >= len(reader.sprites):
-            raise IndexError(f"Sprite index {sprite_index} out of range")
-        
-        # Render the sprite
-        qimg, _ = renderer.render_sprite(reader, sprite_index, None, is_v2, [])
-        
+        qimg = SFFViewerAPI._render_batch(reader, is_v2, [sprite_index], [dst],
+                                          target_size, scale)[0]
+
         if output_path:
-            success = qimg.save(output_path)
+            success = SFFViewerAPI._write_image(qimg, output_path, png_compression)
             return success
         else:
             return qimg
 
+    @staticmethod
+    def _write_image(qimg, output_path, png_compression=1):
+        """QImageを保存（PNGは圧縮レベルを指定、BMPは無圧縮でそのまま書き出し）"""
+        suffix = os.path.splitext(output_path)[1].lower()
+        if suffix != '.png':
+            return qimg.save(output_path)
+        writer = QImageWriter(output_path, b'png')
+        # QtのPNGハンドラは quality から zlib レベルを (100 - quality) * 9 / 91 で求める
+        level = max(0, min(9, int(png_compression)))
+        writer.setQuality(100 - (level * 91 + 8) // 9)
+        return writer.write(qimg)
+
+    @staticmethod
+    def extract_sprite_images(file_path, indices, output_dir=None, max_workers=None,
+                              png_compression=1):
+        """
+        Extract several sprites in one pass.
+
+        The SFF file is opened and parsed only once for the whole batch, and
+        sprites are decoded in on-disk order so file reads stay sequential.
+
+        Args:
+            file_path (str): Path to SFF file
+            indices (list): Indices of the sprites to extract
+            output_dir (str, optional): Directory to write ``sprite_<index>.png``
+                files into. If None, QImage objects are returned
+            max_workers (int, optional): Number of decode threads.
+                Defaults to ``os.cpu_count()``; 1 decodes sequentially
+            png_compression (int): zlib level 0-9 for the written PNG files
+
+        Returns:
+            list: QImage objects (or success flags if output_dir is provided),
+                  in the same order as ``indices``
+        """
+        reader, is_v2 = SFFViewerAPI.create_headless_reader(file_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        return SFFViewerAPI._render_batch(reader, is_v2, indices,
+                                          max_workers=max_workers, output_dir=output_dir,
+                                          png_compression=png_compression)
+
+    @staticmethod
+    def _render_batch(reader, is_v2, indices, dsts=None, target_size=None, scale=None,
+                      max_workers=1, output_dir=None, png_compression=1):
+        """読み込み済みリーダーから複数スプライトをまとめてQImage化（入力順で返す）
+
+        dsts を指定すると indices と同じ位置のQImageを出力先として再利用する
+        output_dir を指定すると各スプライトを保存し、成功状態を返す
+        max_workers > 1 の場合はスレッドプールで並列にデコードする
+        """
+        for sprite_index in indices:
+            if sprite_index >= len(reader.sprites):
+                raise IndexError(f"Sprite index {sprite_index} out of range")
+
+        renderer = SFFRenderer(Config())
+
+        def render(pos):
+            dst = dsts[pos] if dsts else None
+            qimg, _ = renderer.render_sprite(reader, indices[pos], None, is_v2, [], dst,
+                                             target_size, scale)
+            if output_dir:
+                return SFFViewerAPI._write_image(
+                    qimg, os.path.join(output_dir, f'sprite_{indices[pos]}.png'), png_compression)
+            return qimg
+
+        # ファイル上のオフセット順にデコードしてシーケンシャルな読み込みにする
+        order = sorted(range(len(indices)),
+                       key=lambda i: reader.sprites[indices[i]].get('data_ofs', 0))
+        results = [None] * len(indices)
+        if max_workers <= 1 or len(indices) <= 1:
+            for pos in order:
+                results[pos] = render(pos)
+            return results
+
+        # 同時に投入するタスクは 2*max_workers までに抑え、デコード途中のバッファが溜まらないようにする
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            pending = {}
+            for pos in order:
+                if len(pending) >= 2 * max_workers:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        results[pending.pop(future)] = future.result()
+                pending[pool.submit(render, pos)] = pos
+            for future in as_completed(pending):
+                results[pending[future]] = future.result()
+        return results
+
 
 def create_standalone_viewer(config=None):
     """スタンドアロンビューア作成"""
@@ -16,16 +16,52 @@ SffCharaViewer Python Module
     image = api.extract_sprite_image("character.sff", 0)
 """
 
+from __future__ import annotations
+
 import sys
 import os
-from typing import Optional, List, Dict, Any, Union
+import logging
+import dataclasses
+from typing import Optional, List, Dict, Any, Union, TYPE_CHECKING
+
+# パッケージ経由（<pkg>.SffCharaViewerModule）で読み込まれた場合も、素の名前での
+# import が同じモジュールを返すように登録する（キャッシュが二重化しないように）
+if __name__ not in ('SffCharaViewerModule', '__main__'):
+    _canonical = sys.modules.setdefault('SffCharaViewerModule', sys.modules[__name__])
+    if _canonical is not sys.modules[__name__]:
+        logging.warning("SffCharaViewerModule is imported under two names (%s and SffCharaViewerModule); "
+                        "module-level caches are not shared", __name__)
+
+if TYPE_CHECKING:
+    from SffCharaViewer import SFFViewer, SFFViewerConfig, SFFViewerAPI
+
+# メインモジュール（PyQt5を含む）は実際に必要になるまで読み込まない
+_LAZY_ATTRS = {
+    'SFFViewer': 'SFFViewer',
+    'SFFViewerConfig': 'SFFViewerConfig',
+    'SFFViewerAPI': 'SFFViewerAPI',
+    'run_standalone': 'main',
+    'create_standalone_viewer': 'create_standalone_viewer',
+}
+
+
+def _viewer_attr(name: str):
+    """SffCharaViewer から属性を遅延インポートして取得"""
+    try:
+        import SffCharaViewer
+    except ImportError:
+        if not __package__:
+            raise
+        from . import SffCharaViewer
+    value = getattr(SffCharaViewer, _LAZY_ATTRS[name])
+    globals()[name] = value
+    return value
+
 
-# メインモジュールからインポート
-from SffCharaViewer import (
-    SFFViewer, SFFViewerConfig, SFFViewerAPI,
-    main as run_standalone,
-    create_standalone_viewer
-)
+def __getattr__(name: str):
+    if name in _LAZY_ATTRS:
+        return _viewer_attr(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # バージョン情報
 __version__ = "1.0.0"
@@ -45,7 +81,7 @@ class SFFViewerModule:
         Args:
             config: SFFViewerConfig オブジェクト（オプション）
         """
-        self.config = config or SFFViewerConfig()
+        self.config = config or _viewer_attr('SFFViewerConfig')()
         self._viewer = None
         self._app = None
     
@@ -62,10 +98,13 @@ class SFFViewerModule:
         from PyQt5.QtWidgets import QApplication
         
         # QApplicationが存在しない場合は作成
+        global _qt_app
         if not QApplication.instance():
             self._app = QApplication(sys.argv)
+            # モジュールオブジェクトより長く生存させる（破棄されるとビューアも削除される）
+            _qt_app = self._app
         
-        self._viewer = create_standalone_viewer(self.config)
+        self._viewer = _viewer_attr('create_standalone_viewer')(self.config)
         
         if show_immediately:
             self._viewer.show()
@@ -98,24 +137,63 @@ class SFFViewerModule:
         Returns:
             SFFViewerAPI: APIオブジェクト
         """
-        return SFFViewerAPI
+        return _viewer_attr('SFFViewerAPI')
+
+
+# create_gui_viewer が作成したQApplication
+_qt_app = None
+
+# 設定ごとに再利用するGUIビューア（ウィジェットツリーの再構築を避ける）
+_viewer_cache: Dict[tuple, Any] = {}
+
+
+def _viewer_cache_key(config: SFFViewerConfig) -> tuple:
+    # 設定の全フィールドをキーにする（一部だけだと別設定のビューアを誤って再利用する）
+    return dataclasses.astuple(config)
 
 
 # 便利な関数群
 def create_viewer(config: Optional[SFFViewerConfig] = None, 
-                 show: bool = False) -> SFFViewer:
+                 show: bool = False, reuse: bool = False) -> SFFViewer:
     """
     SFFViewerインスタンスを作成（簡略版）
     
     Args:
         config: 設定オブジェクト
         show: 即座に表示するかどうか
+        reuse: Trueの場合、同じ設定で作成済みのビューアがあればそれを返す
         
     Returns:
         SFFViewer: ビューアオブジェクト
     """
+    if reuse:
+        config = config or _viewer_attr('SFFViewerConfig')()
+        key = _viewer_cache_key(config)
+        viewer = _viewer_cache.get(key)
+        if viewer is not None:
+            if show:
+                viewer.show()
+                if hasattr(viewer, 'image_window'):
+                    viewer.image_window.show()
+            return viewer
+    
     module = SFFViewerModule(config)
-    return module.create_gui_viewer(show)
+    viewer = module.create_gui_viewer(show)
+    if reuse:
+        _viewer_cache[key] = viewer
+    return viewer
+
+
+def close_cached_viewer():
+    """
+    create_viewer(reuse=True) で保持しているビューアを閉じて解放
+    """
+    while _viewer_cache:
+        _, viewer = _viewer_cache.popitem()
+        viewer.close()
+        if hasattr(viewer, 'image_window'):
+            viewer.image_window.close()
+        viewer.deleteLater()
 
 
 def create_config(debug_mode: bool = False, 
@@ -134,7 +212,7 @@ def create_config(debug_mode: bool = False,
     Returns:
         SFFViewerConfig: 設定オブジェクト
     """
-    return SFFViewerConfig(
+    return _viewer_attr('SFFViewerConfig')(
         debug_mode=debug_mode,
         default_scale=default_scale,
         window_width=window_width,
@@ -142,21 +220,27 @@ def create_config(debug_mode: bool = False,
     )
 
 
-def get_sprite_info(file_path: str) -> List[Dict[str, Any]]:
+def get_sprite_info(file_path: str, as_table: bool = False):
     """
     SFFファイルのスプライト情報を取得（簡略版）
     
     Args:
         file_path: SFFファイルパス
+        as_table: Trueの場合はNumPy構造化配列で返す（大量スプライト向け）
         
     Returns:
-        list: スプライト情報のリスト
+        list or numpy.ndarray: スプライト情報のリスト、または構造化配列
     """
-    return SFFViewerAPI.get_sprite_list(file_path)
+    api = _viewer_attr('SFFViewerAPI')
+    if as_table:
+        return api.get_sprite_table(file_path)
+    return api.get_sprite_list(file_path)
 
 
 def extract_sprite(file_path: str, sprite_index: int, 
-                  output_path: Optional[str] = None):
+                  output_path: Optional[str] = None, dst=None,
+                  target_size: Optional[tuple] = None, scale: Optional[float] = None,
+                  png_compression: int = 1):
     """
     スプライトを画像として抽出（簡略版）
     
@@ -164,18 +248,53 @@ def extract_sprite(file_path: str, sprite_index: int,
         file_path: SFFファイルパス
         sprite_index: スプライトインデックス
         output_path: 出力パス（Noneの場合はQImageを返す）
+        dst: 以前に返されたQImage（サイズ・フォーマットが一致すれば上書きして再利用）
+        target_size: 縮小先の (幅, 高さ)（縦横比は維持）
+        scale: 縮小率（target_size 未指定時、1.0未満で有効）
+        png_compression: PNG保存時のzlib圧縮レベル（0-9、低いほど高速）
         
     Returns:
         QImage or bool: 画像オブジェクトまたは成功状態
     """
-    return SFFViewerAPI.extract_sprite_image(file_path, sprite_index, output_path)
+    return _viewer_attr('SFFViewerAPI').extract_sprite_image(
+        file_path, sprite_index, output_path, dst, target_size, scale, png_compression)
+
+
+def extract_sprites(file_path: str, indices: List[int],
+                    output_dir: Optional[str] = None,
+                    max_workers: Optional[int] = None,
+                    png_compression: int = 1) -> List[Any]:
+    """
+    複数スプライトを一括で画像として抽出（簡略版）
+    
+    SFFファイルの読み込み・解析は1回だけ行われる
+    
+    Args:
+        file_path: SFFファイルパス
+        indices: スプライトインデックスのリスト
+        output_dir: 出力ディレクトリ（Noneの場合はQImageのリストを返す）
+        max_workers: デコードスレッド数（Noneの場合はCPU数、1で逐次処理）
+        png_compression: PNG保存時のzlib圧縮レベル（0-9、低いほど高速）
+        
+    Returns:
+        list: 画像オブジェクトまたは成功状態のリスト（indicesと同じ順序）
+    """
+    return _viewer_attr('SFFViewerAPI').extract_sprite_images(
+        file_path, indices, output_dir, max_workers, png_compression)
+
+
+def clear_cache():
+    """
+    APIが保持している解析済みSFFのキャッシュを破棄
+    """
+    _viewer_attr('SFFViewerAPI').clear_reader_cache()
 
 
 def run_standalone_app():
     """
     スタンドアロンアプリケーションとして実行
     """
-    return run_standalone()
+    return _viewer_attr('run_standalone')()
 
 
 # エクスポートする主要なクラス・関数
@@ -185,24 +304,76 @@ __all__ = [
     'SFFViewerConfig',
     'SFFViewerAPI',
     'create_viewer',
+    'close_cached_viewer',
     'create_config', 
     'get_sprite_info',
     'extract_sprite',
+    'extract_sprites',
+    'clear_cache',
     'run_standalone_app',
     '__version__',
     '__author__'
 ]
 
 
-# モジュールレベルでの使用例とテスト
-if __name__ == '__main__':
+def _cli_extract_job(file_path: str, index: str, output_path: str) -> bool:
+    """CLIの抽出ジョブを1件実行（エラーは標準エラーへ出力）"""
+    try:
+        ok = extract_sprite(file_path, int(index), output_path)
+    except Exception as e:
+        print(f"{file_path}[{index}]: {e}", file=sys.stderr)
+        return False
+    if not ok:
+        print(f"{file_path}[{index}]: failed to write {output_path}", file=sys.stderr)
+    return bool(ok)
+
+
+def cli_main(argv: Optional[List[str]] = None) -> int:
+    """
+    コマンドラインのエントリポイント
+    
+    以下の単純な形式は argparse を通さずに処理する（シェルループからの大量呼び出し向け）:
+        --extract <file> <index> <output>
+        --batch-stdin    標準入力の各行 "<file> <index> <output>" を1プロセスでまとめて処理
+                         （パスに空白を含む場合はタブ区切り、# で始まる行は無視）
+    それ以外（--test-api / --test-gui / --file）は argparse で解釈する
+    
+    Returns:
+        int: 終了コード
+    """
+    argv = sys.argv[1:] if argv is None else list(argv)
+    
+    if len(argv) == 4 and argv[0] == '--extract':
+        return 0 if _cli_extract_job(*argv[1:]) else 1
+    
+    if argv == ['--batch-stdin']:
+        failed = 0
+        for line in sys.stdin:
+            line = line.rstrip('\r\n')
+            if not line.strip() or line.lstrip().startswith('#'):
+                continue
+            job = line.split('\t') if '\t' in line else line.split()
+            if len(job) != 3:
+                print(f"invalid job line: {line}", file=sys.stderr)
+                failed += 1
+            elif not _cli_extract_job(*job):
+                failed += 1
+        return 1 if failed else 0
+    
+    return _run_test_cli(argv)
+
+
+def _run_test_cli(argv: List[str]) -> int:
+    """テスト用CLI（argparse使用）"""
     import argparse
     
-    parser = argparse.ArgumentParser(description='SffCharaViewer Module Test')
+    parser = argparse.ArgumentParser(
+        description='SffCharaViewer Module Test',
+        epilog='Fast paths: --extract <file> <index> <output> | --batch-stdin')
     parser.add_argument('--test-api', action='store_true', help='Test API functionality')
     parser.add_argument('--test-gui', action='store_true', help='Test GUI functionality')
     parser.add_argument('--file', type=str, help='SFF file for testing')
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     if args.test_api:
         print("Testing API functionality...")
@@ -240,3 +411,10 @@ if __name__ == '__main__':
     else:
         # デフォルトはスタンドアロン実行
         run_standalone_app()
+    
+    return 0
+
+
+# モジュールレベルでの使用例とテスト
+if __name__ == '__main__':
+    sys.exit(cli_main())
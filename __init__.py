@@ -48,28 +48,45 @@ Classes:
 __version__ = "1.0.0"
 __author__ = "SffCharaViewer Development Team"
 
-# Import main classes for easy access
-try:
-    from .SffCharaViewer import SFFViewer, SFFViewerConfig, SFFViewerAPI
-    from .SffCharaViewerModule import (
-        SFFViewerModule, create_viewer, create_config,
-        get_sprite_info, extract_sprite, run_standalone_app
-    )
-except ImportError:
+import importlib
+
+# Import main classes lazily (PEP 562) so that importing the package does not
+# pull in PyQt5 until a viewer/API object is actually requested
+_LAZY_EXPORTS = {
+    'SFFViewer': 'SffCharaViewer',
+    'SFFViewerConfig': 'SffCharaViewer',
+    'SFFViewerAPI': 'SffCharaViewer',
+    'SFFViewerModule': 'SffCharaViewerModule',
+    'create_viewer': 'SffCharaViewerModule',
+    'close_cached_viewer': 'SffCharaViewerModule',
+    'create_config': 'SffCharaViewerModule',
+    'get_sprite_info': 'SffCharaViewerModule',
+    'extract_sprite': 'SffCharaViewerModule',
+    'extract_sprites': 'SffCharaViewerModule',
+    'run_standalone_app': 'SffCharaViewerModule',
+}
+
+
+def _import_submodule(module_name):
+    if __package__:
+        try:
+            return importlib.import_module('.' + module_name, __package__)
+        except ImportError:
+            pass
     # Fallback for when running as standalone
     try:
-        from SffCharaViewer import SFFViewer, SFFViewerConfig, SFFViewerAPI
-        from SffCharaViewerModule import (
-            SFFViewerModule, create_viewer, create_config,
-            get_sprite_info, extract_sprite, run_standalone_app
-        )
+        return importlib.import_module(module_name)
     except ImportError:
-        # If all imports fail, define minimal interface
-        def create_viewer(*args, **kwargs):
-            raise ImportError("SffCharaViewer modules not available")
-        
-        def get_sprite_info(*args, **kwargs):
-            raise ImportError("SffCharaViewer modules not available")
+        raise ImportError("SffCharaViewer modules not available")
+
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(_import_submodule(module_name), name)
+    globals()[name] = value
+    return value
 
 # Public API
 __all__ = [
@@ -78,9 +95,11 @@ __all__ = [
     'SFFViewerAPI',
     'SFFViewerModule',
     'create_viewer',
+    'close_cached_viewer',
     'create_config',
     'get_sprite_info',
     'extract_sprite',
+    'extract_sprites',
     'run_standalone_app',
     'open_sff_file'
 ]
@@ -98,9 +117,10 @@ def open_sff_file(file_path, show_gui=True, config=None):
         SFFViewer: The viewer instance with the file loaded
     """
     if config is None:
-        config = create_config()
+        config = __getattr__('create_config')()
     
-    viewer = create_viewer(config, show=show_gui)
+    # Reuse an existing viewer built with the same config and just reload the file
+    viewer = __getattr__('create_viewer')(config, show=show_gui, reuse=True)
     
     success = viewer.load_sff_file(file_path)
     if not success:
@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+"""
+python -m <package> で SffCharaViewerModule のコマンドラインを実行
+
+    python -m SffCharaViewer --extract character.sff 0 sprite_0.png
+    python -m SffCharaViewer --batch-stdin < jobs.txt
+"""
+
+import sys
+
+try:
+    from .SffCharaViewerModule import cli_main
+except ImportError:
+    # Fallback for when running as standalone
+    from SffCharaViewerModule import cli_main
+
+sys.exit(cli_main())
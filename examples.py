@@ -10,12 +10,14 @@ and as a standalone application.
 import sys
 import os
 
-# Add the current directory to Python path for import
-current_dir = os.path.dirname(os.path.abspath(__file__))
-sys.path.insert(0, current_dir)
-
-# Import the module
-import SffCharaViewerModule as sffv
+# Import the module. Only touch sys.path when it is not already importable,
+# so an already-loaded instance (and its caches) is reused instead of a copy
+try:
+    import SffCharaViewerModule as sffv
+except ImportError:
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, current_dir)
+    import SffCharaViewerModule as sffv
 
 
 def example_1_simple_gui():
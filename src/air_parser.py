@@ -7,14 +7,149 @@ AIR（Animation Information Resource）ファイルの読み込みと処理を
 import os
 import re
 import logging
+import pickle
+import hashlib
+import tempfile
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, List, Optional, Any
 
 
+# 行ごとに使用する正規表現はモジュール読み込み時に一度だけコンパイル
+_RE_BEGIN = re.compile(r'^\[?\s*begin\s+action\s+(-?\d+)\s*\]?$', re.I)
+_RE_INT = re.compile(r'-?\d+')
+_RE_SPLIT = re.compile(r'\s*,\s*')
+_RE_CLSN1_DEF = re.compile(r'clsn1default\s*:\s*(\d+)')
+_RE_CLSN2_DEF = re.compile(r'clsn2default\s*:\s*(\d+)')
+_RE_CLSN1 = re.compile(r'clsn1\s*:\s*(\d+)')
+_RE_CLSN2 = re.compile(r'clsn2\s*:\s*(\d+)')
+
+# 数値のみの座標行（カンマ区切りで4項目、各項目は '-' 付きの整数）
+# Python のループで1文字ずつ判定する代わりに、コンパイル済みの照合器で1回で判定する
+_RE_COORD_ROW = re.compile(
+    r'[ \t\r\f\v]*-*[0-9]+[ \t\r\f\v]*(?:,[ \t\r\f\v]*-*[0-9]+[ \t\r\f\v]*){3}')
+
+
+def _has_clsn_index(line_lower: str) -> bool:
+    """
+    行に 'clsn1[n] =' / 'clsn2[n] =' 形式が含まれるかを文字列操作で判定
+    
+    clsn1 / clsn2 の直後に '[数字]'、任意の空白、'=' が続く箇所を探す
+    """
+    n = len(line_lower)
+    pos = line_lower.find('clsn')
+    while pos >= 0:
+        i = pos + 4
+        if i + 1 < n and line_lower[i] in '12' and line_lower[i + 1] == '[':
+            k = i + 2
+            while k < n and line_lower[k].isdecimal():
+                k += 1
+            if k > i + 2 and k < n and line_lower[k] == ']':
+                k += 1
+                while k < n and line_lower[k].isspace():
+                    k += 1
+                if k < n and line_lower[k] == '=':
+                    return True
+        pos = line_lower.find('clsn', pos + 1)
+    return False
+
+
+def _parse_quad(text: str) -> Optional['ClsnRect']:
+    """
+    'x1, y1, x2, y2' 形式の文字列から当たり判定矩形を取得
+    
+    先頭4項目がそのまま整数に変換できる通常の行は項目をそのまま変換し、
+    それ以外の行は文字列中の整数を順に拾う。4つ揃わない場合は None
+    """
+    if '_' not in text:
+        fields = _RE_SPLIT.split(text, 4)
+        if len(fields) >= 4:
+            try:
+                return ClsnRect(int(fields[0]), int(fields[1]), int(fields[2]), int(fields[3]))
+            except ValueError:
+                pass
+    coords = _extract_ints(text, 4)
+    if len(coords) >= 4:
+        return ClsnRect(coords[0], coords[1], coords[2], coords[3])
+    return None
+
+
+def _extract_ints(text: str, limit: int) -> list:
+    """
+    文字列中の整数（直前の '-' を符号とする）を先頭から最大 limit 個取得
+    
+    数字を読みながら値を組み立て、limit 個揃った時点で打ち切る。
+    ASCII 以外の数字を含みうる行は正規表現で処理する
+    """
+    if not text.isascii():
+        return [int(v) for v in _RE_INT.findall(text)[:limit]]
+    
+    values = []
+    value = 0
+    negative = False
+    in_number = False
+    prev = ''
+    for ch in text:
+        if '0' <= ch <= '9':
+            if not in_number:
+                in_number = True
+                negative = prev == '-'
+                value = 0
+            value = value * 10 + (ord(ch) - 48)
+        elif in_number:
+            values.append(-value if negative else value)
+            if len(values) == limit:
+                return values
+            in_number = False
+        prev = ch
+    if in_number:
+        values.append(-value if negative else value)
+    return values
+
+
+class ClsnRect(namedtuple('ClsnRect', 'x1 y1 x2 y2')):
+    """
+    当たり判定矩形 (x1, y1, x2, y2)
+    
+    辞書より小さいタプルとして保持しつつ、既存コードの box.get('x1') / box['x1']
+    形式のアクセスにも対応する
+    """
+    
+    __slots__ = ()
+    
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        return tuple.__getitem__(self, key)
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        """辞書互換のキー取得"""
+        if key in self._fields:
+            return getattr(self, key)
+        return default
+    
+    def keys(self):
+        """辞書互換のキー一覧"""
+        return self._fields
+
+
 class AIRFrame:
     """AIRフレームデータクラス"""
     
+    # フレーム数が多いため __dict__ を持たせずメモリと属性アクセスを節約
+    __slots__ = ('group', 'image', 'x', 'y', 'duration', 'time', 'flip',
+                 'flip_h', 'flip_v', 'blend_mode', 'alpha_value',
+                 'clsn1', 'clsn2', 'loopstart')
+    
     def __init__(self, group: int, image: int, x: int = 0, y: int = 0, 
-                 duration: int = 1, flip: int = 0, **kwargs):
+                 duration: int = 1, flip: int = 0, *,
+                 flip_h: bool = False, flip_v: bool = False,
+                 blend_mode: str = 'normal', alpha_value: float = 1.0,
+                 clsn1: Optional[list] = None, clsn2: Optional[list] = None,
+                 loopstart: bool = False):
         self.group = group
         self.image = image
         self.x = x
@@ -24,13 +159,13 @@ class AIRFrame:
         self.flip = flip
         
         # 拡張属性
-        self.flip_h = kwargs.get('flip_h', False)
-        self.flip_v = kwargs.get('flip_v', False)
-        self.blend_mode = kwargs.get('blend_mode', 'normal')
-        self.alpha_value = kwargs.get('alpha_value', 1.0)
-        self.clsn1 = kwargs.get('clsn1', [])
-        self.clsn2 = kwargs.get('clsn2', [])
-        self.loopstart = kwargs.get('loopstart', False)
+        self.flip_h = flip_h
+        self.flip_v = flip_v
+        self.blend_mode = blend_mode
+        self.alpha_value = alpha_value
+        self.clsn1 = clsn1 if clsn1 is not None else []
+        self.clsn2 = clsn2 if clsn2 is not None else []
+        self.loopstart = loopstart
     
     def to_dict(self) -> Dict[str, Any]:
         """辞書形式で返す（既存コードとの互換性）"""
@@ -55,6 +190,8 @@ class AIRFrame:
 class AIRAnimation:
     """AIRアニメーションデータクラス"""
     
+    __slots__ = ('animation_no', 'frames', 'loop_start_index')
+    
     def __init__(self, animation_no: int):
         self.animation_no = animation_no
         self.frames: List[AIRFrame] = []
@@ -81,26 +218,246 @@ class AIRAnimation:
         return [frame.to_dict() for frame in self.frames]
 
 
+# 反転・合成パラメータの解析結果 {フレーム行の第6項目: (flip_h, flip_v, blend_mode, alpha_value, flip)}
+# 取り得るトークンは少数なので、行ごとの部分文字列検索を辞書引き1回にする
+_FLIP_TABLE: Dict[str, tuple] = {}
+_FLIP_TABLE_MAX = 256
+
+
+def _parse_flip(flip_raw: str) -> tuple:
+    """反転・合成パラメータ文字列を (flip_h, flip_v, blend_mode, alpha_value, flip) に変換"""
+    flip_h = False
+    flip_v = False
+    blend_mode = 'normal'
+    alpha_value = 1.0
+    
+    if flip_raw:
+        flip_upper = flip_raw.upper().strip()
+        # 反転処理
+        if 'H' in flip_upper:
+            flip_h = True
+        if 'V' in flip_upper:
+            flip_v = True
+        
+        # 合成処理
+        if 'A1' in flip_upper:
+            blend_mode = 'add'
+            alpha_value = 0.5
+        elif 'A' in flip_upper:
+            blend_mode = 'add'
+            alpha_value = 1.0
+        elif 'S' in flip_upper:
+            blend_mode = 'subtract'
+    
+    # 従来のflip値も保持
+    flip_legacy = 0
+    if flip_h and flip_v:
+        flip_legacy = 3
+    elif flip_h:
+        flip_legacy = 1
+    elif flip_v:
+        flip_legacy = 2
+    
+    return flip_h, flip_v, blend_mode, alpha_value, flip_legacy
+
+
+# 解析結果のディスクキャッシュ（パス・更新時刻・サイズが同じファイルは再解析しない）
+AIR_DISK_CACHE_ENABLED = True
+AIR_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'SffCharaViewer', 'air')
+# 解析結果の形式を変更した時に古いキャッシュを無効化するためのバージョン
+_AIR_CACHE_VERSION = 1
+# キャッシュファイルの最大数（超えた場合は古いものから削除）
+_AIR_CACHE_MAX_FILES = 512
+
+
+def _air_cache_path(path: str, as_dict: bool) -> Optional[str]:
+    """キャッシュファイルのパスを取得（無効時や stat できない場合は None）"""
+    if not AIR_DISK_CACHE_ENABLED:
+        return None
+    try:
+        abs_path = os.path.abspath(path)
+        st = os.stat(abs_path)
+    except OSError:
+        return None
+    key = f"{_AIR_CACHE_VERSION}|{int(as_dict)}|{abs_path}|{st.st_mtime_ns}|{st.st_size}"
+    digest = hashlib.blake2b(key.encode('utf-8', 'surrogatepass'), digest_size=16).hexdigest()
+    return os.path.join(AIR_CACHE_DIR, digest + '.pkl')
+
+
+def _load_air_cache(cache_path: str) -> Optional[Dict[int, Any]]:
+    """キャッシュを読み込む（存在しない・読めない場合は None）"""
+    try:
+        with open(cache_path, 'rb') as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logging.debug(f"AIR cache read failed {cache_path}: {e}")
+        return None
+
+
+def _store_air_cache(cache_path: str, animations: Dict[int, Any]) -> None:
+    """キャッシュを一時ファイル経由で書き込む（失敗しても解析結果には影響しない）"""
+    tmp_path = None
+    try:
+        os.makedirs(AIR_CACHE_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=AIR_CACHE_DIR, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(animations, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+        tmp_path = None
+        _prune_air_cache()
+    except Exception as e:
+        logging.debug(f"AIR cache write failed {cache_path}: {e}")
+    finally:
+        if tmp_path is not None:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+
+def _prune_air_cache() -> None:
+    """キャッシュファイル数が上限を超えた場合に古いものから削除"""
+    try:
+        entries = [e for e in os.scandir(AIR_CACHE_DIR) if e.name.endswith('.pkl')]
+    except OSError:
+        return
+    if len(entries) <= _AIR_CACHE_MAX_FILES:
+        return
+    
+    def _mtime(entry):
+        try:
+            return entry.stat().st_mtime_ns
+        except OSError:
+            return 0
+    
+    entries.sort(key=_mtime)
+    for entry in entries[:len(entries) - _AIR_CACHE_MAX_FILES]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
+
+
+def clear_air_cache() -> None:
+    """AIR解析結果のディスクキャッシュを削除"""
+    try:
+        names = os.listdir(AIR_CACHE_DIR)
+    except OSError:
+        return
+    for name in names:
+        if name.endswith(('.pkl', '.tmp')):
+            try:
+                os.remove(os.path.join(AIR_CACHE_DIR, name))
+            except OSError:
+                pass
+
+
+def _make_frame_record(as_dict: bool, group: int, image: int, x: int, y: int,
+                       duration: int, flip: int, flip_h: bool, flip_v: bool,
+                       blend_mode: str, alpha_value: float,
+                       clsn1: list, clsn2: list, loopstart: bool = False):
+    """フレームを辞書（parse_air用）または AIRFrame（parse_air_full用）として生成"""
+    if as_dict:
+        return {
+            'group': group,
+            'image': image,
+            'x': x,
+            'y': y,
+            'duration': duration,
+            'time': duration,
+            'flip': flip,
+            'flip_h': flip_h,
+            'flip_v': flip_v,
+            'blend_mode': blend_mode,
+            'alpha_value': alpha_value,
+            'clsn1': clsn1,
+            'clsn2': clsn2,
+            'loopstart': loopstart
+        }
+    return AIRFrame(group, image, x, y, duration, flip,
+                    flip_h=flip_h, flip_v=flip_v,
+                    blend_mode=blend_mode, alpha_value=alpha_value,
+                    clsn1=clsn1, clsn2=clsn2, loopstart=loopstart)
+
+
 class AIRParser:
     """AIRファイルパーサークラス"""
     
     @staticmethod
     def parse_air(path: str) -> Dict[int, List[Dict[str, int]]]:
         """AIRファイルを解析（既存インターフェース互換）"""
-        animations = AIRParser.parse_air_full(path)
-        
-        # 既存形式に変換
-        result = {}
-        for anim_no, animation in animations.items():
-            result[anim_no] = animation.get_frame_list()
-        
-        return result
+        # AIRFrame を経由せず、フレームを直接辞書として生成する
+        return AIRParser._parse(path, as_dict=True)
     
     @staticmethod
     def parse_air_full(path: str) -> Dict[int, AIRAnimation]:
         """AIRファイルを完全解析"""
-        animations: Dict[int, AIRAnimation] = {}
+        return AIRParser._parse(path, as_dict=False)
+    
+    @staticmethod
+    def parse_air_batch(paths: List[str], max_workers: Optional[int] = None) -> Dict[str, Dict[int, List[Dict[str, Any]]]]:
+        """
+        複数のAIRファイルをまとめて解析（parse_air と同じ形式を返す）
+        
+        解析は正規表現と文字列処理が中心でGILに縛られるため、プロセスプールで並列化する。
+        ファイルが1つの場合やプロセスを起動できない環境では順番に解析する
+        
+        Args:
+            paths: AIRファイルパスのリスト
+            max_workers: ワーカープロセス数（None の場合はCPU数）
+            
+        Returns:
+            {パス: parse_air の結果}
+        """
+        paths = list(dict.fromkeys(paths))
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        max_workers = min(max_workers, len(paths))
+        
+        if max_workers > 1:
+            try:
+                with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                    chunksize = max(1, len(paths) // (max_workers * 4))
+                    return dict(zip(paths, executor.map(AIRParser.parse_air, paths, chunksize=chunksize)))
+            except (OSError, RuntimeError) as e:
+                # BrokenProcessPool も RuntimeError の派生
+                logging.warning(f"AIR parallel parsing unavailable, parsing sequentially: {e}")
+        
+        return {path: AIRParser.parse_air(path) for path in paths}
+    
+    @staticmethod
+    def _parse(path: str, as_dict: bool) -> Dict[int, Any]:
+        """
+        AIRファイルを解析する共通処理（ディスクキャッシュ対応）
+        
+        Args:
+            path: AIRファイルパス
+            as_dict: True の場合は {番号: [フレーム辞書]}、False の場合は {番号: AIRAnimation} を返す
+        """
+        cache_path = _air_cache_path(path, as_dict)
+        if cache_path is not None:
+            cached = _load_air_cache(cache_path)
+            if cached is not None:
+                return cached
+        
+        animations, complete = AIRParser._parse_file(path, as_dict)
+        if cache_path is not None and complete:
+            _store_air_cache(cache_path, animations)
+        return animations
+    
+    @staticmethod
+    def _parse_file(path: str, as_dict: bool) -> tuple:
+        """
+        AIRファイルを解析
+        
+        Returns:
+            (解析結果, 最後まで解析できたかどうか)
+        """
+        animations: Dict[int, Any] = {}
         current_animation: Optional[AIRAnimation] = None
+        current_frames: Optional[list] = None
         current_clsn1_default = []
         current_clsn2_default = []
         current_clsn1_default_count = 0
@@ -110,329 +467,333 @@ class AIRParser:
         frame_clsn1 = None
         frame_clsn2 = None
         
+        # Defaultリストはフレーム間で共有し、フレームが参照した後に変更する時だけ複製する
+        clsn1_default_shared = False
+        clsn2_default_shared = False
+        
+        # 当たり判定なしの LoopStart マーカー（初回使用時に生成）
+        loop_marker = None
+        
         if not os.path.isfile(path):
             logging.warning(f"AIR file not found: {path}")
-            return animations
+            return animations, False
+        
+        # ループ内で使うメソッドをローカルに束縛
+        begin_match = _RE_BEGIN.match
+        split_commas = _RE_SPLIT.split
+        coord_row_match = _RE_COORD_ROW.fullmatch
         
         try:
-            with open(path, 'r', encoding='utf-8-sig', errors='ignore') as f:
-                for line_no, raw_line in enumerate(f, 1):
-                    line = raw_line.strip()
-                    if not line or line.startswith(';'):
-                        continue
-                    
-                    # Begin Action の検出
-                    m = re.match(r'^\[?\s*begin\s+action\s+(-?\d+)\s*\]?$', line, re.I)
+            # ファイル全体を一度に読み込み、行分割はまとめて行う
+            with open(path, 'rb') as f:
+                text = f.read().decode('utf-8-sig', errors='ignore')
+            for line_no, raw_line in enumerate(text.splitlines(), 1):
+                line = raw_line.strip()
+                if not line or line.startswith(';'):
+                    continue
+                
+                # 行の種類は先頭文字と部分文字列で先に絞り込み、必要な正規表現だけを実行する
+                line_lower = line.lower()
+                first = line_lower[0]
+                
+                # Begin Action の検出（'[' または 'b' で始まる行のみ）
+                if first == '[' or first == 'b':
+                    m = begin_match(line)
                     if m:
                         anim_no = int(m.group(1))
-                        current_animation = AIRAnimation(anim_no)
-                        animations[anim_no] = current_animation
+                        if as_dict:
+                            current_frames = []
+                            animations[anim_no] = current_frames
+                        else:
+                            current_animation = AIRAnimation(anim_no)
+                            animations[anim_no] = current_animation
+                            current_frames = current_animation.frames
+                        # フレーム追加は最も頻繁な操作なので、追加先のメソッドを束縛しておく
+                        append_frame = current_frames.append
                         
                         # 新しいアニメーション開始時にリセット
                         current_clsn1_default = []
                         current_clsn2_default = []
+                        clsn1_default_shared = False
+                        clsn2_default_shared = False
                         frame_clsn1 = None
                         frame_clsn2 = None
                         continue
+                
+                if current_frames is None:
+                    continue
+                
+                # 当たり判定情報の処理
+                # CLSNキーワードの行、またはCLSN宣言の後に座標待ちの状態で
+                # 行が数値のみ（4つの座標値）の場合
+                if 'clsn' in line_lower:
+                    clsn_kind = 'clsn'
+                elif (current_clsn1_default_count > 0 or current_clsn2_default_count > 0 or
+                      frame_clsn1 is not None or frame_clsn2 is not None):
+                    clsn_kind = 'coords' if coord_row_match(line) else None
+                else:
+                    clsn_kind = None
+                
+                if clsn_kind is not None:
+                    # フレームが参照中のDefaultリストは、変更される可能性がある時だけ複製する
+                    is_default_decl = 'default' in line_lower
+                    if clsn1_default_shared and (is_default_decl or
+                                                 len(current_clsn1_default) < current_clsn1_default_count):
+                        current_clsn1_default = current_clsn1_default.copy()
+                        clsn1_default_shared = False
+                    if clsn2_default_shared and (is_default_decl or
+                                                 len(current_clsn2_default) < current_clsn2_default_count):
+                        current_clsn2_default = current_clsn2_default.copy()
+                        clsn2_default_shared = False
+                    try:
+                        current_clsn1_default_count, current_clsn2_default_count, frame_clsn1, frame_clsn2 = \
+                            AIRParser._parse_clsn_line(
+                                line, current_frames, current_clsn1_default, current_clsn2_default,
+                                current_clsn1_default_count, current_clsn2_default_count,
+                                frame_clsn1, frame_clsn2, line_lower
+                            )
+                    except Exception as e:
+                        logging.warning(f"Error parsing {clsn_kind} line {line_no}: {e}")
+                    continue
+                
+                # LoopStart の検出
+                if first == 'l' and line_lower in ('loopstart', 'loop start'):
+                    final_clsn1 = frame_clsn1 if frame_clsn1 is not None else current_clsn1_default
+                    final_clsn2 = frame_clsn2 if frame_clsn2 is not None else current_clsn2_default
                     
-                    if current_animation is None:
-                        continue
-                    
-                    # 当たり判定情報の処理
-                    # CLSNキーワードの場合は直接処理
-                    if 'clsn' in line.lower():
-                        try:
-                            current_clsn1_default_count, current_clsn2_default_count, frame_clsn1, frame_clsn2 = \
-                                AIRParser._parse_clsn_line(
-                                    line, current_animation.frames, current_clsn1_default, current_clsn2_default,
-                                    current_clsn1_default_count, current_clsn2_default_count,
-                                    frame_clsn1, frame_clsn2
-                                )
-                            continue
-                        except Exception as e:
-                            logging.warning(f"Error parsing clsn line {line_no}: {e}")
-                            continue
-                    
-                    # 座標データの可能性がある行の処理
-                    # - CLSN宣言の後に座標待ちの状態
-                    # - 行が数値のみ（4つの座標値）または Clsn1[n] = / Clsn2[n] = 形式
-                    coords = re.findall(r'-?\d+', line)
-                    parts = [p.strip() for p in line.split(',')]
-                    
-                    # Clsn1[n] = または Clsn2[n] = 形式かどうか
-                    is_clsn_format = bool(re.search(r'clsn[12]\[\d+\]\s*=', line.lower()))
-                    
-                    # 座標データかどうかの判定：
-                    # 1. 4つの数値がある
-                    # 2. CLSN待ちの状態である、またはClsn形式
-                    # 3. パラメータが4つまでかつすべて数値、またはClsn形式
-                    is_coords = (len(coords) >= 4 and 
-                                (is_clsn_format or 
-                                 (len(parts) <= 4 and 
-                                  all(p.strip().lstrip('-').isdigit() or p.strip() == '' for p in parts) and
-                                  (current_clsn1_default_count > 0 or current_clsn2_default_count > 0 or 
-                                   frame_clsn1 is not None or frame_clsn2 is not None))))
-                    
-                    if is_coords:
-                        try:
-                            current_clsn1_default_count, current_clsn2_default_count, frame_clsn1, frame_clsn2 = \
-                                AIRParser._parse_clsn_line(
-                                    line, current_animation.frames, current_clsn1_default, current_clsn2_default,
-                                    current_clsn1_default_count, current_clsn2_default_count,
-                                    frame_clsn1, frame_clsn2
-                                )
-                            continue
-                        except Exception as e:
-                            logging.warning(f"Error parsing coords line {line_no}: {e}")
-                            continue
-                    
-                    # LoopStart の検出
-                    if line.lower().strip() in ('loopstart', 'loop start'):
-                        final_clsn1 = frame_clsn1 if frame_clsn1 is not None else current_clsn1_default
-                        final_clsn2 = frame_clsn2 if frame_clsn2 is not None else current_clsn2_default
-                        
-                        loop_frame = AIRFrame(-1, -1, 0, 0, 1, 0,
-                                            clsn1=final_clsn1.copy(),
-                                            clsn2=final_clsn2.copy(),
-                                            loopstart=True)
-                        current_animation.add_frame(loop_frame)
-                        
-                        frame_clsn1 = None
-                        frame_clsn2 = None
-                        continue
+                    if current_animation is not None:
+                        current_animation.loop_start_index = len(current_frames)
+                    if not final_clsn1 and not final_clsn2:
+                        # 当たり判定を持たない LoopStart はファイル内で1つのマーカーを共有する
+                        if loop_marker is None:
+                            loop_marker = _make_frame_record(
+                                as_dict, -1, -1, 0, 0, 1, 0, False, False, 'normal', 1.0,
+                                [], [], True)
+                        append_frame(loop_marker)
+                    else:
+                        if frame_clsn1 is None:
+                            clsn1_default_shared = True
+                        if frame_clsn2 is None:
+                            clsn2_default_shared = True
+                        append_frame(_make_frame_record(
+                            as_dict, -1, -1, 0, 0, 1, 0, False, False, 'normal', 1.0,
+                            final_clsn1, final_clsn2, True))
                     
-                    # フレームデータの解析
-                    parts = [p.strip() for p in line.split(',')]
-                    if len(parts) < 3:
-                        continue
+                    frame_clsn1 = None
+                    frame_clsn2 = None
+                    continue
+                
+                # フレームデータの解析
+                parts = split_commas(line)
+                n_parts = len(parts)
+                if n_parts < 3:
+                    continue
+                
+                # 例外処理は数値変換だけに限定し、フレーム生成は通常の処理として行う
+                # （n_parts >= 3 を確認済みなので parts[0]〜parts[2] は必ず存在する）
+                try:
+                    group = int(parts[0])
+                    image = int(parts[1])
+                    x = int(parts[2]) if parts[2] else 0
+                    y = int(parts[3]) if n_parts > 3 and parts[3] else 0
+                    duration = int(parts[4]) if n_parts > 4 and parts[4] else 1
+                except ValueError as e:
+                    logging.warning(f"Error parsing frame data line {line_no}: {e}")
+                    continue
+                flip_raw = parts[5] if n_parts > 5 else ''
+                
+                # 反転・合成パラメータの解析（トークンごとの結果を再利用）
+                flip_params = _FLIP_TABLE.get(flip_raw)
+                if flip_params is None:
+                    flip_params = _parse_flip(flip_raw)
+                    if len(_FLIP_TABLE) < _FLIP_TABLE_MAX:
+                        _FLIP_TABLE[flip_raw] = flip_params
+                flip_h, flip_v, blend_mode, alpha_value, flip_legacy = flip_params
+                
+                # フレームオブジェクト作成
+                # Clsn1/Clsn2の優先順位：個別指定があればそれを、なければDefault
+                # 個別指定のリストはそのまま渡し、Defaultは共有参照とする
+                if frame_clsn1 is not None:
+                    final_clsn1 = frame_clsn1
+                else:
+                    final_clsn1 = current_clsn1_default
+                    clsn1_default_shared = True
+                if frame_clsn2 is not None:
+                    final_clsn2 = frame_clsn2
+                else:
+                    final_clsn2 = current_clsn2_default
+                    clsn2_default_shared = True
+                
+                append_frame(_make_frame_record(
+                    as_dict, group, image, x, y, duration, flip_legacy,
+                    flip_h, flip_v, blend_mode, alpha_value,
+                    final_clsn1, final_clsn2))
+                
+                # 個別指定は1フレームのみ有効なのでクリア
+                frame_clsn1 = None
+                frame_clsn2 = None
                     
-                    try:
-                        group = int(parts[0])
-                        image = int(parts[1])
-                        x = int(parts[2]) if len(parts) > 2 and parts[2] else 0
-                        y = int(parts[3]) if len(parts) > 3 and parts[3] else 0
-                        duration = int(parts[4]) if len(parts) > 4 and parts[4] else 1
-                        flip_raw = parts[5] if len(parts) > 5 else ''
-                        
-                        # 反転・合成パラメータの解析
-                        flip_h = False
-                        flip_v = False
-                        blend_mode = 'normal'
-                        alpha_value = 1.0
-                        
-                        if flip_raw:
-                            flip_upper = flip_raw.upper().strip()
-                            # 反転処理
-                            if 'H' in flip_upper:
-                                flip_h = True
-                            if 'V' in flip_upper:
-                                flip_v = True
-                            
-                            # 合成処理
-                            if 'A1' in flip_upper:
-                                blend_mode = 'add'
-                                alpha_value = 0.5
-                            elif 'A' in flip_upper:
-                                blend_mode = 'add'
-                                alpha_value = 1.0
-                            elif 'S' in flip_upper:
-                                blend_mode = 'subtract'
-                        
-                        # 従来のflip値も保持
-                        flip_legacy = 0
-                        if flip_h and flip_v:
-                            flip_legacy = 3
-                        elif flip_h:
-                            flip_legacy = 1
-                        elif flip_v:
-                            flip_legacy = 2
-                        
-                        # フレームオブジェクト作成
-                        # Clsn1/Clsn2の優先順位：個別指定があればそれを、なければDefault
-                        if frame_clsn1 is not None:
-                            final_clsn1 = frame_clsn1
-                        else:
-                            final_clsn1 = current_clsn1_default
-                        if frame_clsn2 is not None:
-                            final_clsn2 = frame_clsn2
-                        else:
-                            final_clsn2 = current_clsn2_default
-
-                        frame = AIRFrame(group, image, x, y, duration, flip_legacy,
-                                       flip_h=flip_h, flip_v=flip_v,
-                                       blend_mode=blend_mode, alpha_value=alpha_value,
-                                       clsn1=final_clsn1.copy(),
-                                       clsn2=final_clsn2.copy())
-
-                        current_animation.add_frame(frame)
-
-                        # 個別指定は1フレームのみ有効なのでクリア
-                        frame_clsn1 = None
-                        frame_clsn2 = None
-                        
-                    except (ValueError, IndexError) as e:
-                        logging.warning(f"Error parsing frame data line {line_no}: {e}")
-                        continue
-                        
         except Exception as e:
             logging.error(f"Error parsing AIR file {path}: {e}")
+            return animations, False
         
-        return animations
+        return animations, True
     
     @staticmethod
     def _parse_clsn_line(line: str, current_frames: List[AIRFrame],
-                        current_clsn1_default: List[Dict], 
-                        current_clsn2_default: List[Dict],
+                        current_clsn1_default: List[ClsnRect],
+                        current_clsn2_default: List[ClsnRect],
                         current_clsn1_default_count: int,
                         current_clsn2_default_count: int,
                         frame_clsn1: Optional[List],
-                        frame_clsn2: Optional[List]) -> tuple:
-        """当たり判定行を解析"""
+                        frame_clsn2: Optional[List],
+                        line_lower: Optional[str] = None) -> tuple:
+        """
+        当たり判定行を解析
+        
+        line_lower には呼び出し側で小文字化済みの行を渡せる（省略時はここで生成）
+        """
         
-        line_lower = line.lower().strip()
+        # デバッグ出力が無効な時はメッセージの文字列化を行わない
+        debug = logging.root.isEnabledFor(logging.DEBUG)
         line_orig = line.strip()
+        if line_lower is None:
+            line_lower = line_orig.lower()
+        
+        # 座標データの処理（様々な形式に対応）
+        # 当たり判定行の大半は座標行なので、宣言行の判定より先に処理する
+        if not line_lower.startswith(('clsn1', 'clsn2')):
+            # Clsn形式の判定（Clsn1[n] = x1,y1, x2, y2 または単純な x1, y1, x2, y2）
+            is_clsn_format = 'clsn' in line_lower and _has_clsn_index(line_lower)
+            
+            if is_clsn_format:
+                # Clsn1[n] = または Clsn2[n] = 形式の場合、= 以降の座標データを抽出
+                eq_pos = line_orig.find('=')
+                coord_part = line_orig[eq_pos + 1:] if eq_pos > 0 else ''
+            else:
+                # 通常の座標データ形式
+                coord_part = line_orig
+            
+            try:
+                clsn_data = _parse_quad(coord_part)
+                if clsn_data is not None:
+                    # Clsn1[n] = またはClsn2[n] = 形式の場合、どちらに追加するか判定
+                    if is_clsn_format:
+                        if 'clsn2' in line_lower:
+                            if frame_clsn2 is not None:
+                                frame_clsn2.append(clsn_data)
+                                if debug:
+                                    logging.debug("Clsn2座標追加（個別）: %s", clsn_data)
+                            elif current_clsn2_default_count > 0 and len(current_clsn2_default) < current_clsn2_default_count:
+                                current_clsn2_default.append(clsn_data)
+                                if debug:
+                                    logging.debug("Clsn2Default座標追加: %s", clsn_data)
+                        elif 'clsn1' in line_lower:
+                            if frame_clsn1 is not None:
+                                frame_clsn1.append(clsn_data)
+                                if debug:
+                                    logging.debug("Clsn1座標追加（個別）: %s", clsn_data)
+                            elif current_clsn1_default_count > 0 and len(current_clsn1_default) < current_clsn1_default_count:
+                                current_clsn1_default.append(clsn_data)
+                                if debug:
+                                    logging.debug("Clsn1Default座標追加: %s", clsn_data)
+                    else:
+                        # 通常の座標データ形式の場合（優先順位順）
+                        if frame_clsn2 is not None:
+                            frame_clsn2.append(clsn_data)
+                            if debug:
+                                logging.debug("Clsn2座標追加: %s", clsn_data)
+                        elif frame_clsn1 is not None:
+                            frame_clsn1.append(clsn_data)
+                            if debug:
+                                logging.debug("Clsn1座標追加: %s", clsn_data)
+                        elif current_clsn2_default_count > 0 and len(current_clsn2_default) < current_clsn2_default_count:
+                            current_clsn2_default.append(clsn_data)
+                            if debug:
+                                logging.debug("Clsn2Default座標追加: %s", clsn_data)
+                        elif current_clsn1_default_count > 0 and len(current_clsn1_default) < current_clsn1_default_count:
+                            current_clsn1_default.append(clsn_data)
+                            if debug:
+                                logging.debug("Clsn1Default座標追加: %s", clsn_data)
+                        
+            except (ValueError, IndexError) as e:
+                logging.warning(f"座標データ解析エラー: {e}")
         
         # Clsn1Defaultの処理
-        if line_lower.startswith('clsn1default'):
-            match = re.search(r'clsn1default\s*:\s*(\d+)', line_lower)
+        elif line_lower.startswith('clsn1default'):
+            match = _RE_CLSN1_DEF.search(line_lower)
             if match:
                 count = int(match.group(1))
                 current_clsn1_default_count = count
                 current_clsn1_default.clear()
-                logging.debug(f"Clsn1Default: {count}個")
+                if debug:
+                    logging.debug("Clsn1Default: %s個", count)
         
         # Clsn2Defaultの処理
         elif line_lower.startswith('clsn2default'):
-            match = re.search(r'clsn2default\s*:\s*(\d+)', line_lower)
+            match = _RE_CLSN2_DEF.search(line_lower)
             if match:
                 count = int(match.group(1))
                 current_clsn2_default_count = count
                 current_clsn2_default.clear()
-                logging.debug(f"Clsn2Default: {count}個")
+                if debug:
+                    logging.debug("Clsn2Default: %s個", count)
         
         # Clsn1の処理
         elif line_lower.startswith('clsn1'):
             if 'default' not in line_lower:
-                match = re.search(r'clsn1\s*:\s*(\d+)', line_lower)
+                match = _RE_CLSN1.search(line_lower)
                 if match:
                     count = int(match.group(1))
                     if frame_clsn1 is None:
                         frame_clsn1 = []
-                    logging.debug(f"Clsn1: {count}個")
+                    if debug:
+                        logging.debug("Clsn1: %s個", count)
                 else:
                     # Clsn1[n] = 形式の座標データの場合
                     eq_pos = line_orig.find('=')
                     if eq_pos > 0:
-                        coord_part = line_orig[eq_pos + 1:].strip()
-                        coords = re.findall(r'-?\d+', coord_part)
-                        if len(coords) >= 4:
-                            try:
-                                clsn_data = {
-                                    'x1': int(coords[0]),
-                                    'y1': int(coords[1]),
-                                    'x2': int(coords[2]),
-                                    'y2': int(coords[3])
-                                }
+                        try:
+                            clsn_data = _parse_quad(line_orig[eq_pos + 1:])
+                            if clsn_data is not None:
                                 if frame_clsn1 is not None:
                                     frame_clsn1.append(clsn_data)
-                                    logging.debug(f"Clsn1座標追加（個別）: {clsn_data}")
+                                    if debug:
+                                        logging.debug("Clsn1座標追加（個別）: %s", clsn_data)
                                 elif current_clsn1_default_count > 0 and len(current_clsn1_default) < current_clsn1_default_count:
                                     current_clsn1_default.append(clsn_data)
-                                    logging.debug(f"Clsn1Default座標追加: {clsn_data}")
-                            except (ValueError, IndexError) as e:
-                                logging.warning(f"Clsn1座標データ解析エラー: {e}")
+                                    if debug:
+                                        logging.debug("Clsn1Default座標追加: %s", clsn_data)
+                        except (ValueError, IndexError) as e:
+                            logging.warning(f"Clsn1座標データ解析エラー: {e}")
         
         # Clsn2の処理
         elif line_lower.startswith('clsn2'):
             if 'default' not in line_lower:
-                match = re.search(r'clsn2\s*:\s*(\d+)', line_lower)
+                match = _RE_CLSN2.search(line_lower)
                 if match:
                     count = int(match.group(1))
                     if frame_clsn2 is None:
                         frame_clsn2 = []
-                    logging.debug(f"Clsn2: {count}個")
+                    if debug:
+                        logging.debug("Clsn2: %s個", count)
                 else:
                     # Clsn2[n] = 形式の座標データの場合
                     eq_pos = line_orig.find('=')
                     if eq_pos > 0:
-                        coord_part = line_orig[eq_pos + 1:].strip()
-                        coords = re.findall(r'-?\d+', coord_part)
-                        if len(coords) >= 4:
-                            try:
-                                clsn_data = {
-                                    'x1': int(coords[0]),
-                                    'y1': int(coords[1]),
-                                    'x2': int(coords[2]),
-                                    'y2': int(coords[3])
-                                }
+                        try:
+                            clsn_data = _parse_quad(line_orig[eq_pos + 1:])
+                            if clsn_data is not None:
                                 if frame_clsn2 is not None:
                                     frame_clsn2.append(clsn_data)
-                                    logging.debug(f"Clsn2座標追加（個別）: {clsn_data}")
+                                    if debug:
+                                        logging.debug("Clsn2座標追加（個別）: %s", clsn_data)
                                 elif current_clsn2_default_count > 0 and len(current_clsn2_default) < current_clsn2_default_count:
                                     current_clsn2_default.append(clsn_data)
-                                    logging.debug(f"Clsn2Default座標追加: {clsn_data}")
-                            except (ValueError, IndexError) as e:
-                                logging.warning(f"Clsn2座標データ解析エラー: {e}")
-        
-        # 座標データの処理（様々な形式に対応）
-        else:
-            # Clsn形式の判定（Clsn1[n] = x1,y1, x2, y2 または単純な x1, y1, x2, y2）
-            is_clsn_format = bool(re.search(r'clsn[12]\[\d+\]\s*=', line_lower))
-            
-            if is_clsn_format:
-                # Clsn1[n] = または Clsn2[n] = 形式の場合、= 以降の座標データを抽出
-                eq_pos = line_orig.find('=')
-                if eq_pos > 0:
-                    coord_part = line_orig[eq_pos + 1:].strip()
-                    coords = re.findall(r'-?\d+', coord_part)
-                else:
-                    coords = []
-            else:
-                # 通常の座標データ形式
-                coords = re.findall(r'-?\d+', line_orig)
-            
-            if len(coords) >= 4:
-                try:
-                    clsn_data = {
-                        'x1': int(coords[0]),
-                        'y1': int(coords[1]),
-                        'x2': int(coords[2]),
-                        'y2': int(coords[3])
-                    }
-                    
-                    # Clsn1[n] = またはClsn2[n] = 形式の場合、どちらに追加するか判定
-                    if is_clsn_format:
-                        if 'clsn2' in line_lower:
-                            if frame_clsn2 is not None:
-                                frame_clsn2.append(clsn_data)
-                                logging.debug(f"Clsn2座標追加（個別）: {clsn_data}")
-                            elif current_clsn2_default_count > 0 and len(current_clsn2_default) < current_clsn2_default_count:
-                                current_clsn2_default.append(clsn_data)
-                                logging.debug(f"Clsn2Default座標追加: {clsn_data}")
-                        elif 'clsn1' in line_lower:
-                            if frame_clsn1 is not None:
-                                frame_clsn1.append(clsn_data)
-                                logging.debug(f"Clsn1座標追加（個別）: {clsn_data}")
-                            elif current_clsn1_default_count > 0 and len(current_clsn1_default) < current_clsn1_default_count:
-                                current_clsn1_default.append(clsn_data)
-                                logging.debug(f"Clsn1Default座標追加: {clsn_data}")
-                    else:
-                        # 通常の座標データ形式の場合（優先順位順）
-                        if frame_clsn2 is not None:
-                            frame_clsn2.append(clsn_data)
-                            logging.debug(f"Clsn2座標追加: {clsn_data}")
-                        elif frame_clsn1 is not None:
-                            frame_clsn1.append(clsn_data)
-                            logging.debug(f"Clsn1座標追加: {clsn_data}")
-                        elif current_clsn2_default_count > 0 and len(current_clsn2_default) < current_clsn2_default_count:
-                            current_clsn2_default.append(clsn_data)
-                            logging.debug(f"Clsn2Default座標追加: {clsn_data}")
-                        elif current_clsn1_default_count > 0 and len(current_clsn1_default) < current_clsn1_default_count:
-                            current_clsn1_default.append(clsn_data)
-                            logging.debug(f"Clsn1Default座標追加: {clsn_data}")
-                        
-                except (ValueError, IndexError) as e:
-                    logging.warning(f"座標データ解析エラー: {e}")
+                                    if debug:
+                                        logging.debug("Clsn2Default座標追加: %s", clsn_data)
+                        except (ValueError, IndexError) as e:
+                            logging.warning(f"Clsn2座標データ解析エラー: {e}")
         
         return current_clsn1_default_count, current_clsn2_default_count, frame_clsn1, frame_clsn2
 
@@ -440,3 +801,8 @@ class AIRParser:
 def parse_air(path: str) -> Dict[int, List[Dict[str, int]]]:
     """AIRファイルを解析（互換性関数）"""
     return AIRParser.parse_air(path)
+
+
+def parse_air_batch(paths: List[str], max_workers: Optional[int] = None) -> Dict[str, Dict[int, List[Dict[str, Any]]]]:
+    """複数のAIRファイルをまとめて解析（互換性関数）"""
+    return AIRParser.parse_air_batch(paths, max_workers)
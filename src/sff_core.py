@@ -12,6 +12,8 @@ import os
 import io
 import struct
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Tuple, List, Optional
 
 try:
@@ -23,6 +25,7 @@ except Exception:
 try:
     from .sff_parser import (
         analyze_sff_v1,
+        map_sff_file,
         extract_sffv1,
         convert_pcx_to_image,
         extract_palette_from_pcx_data,
@@ -31,19 +34,73 @@ try:
 except Exception:
     from sff_parser import (
         analyze_sff_v1,
+        map_sff_file,
         extract_sffv1,
         convert_pcx_to_image,
         extract_palette_from_pcx_data,
         reverse_act_palette,
     )  # type: ignore
 
+import numpy as np
+import PIL
 from PIL import Image
 
+# Pillow-SIMD は "9.5.0.post1" のような .postN 付きのバージョンを名乗る。
+# P → RGBA 変換（convert("RGBA")）が高速化されるため、未使用時はログに残す
+PILLOW_SIMD = ".post" in getattr(PIL, "__version__", "")
+if not PILLOW_SIMD:
+    logging.debug(f"Pillow-SIMD not detected (Pillow {getattr(PIL, '__version__', '?')}); "
+                  "convert('RGBA') uses the scalar code path")
+
 
 # ------------------------------
 # Sprite object (互換インターフェース)
 # ------------------------------
+# 別パレット指定で再合成した RGBA 画像のキャッシュ（キー: (id(スプライト), id(パレット))）
+# パレット切り替えを繰り返しても同じ組み合わせは再合成しない
+_sprite_rgba_cache = {}
+_sprite_rgba_cache_max_size = 64
+_sprite_rgba_cache_lock = threading.Lock()
+
+
+# パレット毎の RGBA ルックアップテーブルのキャッシュ（キー: id(パレット)）
+# 同じパレットを共有するスプライト間で LUT を作り直さない
+_rgba_lut_cache = {}
+_rgba_lut_cache_max_size = 64
+_rgba_lut_cache_lock = threading.Lock()
+
+
+def _rgba_lut(pal) -> np.ndarray:
+    """768 bytes(RGB) のパレットから (256, 4) の RGBA ルックアップテーブルを作る（アルファは 255）"""
+    # 不変な bytes のみキャッシュする（list / bytearray は呼び出し側で書き換えられうる）
+    cacheable = isinstance(pal, bytes)
+    if cacheable:
+        entry = _rgba_lut_cache.get(id(pal))
+        if entry is not None and entry[0] is pal:
+            return entry[1]
+
+    lut = np.empty((256, 4), dtype=np.uint8)
+    if isinstance(pal, (bytes, bytearray, memoryview)):
+        rgb = np.frombuffer(pal, dtype=np.uint8, count=768)
+    else:
+        rgb = np.asarray(pal[:768], dtype=np.uint8)
+    lut[:, :3] = rgb.reshape(256, 3)
+    lut[:, 3] = 255
+
+    if cacheable:
+        lut.flags.writeable = False
+        with _rgba_lut_cache_lock:
+            if len(_rgba_lut_cache) >= _rgba_lut_cache_max_size:
+                del _rgba_lut_cache[next(iter(_rgba_lut_cache))]
+            # パレット自体も保持してidの再利用による誤ヒットを防ぐ
+            _rgba_lut_cache[id(pal)] = (pal, lut)
+    return lut
+
+
 class SFFSprite:
+    # スプライト数が多いファイルでインスタンス毎の __dict__ を持たない
+    __slots__ = ("group", "image", "x", "y", "_pil", "_raw_indexed", "_palette", "width", "height")
+
     def __init__(
         self,
         group: int,
@@ -75,13 +132,32 @@ class SFFSprite:
             return self._pil
 
         # インデックス + パレットから再構成（v2のindexed保持などのため）
+        # 自前のパレットで合成した結果はスプライトに、別パレットでの結果は LRU にキャッシュする
         if self._raw_indexed is not None and (palette_data or self._palette):
             pal = palette_data or self._palette
             if pal and len(pal) >= 768 and self.width and self.height:
-                img = Image.frombytes("P", (self.width, self.height), self._raw_indexed)
-                img.putpalette(list(pal[:768]))
-                self._pil = img.convert("RGBA")
-                return self._pil
+                own = pal is self._palette
+                cache_key = (id(self), id(pal))
+                if not own:
+                    with _sprite_rgba_cache_lock:
+                        entry = _sprite_rgba_cache.pop(cache_key, None)
+                        # スプライト・パレット自体も保持してidの再利用による誤ヒットを防ぐ
+                        if entry is not None and entry[0] is self and entry[1] is pal:
+                            _sprite_rgba_cache[cache_key] = entry
+                            return entry[2]
+
+                # P 画像 + putpalette + convert を経由せず、LUT の1回の gather で RGBA にする
+                indices = np.frombuffer(self._raw_indexed, dtype=np.uint8, count=self.width * self.height)
+                rgba = _rgba_lut(pal)[indices]
+                img = Image.frombuffer("RGBA", (self.width, self.height), rgba, "raw", "RGBA", 0, 1)
+                if own:
+                    self._pil = img
+                else:
+                    with _sprite_rgba_cache_lock:
+                        if len(_sprite_rgba_cache) >= _sprite_rgba_cache_max_size:
+                            del _sprite_rgba_cache[next(iter(_sprite_rgba_cache))]
+                        _sprite_rgba_cache[cache_key] = (self, pal, img)
+                return img
 
         return None
 
@@ -114,54 +190,56 @@ def _is_sff_v1(header: bytes) -> bool:
 # ------------------------------
 # v1 読み込み（旧ロジックをそのまま活用）
 # ------------------------------
-def _load_sff_v1(path: str) -> Tuple[Dict[Tuple[int, int], SFFSprite], List[bytes]]:
+def _load_sff_v1(path: str, buf=None) -> Tuple[Dict[Tuple[int, int], SFFSprite], List[bytes]]:
     """
     sff_parser.py の analyze_sff_v1 / extract_sffv1 を使って
     旧挙動（正しくパレットを適用）で復元する。
+    buf にファイル全体（mmap / bytes）を渡すとファイルを開き直さない。
     """
     sprites: Dict[Tuple[int, int], SFFSprite] = {}
     palettes: List[bytes] = []
 
-    if not os.path.isfile(path):
-        return sprites, palettes
-
-    # 一時 JSON（解析結果）をメモリに持ちたいので BytesIO を使う実装に変更
-    # ただし sff_parser.analyze_sff_v1 はファイル出力を前提なので小さなテンポラリを使う
-    import tempfile, json
-    with open(path, "rb") as f:
-        # 解析結果を temp json へ
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".json") as tmp:
-            analysis_json = tmp.name
-        try:
-            analyze_sff_v1(f, analysis_json)
-        except Exception as e:
-            logging.error(f"SFFv1 analyze error: {e}")
-            os.unlink(analysis_json)
+    if buf is None:
+        if not os.path.isfile(path):
             return sprites, palettes
+        # ファイルは mmap して解析・抽出の両方で共有する（seek/read の往復を省く）
+        with open(path, "rb") as f:
+            mm = map_sff_file(f)
+            try:
+                return _load_sff_v1(path, mm if mm is not None else f.read())
+            finally:
+                if mm is not None:
+                    mm.close()
+
+    # 解析結果はリストのまま受け渡す（一時 JSON は使わない）
+    try:
+        analysis_results = analyze_sff_v1(buf)
+    except Exception as e:
+        logging.error(f"SFFv1 analyze error: {e}")
+        return sprites, palettes
 
     # 画像群を復元
     image_objects: List[Image.Image] = []
     image_info_list: List[dict] = []
     try:
-        with open(path, "rb") as f2:
-            # extract_sffv1 は palettes を引数で受け取り、(9000,0) 等から共有パレットを構築する
-            extract_sffv1(
-                f2,                 # バイナリストリーム
-                analysis_json,      # 上で作成した解析JSON
-                image_objects,      # 出力: PIL画像（Pモード or 既にパレット適用済）
-                image_info_list,    # 出力: 画像メタ
-                act_palette=None,   # ACTは外部から与えられない想定
-                palette_list=palettes
-            )
+        # extract_sffv1 は palettes を引数で受け取り、(9000,0) 等から共有パレットを構築する
+        extract_sffv1(
+            buf,                # ファイル全体（mmap / bytes）
+            analysis_results,   # 上で作成した解析結果
+            image_objects,      # 出力: PIL画像（Pモード or 既にパレット適用済）
+            image_info_list,    # 出力: 画像メタ
+            act_palette=None,   # ACTは外部から与えられない想定
+            palette_list=palettes
+        )
     except Exception as e:
         logging.error(f"SFFv1 extract error: {e}")
-    finally:
-        try:
-            os.unlink(analysis_json)
-        except Exception:
-            pass
 
     # マッピング作成
+    # P 画像はインデックス + パレットのまま保持し、RGBA 化は get_pil_image まで遅延する。
+    # リンクで共有された画像はバイト列・パレットを1回だけ取り出す
+    indexed_by_image = {}
+    # 内容の同じパレットは1つの bytes を共有する（LUT キャッシュが共通パレットで効くように）
+    palette_pool = {}
     for pil_img, info in zip(image_objects, image_info_list):
         try:
             group = int(info.get("group_no", 0))
@@ -174,6 +252,19 @@ def _load_sff_v1(path: str) -> Tuple[Dict[Tuple[int, int], SFFSprite], List[byte
             ax = info.get("axisx", 0)
             ay = info.get("axisy", 0)
 
+        indexed = indexed_by_image.get(id(pil_img))
+        if indexed is None and pil_img.mode == "P":
+            pal = pil_img.getpalette()
+            if pal and len(pal) >= 768:
+                pal = bytes(pal[:768])
+                pal = palette_pool.setdefault(pal, pal)
+                indexed = indexed_by_image[id(pil_img)] = (pil_img.tobytes(), pal)
+        if indexed is not None:
+            sp = SFFSprite(group, image_no, ax, ay, raw_indexed=indexed[0], palette=indexed[1],
+                           width=pil_img.width, height=pil_img.height)
+            sprites[(group, image_no)] = sp
+            continue
+
         # 可能なら RGBA 化（Viewerでの合成を安定させる）
         try:
             pil_rgba = pil_img.convert("RGBA") if pil_img.mode != "RGBA" else pil_img
@@ -190,51 +281,78 @@ def _load_sff_v1(path: str) -> Tuple[Dict[Tuple[int, int], SFFSprite], List[byte
 # ------------------------------
 # v2 読み込み（sffv2_parser.SFF2 を使用）
 # ------------------------------
-def _load_sff_v2(path: str) -> Tuple[Dict[Tuple[int, int], SFFSprite], List[bytes]]:
+# v2 スプライトをデコードするスレッド数（1 で逐次処理）
+V2_DECODE_WORKERS = min(32, (os.cpu_count() or 1) * 2)
+
+# SFFv2 の PNG 系フォーマット（PNG8 / PNG24 / PNG32）
+_V2_PNG_FORMATS = (10, 11, 12)
+
+
+def _decode_v2_sprite(s2, g: int, n: int, rec: dict, palettes: List[bytes]) -> SFFSprite:
+    """SFF2 のスプライト1枚をデコードして SFFSprite にする"""
+    w = rec["width"]
+    h = rec["height"]
+    fmt = rec["fmt"]
+    off = rec["file_off"]
+    ln = rec["file_len"]
+    pal_index = rec["pal_index"]
+
+    blob = s2.data[off : off + ln]
+    decoded, mode = decode_sprite(fmt, blob, w, h)
+
+    # インデックスならパレットと組で保持し、RGBA化は get_pil_image まで遅延する
+    # （解析時に w*h*4 バイトの RGBA バッファを全スプライト分作らない）
+    if mode == "indexed":
+        pal = palettes[pal_index] if 0 <= pal_index < len(palettes) else None
+        if pal and len(decoded) == w * h:
+            return SFFSprite(g, n, 0, 0, raw_indexed=bytes(decoded), palette=pal, width=w, height=h)
+        # 失敗時は透明
+        img = Image.new("RGBA", (w, h), (0, 0, 0, 0))
+        return SFFSprite(g, n, 0, 0, pil_img=img, width=w, height=h)
+
+    # RGBA 直
+    img = Image.frombytes("RGBA", (w, h), bytes(decoded))
+    return SFFSprite(g, n, 0, 0, pil_img=img, width=w, height=h)
+
+
+def _load_sff_v2(path: str, buf=None) -> Tuple[Dict[Tuple[int, int], SFFSprite], List[bytes]]:
+    # buf にファイル全体（mmap / bytes）を渡すと SFF2 はファイルを読み直さない
     sprites: Dict[Tuple[int, int], SFFSprite] = {}
     palettes: List[bytes] = []
 
-    s2 = SFF2(os.path.abspath(path))
+    s2 = SFF2(os.path.abspath(path), data=buf)
 
     # パレットテーブル → 768bytes(RGB) に整形して格納
     for idx in range(len(s2.palettes)):
         pal_rgba = s2._get_palette(idx)  # (256,4) RGBA (sffv2_parser 側で整備)
-        # 768bytes(RGB) に落とす（アルファは無視）
-        rgb = bytearray()
-        for r, g, b, a in pal_rgba:
-            rgb += bytes((int(r), int(g), int(b)))
-        palettes.append(bytes(rgb))
-
-    # スプライトの復元
-    for (g, n), rec in s2.sprites.items():
-        w = rec["width"]
-        h = rec["height"]
-        fmt = rec["fmt"]
-        off = rec["file_off"]
-        ln = rec["file_len"]
-        pal_index = rec["pal_index"]
-
-        blob = s2.data[off : off + ln]
-        decoded, mode = decode_sprite(fmt, blob, w, h)
-
-        # インデックスならパレットを当ててRGBA化
-        if mode == "indexed":
-            pal = palettes[pal_index] if 0 <= pal_index < len(palettes) else None
-            if pal and len(decoded) == w * h:
-                img = Image.frombytes("P", (w, h), bytes(decoded))
-                img.putpalette(list(pal[:768]))
-                img = img.convert("RGBA")
-                sp = SFFSprite(g, n, 0, 0, pil_img=img, width=w, height=h)
-            else:
-                # 失敗時は透明
-                img = Image.new("RGBA", (w, h), (0, 0, 0, 0))
-                sp = SFFSprite(g, n, 0, 0, pil_img=img, width=w, height=h)
-        else:
-            # RGBA 直
-            img = Image.frombytes("RGBA", (w, h), bytes(decoded))
-            sp = SFFSprite(g, n, 0, 0, pil_img=img, width=w, height=h)
-
-        sprites[(g, n)] = sp
+        # 768bytes(RGB) に落とす（アルファは無視）。RGB 列を1回のコピーで取り出す
+        arr = np.asarray(pal_rgba, dtype=np.uint8)
+        if arr.ndim != 2 or arr.shape[1] < 3:
+            arr = arr.reshape(-1, 4)
+        palettes.append(arr[:256, :3].tobytes())
+
+    # スプライトの復元（Pillow / NumPy の C 処理は GIL を解放するためスレッドで並列化）
+    items = list(s2.sprites.items())
+
+    def decode_one(item):
+        (g, n), rec = item
+        return (g, n), _decode_v2_sprite(s2, g, n, rec, palettes)
+
+    workers = min(V2_DECODE_WORKERS, len(items))
+    if workers > 1:
+        # PNG（libpng は GIL を解放する）を先に投入し、Python 側の RLE/LZ5 デコードと重ねる。
+        # 結果は元のテーブル順で格納する
+        order = sorted(range(len(items)), key=lambda i: items[i][1]["fmt"] not in _V2_PNG_FORMATS)
+        results = [None] * len(items)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for i, result in zip(order, pool.map(lambda i: decode_one(items[i]), order)):
+                results[i] = result
+        for key, sp in results:
+            sprites[key] = sp
+    else:
+        for item in items:
+            key, sp = decode_one(item)
+            sprites[key] = sp
 
     return sprites, palettes
 
@@ -249,12 +367,87 @@ class SFFParser:
     def parse_sff(file_path: str) -> Tuple[Dict[Tuple[int, int], SFFSprite], List[bytes]]:
         return parse_sff(file_path)
 
+    @staticmethod
+    def prewarm(sprites, max_workers: Optional[int] = None) -> None:
+        return prewarm_sprites(sprites, max_workers)
+
+
+def prewarm_sprites(sprites, max_workers: Optional[int] = None) -> None:
+    """
+    インデックスのまま保持しているスプライトの RGBA 画像を事前にまとめて作成する。
+    sprites は parse_sff の sprites_dict、または SFFSprite の列。
+    LUT 展開（NumPy）は GIL を解放するためスレッドで並列化する。
+    """
+    if isinstance(sprites, dict):
+        sprites = sprites.values()
+    pending = [sp for sp in sprites if sp._pil is None and sp._raw_indexed is not None]
+    workers = min(max_workers or V2_DECODE_WORKERS, len(pending))
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(SFFSprite.get_pil_image, pending))
+    else:
+        for sp in pending:
+            sp.get_pil_image()
+
+
+# 解析済み SFF のキャッシュ（キー: (絶対パス, mtime_ns, サイズ)）
+_parse_sff_cache = {}
+_parse_sff_cache_max_size = 4
+_parse_sff_cache_lock = threading.Lock()
+
 
 def parse_sff(file_path: str) -> Tuple[Dict[Tuple[int, int], SFFSprite], List[bytes]]:
     """
     既存互換のトップレベル関数。
     SffCharaViewer / ステージプレビュー側はこれを呼ぶ前提。
+    同じファイル（パス・更新時刻・サイズが一致）の再読み込みはキャッシュから返す。
     """
+    try:
+        st = os.stat(file_path)
+    except OSError:
+        logging.error(f"SFF file not found: {file_path}")
+        return {}, []
+    cache_key = (os.path.abspath(file_path), st.st_mtime_ns, st.st_size)
+
+    with _parse_sff_cache_lock:
+        value = _parse_sff_cache.pop(cache_key, None)
+        if value is not None:
+            # LRU: アクセスしたアイテムを最後に移動
+            _parse_sff_cache[cache_key] = value
+            # 呼び出し側がコンテナを書き換えてもキャッシュが壊れないようにコピーを返す
+            return dict(value[0]), list(value[1])
+
+    sprites, palettes = _parse_sff_uncached(file_path)
+    if not sprites:
+        # 解析失敗（空）の結果はキャッシュしない
+        return sprites, palettes
+
+    with _parse_sff_cache_lock:
+        # 同じパスの古いエントリ（ファイル更新前）は破棄
+        for key in [k for k in _parse_sff_cache if k[0] == cache_key[0]]:
+            del _parse_sff_cache[key]
+        if len(_parse_sff_cache) >= _parse_sff_cache_max_size:
+            del _parse_sff_cache[next(iter(_parse_sff_cache))]
+        _parse_sff_cache[cache_key] = (sprites, palettes)
+    return dict(sprites), list(palettes)
+
+
+def clear_parse_sff_cache() -> None:
+    """parse_sff の解析結果キャッシュを破棄"""
+    with _parse_sff_cache_lock:
+        _parse_sff_cache.clear()
+
+
+def clear_sprite_rgba_cache() -> None:
+    """SFFSprite.get_pil_image のパレット別 RGBA キャッシュと LUT キャッシュを破棄"""
+    with _sprite_rgba_cache_lock:
+        _sprite_rgba_cache.clear()
+    with _rgba_lut_cache_lock:
+        _rgba_lut_cache.clear()
+
+
+def _parse_sff_uncached(file_path: str) -> Tuple[Dict[Tuple[int, int], SFFSprite], List[bytes]]:
+    """parse_sff の本体（キャッシュなし）"""
     sprites: Dict[Tuple[int, int], SFFSprite] = {}
     palettes: List[bytes] = []
 
@@ -263,27 +456,35 @@ def parse_sff(file_path: str) -> Tuple[Dict[Tuple[int, int], SFFSprite], List[by
         return sprites, palettes
 
     # 先頭で判別し、確実にフォールバック
+    # ファイルは1回だけ開いて mmap し、署名判定と各ローダーで同じバッファを共有する
     try:
-        with open(file_path, "rb") as f:
-            head = f.read(64)
+        f = open(file_path, "rb")
     except Exception as e:
         logging.error(f"Failed to read header: {e}")
         return sprites, palettes
 
-    try:
-        if _is_sff_v2(head):
-            try:
-                return _load_sff_v2(file_path)
-            except Exception as e:
-                logging.warning(f"SFFv2 parse failed, fallback to v1: {e}")
+    with f:
+        mm = map_sff_file(f)
+        try:
+            buf = mm if mm is not None else f.read()
+            head = buf[:64]
 
-        if _is_sff_v1(head):
-            return _load_sff_v1(file_path)
+            if _is_sff_v2(head):
+                try:
+                    return _load_sff_v2(file_path, buf)
+                except Exception as e:
+                    logging.warning(f"SFFv2 parse failed, fallback to v1: {e}")
 
-        # 不明でも v1 側に投げてみる（旧ファイル互換のため）
-        logging.warning("Unknown SFF signature, trying v1 parser as fallback.")
-        return _load_sff_v1(file_path)
+            if _is_sff_v1(head):
+                return _load_sff_v1(file_path, buf)
 
-    except Exception as e:
-        logging.error(f"SFF parse error: {e}")
-        return sprites, palettes
+            # 不明でも v1 側に投げてみる（旧ファイル互換のため）
+            logging.warning("Unknown SFF signature, trying v1 parser as fallback.")
+            return _load_sff_v1(file_path, buf)
+
+        except Exception as e:
+            logging.error(f"SFF parse error: {e}")
+            return sprites, palettes
+        finally:
+            if mm is not None:
+                mm.close()
@@ -1,93 +1,183 @@
 # -*- coding: utf-8 -*-
 import os
+import io
+import mmap
 import struct
 import json
+import hashlib
 import logging
 from PIL import Image
 from io import BytesIO
-import tempfile
+
+# SFFv1 メインヘッダー / サブヘッダー（各32バイト）
+# サブヘッダー: next_offset, size, ax, ay, group, image, link_index, pal の順
+_V1_HEADER = struct.Struct("<12s4B4I")
+_V1_SUBHEADER = struct.Struct("<2I2h4hB11s")
+
+# get_image が返す RGBA パレットのアルファ列（インデックス0のみ透明）
+_PALETTE_ALPHA = (0,) + (255,) * 255
+
+# PCX ヘッダー先頭の識別子（Manufacturer）
+_PCX_MAGIC = 0x0A
+# PCX ヘッダーの画像範囲 (xmin, ymin, xmax, ymax) と1ラインのバイト数
+_PCX_BBOX = struct.Struct("<4H")
+_PCX_STRIDE = struct.Struct("<H")
+# 線形グレースケールの RGB パレット（256色×3）。デフォルトパレットとして共有する
+_GRAY_PALETTE = bytes(v for v in range(256) for _ in range(3))
+
+def map_sff_file(f):
+    """ファイルオブジェクトを読み取り専用 mmap で開く（不可なら None）"""
+    try:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+        return None
 
 # =====================
 # SFFv1 解析処理
 # =====================
-def analyze_sff_v1(f, output_file):
-    f.seek(0)
-    header = struct.unpack("<12s4B4I", f.read(32))
-    subfile_offset = header[7]
-
-    results = []
-    while subfile_offset != 0:
-        f.seek(subfile_offset)
-        try:
+def analyze_sff_v1(f, output_file=None):
+    """
+    サブヘッダーを辿って画像情報の一覧を返す。
+    output_file を指定した場合は従来通り JSON にも書き出す。
+    """
+    # mmap 上で直接 unpack_from し、サブヘッダー毎の seek/read を省く
+    if isinstance(f, (mmap.mmap, bytes, bytearray)):
+        buf, mm = f, None
+    else:
+        mm = map_sff_file(f)
+        if mm is not None:
+            buf = mm
+        else:
+            f.seek(0)
+            buf = f.read()
+
+    try:
+        header = _V1_HEADER.unpack_from(buf, 0)
+        subfile_offset = header[7]
+
+        # サブヘッダーは可変長の PCX データと交互に並ぶため固定ストライドでは読めない。
+        # チェーンは辿りつつ、範囲チェックとメソッド参照をループ外に出す
+        results = []
+        append = results.append
+        unpack_sub = _V1_SUBHEADER.unpack_from
+        last_offset = len(buf) - _V1_SUBHEADER.size
+        while subfile_offset != 0 and subfile_offset <= last_offset:
             # SFF仕様に基づくサブヘッダー解析（32バイト）
-            # next_offset, size, ax, ay, group, image, link_index, pal の順
-            subheader = struct.unpack("<2I2h4hB11s", f.read(32))
-        except struct.error:
-            break
-
-        next_offset, size, ax, ay, group, image, link_index, pal = subheader[:8]
-        results.append({
-            "index": len(results),  # 連続するインデックス
-            "group_no": group,
-            "image_no": image,
-            "axisx": ax,
-            "axisy": ay,
-            "palette": pal,
-            "link_index": link_index,  # リンクindexを追加
-            "offset": subfile_offset,
-            "size": size,
-            "next_offset": next_offset
-        })
-
-        subfile_offset = next_offset
-
-    with open(output_file, "w", encoding="utf-8") as f_out:
-        json.dump(results, f_out, indent=2, ensure_ascii=False)
+            next_offset, size, ax, ay, group, image, link_index, pal, _, _ = unpack_sub(buf, subfile_offset)
+            append({
+                "index": len(results),  # 連続するインデックス
+                "group_no": group,
+                "image_no": image,
+                "axisx": ax,
+                "axisy": ay,
+                "palette": pal,
+                "link_index": link_index,  # リンクindexを追加
+                "offset": subfile_offset,
+                "size": size,
+                "next_offset": next_offset
+            })
+
+            subfile_offset = next_offset
+    finally:
+        if mm is not None:
+            mm.close()
+
+    if output_file:
+        with open(output_file, "w", encoding="utf-8") as f_out:
+            json.dump(results, f_out, indent=2, ensure_ascii=False)
+    return results
 
 # =====================
 # PCX → PIL画像
 # =====================
 def extract_pcx(bis, offset, size):
+    if isinstance(bis, (mmap.mmap, bytes, bytearray)):
+        return bis[offset:offset + size]
     bis.seek(offset)
     return bis.read(size)
 
+def _has_pcx_palette(data):
+    """PCX 末尾に 0x0C + 768バイトのパレットがあるか（コピーせずに判定）"""
+    return len(data) >= 769 and data[-769] == 0x0C
+
+def _pcx_palette_at(bis, offset, size):
+    """ファイル上の PCX（offset から size バイト）が末尾パレットを持つか。mmap なら1バイトだけ読む"""
+    if isinstance(bis, (mmap.mmap, bytes, bytearray)):
+        end = min(offset + size, len(bis))
+        return end - offset >= 769 and bis[end - 769] == 0x0C
+    return _has_pcx_palette(extract_pcx(bis, offset, size))
+
+def _pcx_palette_from(bis, offset, size):
+    """ファイル上の PCX の末尾パレットを取り出す（mmap なら768バイトだけコピー）"""
+    if isinstance(bis, (mmap.mmap, bytes, bytearray)):
+        end = min(offset + size, len(bis))
+        if end - offset >= 769 and bis[end - 769] == 0x0C:
+            return bytes(bis[end - 768:end])
+        return None
+    return extract_palette_from_pcx_data(extract_pcx(bis, offset, size))
+
 def extract_palette_from_pcx_data(data):
-    if len(data) >= 769 and data[-769] == 0x0C:
-        return list(data[-768:])
+    # 768要素の int リストではなく bytes のまま返す（putpalette もそのまま受け付ける）
+    if _has_pcx_palette(data):
+        return bytes(data[-768:])
     return None
 
 def reverse_act_palette(palette):
     """ACTパレットを反転させる関数（SFFv1専用）"""
     if len(palette) < 768:
         return palette
-    reversed_palette = []
-    for i in range(255, -1, -1):
-        idx = i * 3
-        if idx + 2 < len(palette):
-            # BGR → RGB変換を行う（SFFv1のACTパレット用）
-            b = palette[idx]
-            g = palette[idx + 1]
-            r = palette[idx + 2]
-            reversed_palette.extend([r, g, b])  # RGB順に並び替え
-        else:
-            reversed_palette.extend([0, 0, 0])
-    return reversed_palette
+    # 768要素を丸ごと逆順にすると、色順の反転と BGR → RGB 変換が同時に行える
+    # （SFFv1のACTパレット用）
+    return list(palette[767::-1])
 
 def normalize_sffv2_palette(palette):
     """SFFv2パレットを正規化する関数（順序反転なし、RGB順序維持）"""
     if len(palette) < 768:
         # 足りない部分を0で埋める
-        normalized = list(palette)
-        while len(normalized) < 768:
-            normalized.append(0)
-        return normalized
+        return list(palette) + [0] * (768 - len(palette))
     return list(palette[:768])  # 768バイト（256色×3）に制限
 
+def _decode_pcx_8bit(pcx_data):
+    """
+    8bit 単プレーンの PCX（MUGEN の通常形式）を Image.open を経由せずにデコードする。
+    ヘッダー判定・ストライド計算は Pillow の PCX プラグインと同じ規則に従い、
+    RLE 展開だけを Pillow の pcx デコーダーに任せる。対象外の形式なら None。
+    末尾パレットの無い（短い）PCX も Image.open に回さずここで展開する。
+    """
+    # ヘッダーはタプルに展開せず必要なバイトだけ直接参照し、PCX 以外は何も確保せずに弾く
+    if len(pcx_data) < 128 or pcx_data[0] != _PCX_MAGIC:
+        return None
+    if pcx_data[1] != 5 or pcx_data[3] != 8 or pcx_data[65] != 1:
+        return None
+    x0, y0, x1, y1 = _PCX_BBOX.unpack_from(pcx_data, 4)
+    width = x1 + 1 - x0
+    height = y1 + 1 - y0
+    if width <= 0 or height <= 0:
+        return None
+    stride = width
+    if _PCX_STRIDE.unpack_from(pcx_data, 66)[0] != stride:
+        stride += stride % 2
+
+    # 末尾パレットが線形グレースケールでなければ P、それ以外は L（Pillow と同じ判定）
+    tail_palette = pcx_data[-768:]
+    mode = ("P" if len(pcx_data) >= 769 and pcx_data[-769] == 0x0C and tail_palette != _GRAY_PALETTE
+            else "L")
+    img = Image.frombytes(mode, (width, height), memoryview(pcx_data)[128:], "pcx", mode, stride)
+    if mode == "P":
+        img.putpalette(tail_palette)
+    return img
+
 def convert_pcx_to_image(pcx_data, palette_data=None):
     try:
-        img = Image.open(BytesIO(pcx_data))
-        img.load()
-        img = img.convert("P")
+        try:
+            img = _decode_pcx_8bit(pcx_data)
+        except (ValueError, OSError):
+            img = None
+        if img is None:
+            img = Image.open(BytesIO(pcx_data))
+            img.load()
+        if img.mode != "P":
+            img = img.convert("P")
 
         extracted_palette = extract_palette_from_pcx_data(pcx_data)
         final_palette = palette_data or extracted_palette
@@ -101,21 +191,31 @@ def convert_pcx_to_image(pcx_data, palette_data=None):
         return img, final_palette
 
     except Exception as e:
-        logging.error(f"PCX→画像変換失敗: {e}")
+        logging.error("PCX→画像変換失敗: %s", e)
         return None, None
 
 # =====================
 # SFF画像の抽出処理
 # =====================
 def extract_sffv1(bis, analysis_json, image_objects, image_info_list, act_palette=None, palette_list=None):
-    with open(analysis_json, 'r', encoding='utf-8') as f:
-        analysis_results = json.load(f)
+    # analysis_json は analyze_sff_v1 の戻り値（リスト）か、その JSON ファイルのパス
+    if isinstance(analysis_json, (str, os.PathLike)):
+        with open(analysis_json, 'r', encoding='utf-8') as f:
+            analysis_results = json.load(f)
+    else:
+        analysis_results = analysis_json
 
     last_valid_palette = None
     applied_act_once = False
     first_palette = None  # 先頭画像のパレットのみを保持
     group9000_palettes = []  # グループ9000の独立パレットを保持
     palette_mapping = {}  # 各画像のパレットインデックスを記録
+    # リンク先の再デコードを避けるため、デコード済み画像を解析index毎に保持
+    # 値は (画像, デコード時に渡したパレット, 使用パレット)
+    decoded_pcx = {}
+    # 同じ内容の PCX（別の画像番号に同じ絵を重複して持つもの）は1回だけデコードする
+    # キー: (PCX の blake2b ダイジェスト, デコード時に渡したパレット)、値は (画像, 使用パレット)
+    decoded_by_content = {}
 
     for img in analysis_results:
         offset = img['offset']
@@ -142,17 +242,21 @@ def extract_sffv1(bis, analysis_json, image_objects, image_info_list, act_palett
                 
                 if linked_size > 0:
                     try:
-                        # リンク先の画像データを取得
-                        linked_offset = linked_img_info['offset']
-                        linked_pcx_data = extract_pcx(bis, linked_offset + 32, linked_size)
-                        
-                        # パレット処理
-                        linked_palette_data = extract_palette_from_pcx_data(linked_pcx_data)
+                        # リンク先のパレットはファイル上の末尾から直接取り出す
+                        linked_pcx_offset = linked_img_info['offset'] + 32
+                        linked_palette_data = _pcx_palette_from(bis, linked_pcx_offset, linked_size)
                         if not linked_palette_data:
                             linked_palette_data = last_valid_palette
                         
-                        # 画像変換
-                        linked_img, used_palette = convert_pcx_to_image(linked_pcx_data, linked_palette_data)
+                        # 画像変換（同じパレットでデコード済みなら共有し、PCX データは読まない）
+                        cached = decoded_pcx.get(link_index)
+                        if cached is not None and cached[1] == linked_palette_data:
+                            linked_img, used_palette = cached[0], cached[2]
+                        else:
+                            linked_pcx_data = extract_pcx(bis, linked_pcx_offset, linked_size)
+                            linked_img, used_palette = convert_pcx_to_image(linked_pcx_data, linked_palette_data)
+                            if linked_img:
+                                decoded_pcx[link_index] = (linked_img, linked_palette_data, used_palette)
                         
                         if linked_img:
                             image_objects.append(linked_img)
@@ -165,17 +269,16 @@ def extract_sffv1(bis, analysis_json, image_objects, image_info_list, act_palett
                             image_info_list.append(img_copy)
                             
                             palette_mapping[current_index] = -1
-                            logging.info(f"画像({group},{image_no}): リンクindex {link_index}→({linked_group},{linked_image_no})から解決")
+                            logging.info("画像(%s,%s): リンクindex %s→(%s,%s)から解決", group, image_no, link_index, linked_group, linked_image_no)
                             link_resolved = True
                             
                     except Exception as e:
-                        logging.warning(f"リンクindex処理エラー ({group},{image_no}) -> index {link_index}: {e}")
+                        logging.warning("リンクindex処理エラー (%s,%s) -> index %s: %s", group, image_no, link_index, e)
             
             # リンク解決に失敗した場合は空画像を作成
             if not link_resolved:
-                from PIL import Image
                 empty_img = Image.new('P', (1, 1), 0)  # 1x1の透明画像
-                empty_img.putpalette([0] * 768)  # 黒いパレット
+                empty_img.putpalette(bytes(768))  # 黒いパレット
                 
                 image_objects.append(empty_img)
                 img_copy = img.copy()
@@ -186,7 +289,7 @@ def extract_sffv1(bis, analysis_json, image_objects, image_info_list, act_palett
                 
                 # パレットマッピングは継承予定として設定
                 palette_mapping[len(image_objects) - 1] = -1
-                logging.info(f"画像({group},{image_no}): リンク解決失敗またはリンクindexなし、空画像を作成")
+                logging.info("画像(%s,%s): リンク解決失敗またはリンクindexなし、空画像を作成", group, image_no)
             continue
 
         pcx_data = extract_pcx(bis, offset + 32, size)
@@ -197,7 +300,7 @@ def extract_sffv1(bis, analysis_json, image_objects, image_info_list, act_palett
             pass
         elif group == 9000 and image_no != 0 and palflag == 1:
             palette_data = extract_palette_from_pcx_data(pcx_data)
-            logging.info(f"Group 9000 image {image_no}: 強制的に個別パレットを抽出")
+            logging.info("Group 9000 image %s: 強制的に個別パレットを抽出", image_no)
             if palette_data:
                 last_valid_palette = palette_data
         elif group == 9000:
@@ -205,7 +308,7 @@ def extract_sffv1(bis, analysis_json, image_objects, image_info_list, act_palett
             palette_data = extract_palette_from_pcx_data(pcx_data)
             if palette_data:
                 last_valid_palette = palette_data
-                logging.info(f"Group 9000 image {image_no}: 個別パレットを抽出")
+                logging.info("Group 9000 image %s: 個別パレットを抽出", image_no)
             else:
                 palette_data = last_valid_palette
         elif (6000 <= group < 7000 or 8000 <= group < 9000):
@@ -213,18 +316,18 @@ def extract_sffv1(bis, analysis_json, image_objects, image_info_list, act_palett
             palette_data = extract_palette_from_pcx_data(pcx_data)
             if palette_data:
                 last_valid_palette = palette_data
-                logging.info(f"Group {group} image {image_no}: 個別パレットを抽出")
+                logging.info("Group %s image %s: 個別パレットを抽出", group, image_no)
             else:
                 palette_data = last_valid_palette
         elif palflag == 1:
             # palflag=1は独立パレットを持たないので、直前のパレットを継承
             if last_valid_palette:
                 palette_data = last_valid_palette
-                logging.info(f"画像({group},{image_no}): palflag=1のため、直前のパレットを継承")
+                logging.info("画像(%s,%s): palflag=1のため、直前のパレットを継承", group, image_no)
             else:
                 # 前のパレットがない場合は自分からパレット抽出を試みる
                 palette_data = extract_palette_from_pcx_data(pcx_data)
-                logging.warning(f"画像({group},{image_no}): palflag=1だが、直前のパレットがないため自分からパレット抽出を試みる")
+                logging.warning("画像(%s,%s): palflag=1だが、直前のパレットがないため自分からパレット抽出を試みる", group, image_no)
                 if palette_data:
                     last_valid_palette = palette_data
         elif palflag == 0:
@@ -232,17 +335,27 @@ def extract_sffv1(bis, analysis_json, image_objects, image_info_list, act_palett
             palette_data = extract_palette_from_pcx_data(pcx_data)
             if palette_data:
                 last_valid_palette = palette_data
-                logging.info(f"画像({group},{image_no}): palflag=0で独立パレットを抽出成功")
+                logging.info("画像(%s,%s): palflag=0で独立パレットを抽出成功", group, image_no)
             else:
                 # パレット抽出に失敗した場合は直前のパレットを使用
                 palette_data = last_valid_palette
-                logging.info(f"画像({group},{image_no}): palflag=0だがパレット抽出失敗、直前のパレットを使用")
+                logging.info("画像(%s,%s): palflag=0だがパレット抽出失敗、直前のパレットを使用", group, image_no)
         else:
             palette_data = None
 
-        img_obj, used_palette = convert_pcx_to_image(pcx_data, palette_data)
+        content_key = None
+        if palette_data is None or isinstance(palette_data, bytes):
+            content_key = (hashlib.blake2b(pcx_data, digest_size=16).digest(), palette_data)
+        cached = decoded_by_content.get(content_key) if content_key is not None else None
+        if cached is not None:
+            img_obj, used_palette = cached
+        else:
+            img_obj, used_palette = convert_pcx_to_image(pcx_data, palette_data)
+            if img_obj and content_key is not None:
+                decoded_by_content[content_key] = (img_obj, used_palette)
 
         if img_obj:
+            decoded_pcx[img['index']] = (img_obj, palette_data, used_palette)
             image_objects.append(img_obj)
             image_info_list.append(img)
 
@@ -253,30 +366,30 @@ def extract_sffv1(bis, analysis_json, image_objects, image_info_list, act_palett
             is_independent_palette = False
             
             # パレットフラグとパレット抽出結果に基づいて独立パレットかどうかを判定
-            extracted_own_palette = extract_palette_from_pcx_data(pcx_data)
+            extracted_own_palette = _has_pcx_palette(pcx_data)
             
             if used_palette and extracted_own_palette:
                 # 条件1: グループ9000の画像でPCXにパレットがある場合は独立パレット
                 if group == 9000:
                     is_independent_palette = True
-                    logging.info(f"画像({group},{image_no}): グループ9000で独自パレットあり")
+                    logging.info("画像(%s,%s): グループ9000で独自パレットあり", group, image_no)
                 # 条件2: 特殊グループ（6000番台、8000番台）でPCXにパレットがある場合は独立パレット
                 elif (6000 <= group < 7000 or 8000 <= group < 9000):
                     is_independent_palette = True
-                    logging.info(f"画像({group},{image_no}): 特殊グループで独自パレットあり")
+                    logging.info("画像(%s,%s): 特殊グループで独自パレットあり", group, image_no)
                 # 条件3: (0,0)画像でPCXにパレットがある場合は独立パレット
                 elif group == 0 and image_no == 0:
                     is_independent_palette = True
-                    logging.info(f"画像(0,0): 先頭画像で独自パレットあり")
+                    logging.info("画像(0,0): 先頭画像で独自パレットあり")
                 # 条件4: その他のグループでpalflag=0かつPCXにパレットがある場合
                 elif palflag == 0:
                     is_independent_palette = True
-                    logging.info(f"画像({group},{image_no}): palflag=0で独自パレットあり")
+                    logging.info("画像(%s,%s): palflag=0で独自パレットあり", group, image_no)
             
             if is_independent_palette:
                 # 独立パレットを持つ画像の処理（内部的なパレット保存用）
                 group9000_palettes.append(used_palette)
-                logging.info(f"画像({group},{image_no}): 内部パレット{len(group9000_palettes)}を保存")
+                logging.info("画像(%s,%s): 内部パレット%sを保存", group, image_no, len(group9000_palettes))
             
             # 表示用パレットマッピングは後で統一するため、一旦-1に設定
             palette_mapping[current_img_idx] = -1
@@ -298,7 +411,7 @@ def extract_sffv1(bis, analysis_json, image_objects, image_info_list, act_palett
                 for palette in group9000_palettes:
                     if palette:  # パレットが存在する場合
                         group9000_0_palette = palette
-                        logging.info(f"(9000,0)パレット発見")
+                        logging.info("(9000,0)パレット発見")
                         break
                 break
         
@@ -308,46 +421,61 @@ def extract_sffv1(bis, analysis_json, image_objects, image_info_list, act_palett
             # ACTパレットを(9000,0)パレットとして使用
             act_palette_rgb = reverse_act_palette(act_palette)
             group9000_0_palette = act_palette_rgb
-            logging.info(f"ACTパレットを(9000,0)パレットとして使用")
+            logging.info("ACTパレットを(9000,0)パレットとして使用")
         
         if group9000_0_palette:
             palette_list.append(group9000_0_palette)
-            logging.info(f"(9000,0)パレット追加: インデックス0 (RGB値数: {len(group9000_0_palette)//3})")
-            logging.info(f"総パレット数: 1 ((9000,0)パレットのみ)")
+            logging.info("(9000,0)パレット追加: インデックス0 (RGB値数: %s)", len(group9000_0_palette)//3)
+            logging.info("総パレット数: 1 ((9000,0)パレットのみ)")
         else:
             # (9000,0)が見つからない場合
             if act_palette:
                 # ACTパレットが指定されている場合はACTパレットを使用
                 act_palette_rgb = reverse_act_palette(act_palette)
                 palette_list.append(act_palette_rgb)
-                logging.info(f"ACTパレット追加: インデックス0 (RGB値数: {len(act_palette_rgb)//3})")
-                logging.info(f"総パレット数: 1 (ACTパレットのみ)")
+                logging.info("ACTパレット追加: インデックス0 (RGB値数: %s)", len(act_palette_rgb)//3)
+                logging.info("総パレット数: 1 (ACTパレットのみ)")
             elif group9000_palettes:
                 # 最初の独立パレットを使用
                 palette_list.append(group9000_palettes[0])
-                logging.info(f"最初の独立パレット追加: インデックス0 (RGB値数: {len(group9000_palettes[0])//3})")
-                logging.info(f"総パレット数: 1 (最初の独立パレットのみ)")
+                logging.info("最初の独立パレット追加: インデックス0 (RGB値数: %s)", len(group9000_palettes[0])//3)
+                logging.info("総パレット数: 1 (最初の独立パレットのみ)")
             else:
                 # パレットが一つもない場合はデフォルトパレット
-                default_palette = []
-                for i in range(256):
-                    default_palette.extend([i, i, i])  # RGB同値でグレースケール
-                palette_list.append(default_palette)
+                palette_list.append(_GRAY_PALETTE)  # RGB同値でグレースケール
                 logging.warning("パレットが見つからないため、デフォルトグレースケールパレットを使用")
-                logging.info(f"総パレット数: 1 (デフォルトパレットのみ)")
+                logging.info("総パレット数: 1 (デフォルトパレットのみ)")
     
     # パレット適用範囲を決定
     # 9000,0と0,0から次の独立パレットまでの範囲を特定
     shared_palette_range = set()
     
+    # 範囲判定で使う列を一度だけ取り出す（画像毎に辞書を何度も引かない）
+    groups = [info.get('group_no', 0) for info in image_info_list]
+    image_nos = [info.get('image_no', 0) for info in image_info_list]
+
+    def has_own_palette(i):
+        """画像 i が独立パレットを持つか（範囲の終端判定）"""
+        if i >= len(image_objects):
+            return False
+        info = image_info_list[i]
+        pcx_size = info.get('size', 0)
+        if pcx_size <= 0:
+            return False
+        group = groups[i]
+        # グループ条件を先に見て、該当しない画像は PCX を読まない
+        if not (group == 9000 or (6000 <= group < 7000 or 8000 <= group < 9000) or info.get('palette', 0) == 0):
+            return False
+        return _pcx_palette_at(bis, info.get('offset', 0) + 32, pcx_size)
+
     # 9000,0と0,0の画像インデックスを取得
     group9000_0_index = None
     group0_0_index = None
     
-    for i, info in enumerate(image_info_list):
-        if info.get('group_no') == 9000 and info.get('image_no') == 0:
+    for i, (group, image_no) in enumerate(zip(groups, image_nos)):
+        if group == 9000 and image_no == 0:
             group9000_0_index = i
-        elif info.get('group_no') == 0 and info.get('image_no') == 0:
+        elif group == 0 and image_no == 0:
             group0_0_index = i
     
     # 共有パレット範囲を決定
@@ -356,28 +484,11 @@ def extract_sffv1(bis, analysis_json, image_objects, image_info_list, act_palett
         
         # 9000,0から次の独立パレットまでの範囲を追加
         for i in range(group9000_0_index + 1, len(image_info_list)):
-            info = image_info_list[i]
-            group = info.get('group_no', 0)
-            image_no = info.get('image_no', 0)
-            
-            # 次の独立パレットかどうかをチェック
-            has_own_palette = False
-            if i < len(image_objects):
-                pcx_offset = info.get('offset', 0) + 32
-                pcx_size = info.get('size', 0)
-                if pcx_size > 0:
-                    bis.seek(pcx_offset)
-                    pcx_data = bis.read(pcx_size)
-                    extracted_palette = extract_palette_from_pcx_data(pcx_data)
-                    if extracted_palette and (group == 9000 or (6000 <= group < 7000 or 8000 <= group < 9000) or info.get('palette', 0) == 0):
-                        has_own_palette = True
-            
-            if has_own_palette:
+            if has_own_palette(i):
                 # 独立パレットが見つかったので範囲終了
                 break
-            else:
-                # 共有パレット範囲に追加
-                shared_palette_range.add(i)
+            # 共有パレット範囲に追加
+            shared_palette_range.add(i)
     
     if group0_0_index is not None:
         shared_palette_range.add(group0_0_index)
@@ -386,31 +497,16 @@ def extract_sffv1(bis, analysis_json, image_objects, image_info_list, act_palett
         for i in range(group0_0_index + 1, len(image_info_list)):
             if i in shared_palette_range:
                 continue  # 既に追加済み
-                
-            info = image_info_list[i]
-            group = info.get('group_no', 0)
-            image_no = info.get('image_no', 0)
-            
-            # 次の独立パレットかどうかをチェック
-            has_own_palette = False
-            if i < len(image_objects):
-                pcx_offset = info.get('offset', 0) + 32
-                pcx_size = info.get('size', 0)
-                if pcx_size > 0:
-                    bis.seek(pcx_offset)
-                    pcx_data = bis.read(pcx_size)
-                    extracted_palette = extract_palette_from_pcx_data(pcx_data)
-                    if extracted_palette and (group == 9000 or (6000 <= group < 7000 or 8000 <= group < 9000) or info.get('palette', 0) == 0):
-                        has_own_palette = True
-            
-            if has_own_palette:
+            if has_own_palette(i):
                 # 独立パレットが見つかったので範囲終了
                 break
-            else:
-                # 共有パレット範囲に追加
-                shared_palette_range.add(i)
+            # 共有パレット範囲に追加
+            shared_palette_range.add(i)
     
-    logging.info(f"共有パレット適用範囲: {sorted(shared_palette_range)}")
+    # ログが無効な時はソート・一覧出力のループ自体を行わない
+    log_info = logging.root.isEnabledFor(logging.INFO)
+    if log_info:
+        logging.info("共有パレット適用範囲: %s", sorted(shared_palette_range))
     
     # 2回目のパス: 共有パレット範囲の画像のみパレットマッピングを0に設定
     # その他の画像は独自のパレットを使用
@@ -421,19 +517,20 @@ def extract_sffv1(bis, analysis_json, image_objects, image_info_list, act_palett
         if i in shared_palette_range:
             # 共有パレット範囲の画像はパレットリストのパレット（インデックス0）を使用
             palette_mapping[i] = 0
-            logging.info(f"画像({group},{image_no}) @ index {i}: 共有パレット0を適用")
+            logging.info("画像(%s,%s) @ index %s: 共有パレット0を適用", group, image_no, i)
         else:
             # 共有パレット範囲外の画像は独自のパレットを使用（-1で無効化）
             palette_mapping[i] = -1
-            logging.info(f"画像({group},{image_no}) @ index {i}: 独自パレットを使用（共有パレット無効）")
+            logging.info("画像(%s,%s) @ index %s: 独自パレットを使用（共有パレット無効）", group, image_no, i)
     
     # デバッグ用に最終的なパレットマッピング一覧を出力
-    logging.info("=== パレットマッピング最終状態 ===")
-    for i, info in enumerate(image_info_list):
-        group = info.get('group_no', 0)
-        image_no = info.get('image_no', 0)
-        final_palette_idx = palette_mapping.get(i, 0)
-        logging.info(f"画像({group},{image_no}) @ index {i}: パレット{final_palette_idx}")
+    if log_info:
+        logging.info("=== パレットマッピング最終状態 ===")
+        for i, info in enumerate(image_info_list):
+            group = info.get('group_no', 0)
+            image_no = info.get('image_no', 0)
+            final_palette_idx = palette_mapping.get(i, 0)
+            logging.info("画像(%s,%s) @ index %s: パレット%s", group, image_no, i, final_palette_idx)
     
     return palette_mapping, shared_palette_range
 
@@ -449,6 +546,7 @@ class SFFv1Reader:
         self.sprites = []  # spritesリストを追加
         self.palettes = [None]  # ← ここを追加
         self.last_image_uses_embedded_palette = False  # 最後に取得した画像が独自パレットを使用するかのフラグ
+        self._indexed_bytes = {}  # get_image 用: 画像インデックス → インデックスカラーのバイト列
 
     def read_header(self, f):
         pass  # ヘッダ読み込み不要（内部で行う）
@@ -457,20 +555,23 @@ class SFFv1Reader:
         pass  # パレットは get_image 時に処理される
 
     def read_sprites(self, f):
-        import tempfile
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".json") as tmp_json:
-            analyze_sff_v1(f, tmp_json.name)
-
-        with open(self.file_path, 'rb') as bis:
+        # 渡されたファイルを1回だけ mmap し、解析と抽出で共有する（ファイルを開き直さない）
+        mm = map_sff_file(f)
+        try:
+            bis = mm if mm is not None else f
+            analysis_results = analyze_sff_v1(bis)
             result = extract_sffv1(
                 bis,
-                tmp_json.name,
+                analysis_results,
                 self.image_objects,
                 self.image_info_list,
                 self.act_palette,
                 self.palette_list
             )
-            self.palette_mapping, self.shared_palette_range = result
+        finally:
+            if mm is not None:
+                mm.close()
+        self.palette_mapping, self.shared_palette_range = result
 
         if self.palette_list:
             self.palettes = self.palette_list
@@ -479,6 +580,8 @@ class SFFv1Reader:
 
         # spritesリストを構築（viewer.pyが期待する形式）
         self.sprites = []
+        self._indexed_bytes = {}
+        rgba_by_image = {}  # リンクで共有された画像は RGBA 化を1回だけ行う
         for i, info in enumerate(self.image_info_list):
             # 対応する画像から実際のサイズを取得
             width = 1  # デフォルト値を1に設定（0だと表示されない可能性）
@@ -491,9 +594,10 @@ class SFFv1Reader:
                 # PIL画像からRGBAバイトデータを取得
                 try:
                     img = self.image_objects[i]
-                    if img.mode != 'RGBA':
-                        img = img.convert('RGBA')
-                    image_data = img.tobytes()
+                    image_data = rgba_by_image.get(id(img))
+                    if image_data is None:
+                        image_data = (img if img.mode == 'RGBA' else img.convert('RGBA')).tobytes()
+                        rgba_by_image[id(img)] = image_data
                 except Exception as e:
                     print(f"[SFFv1] 警告: スプライト{i}のimage_data変換失敗: {e}")
                     image_data = None
@@ -526,7 +630,6 @@ class SFFv1Reader:
             self.sprites.append(sprite)
 
     def get_image(self, index, palette_index=0, palette_override=None):
-        from PIL import Image
         if index >= len(self.image_objects):
             raise ValueError(f"画像インデックス{index}が範囲外です（最大{len(self.image_objects)-1}）")
         
@@ -549,10 +652,7 @@ class SFFv1Reader:
             # 共有パレット範囲の画像はパレットリストのパレットを使用
             if len(self.palette_list) == 0:
                 # パレットが存在しない場合はデフォルトパレットを作成
-                default_palette = []
-                for i in range(256):
-                    default_palette.extend([i, i, i])  # RGB同値でグレースケール
-                raw_palette = default_palette
+                raw_palette = _GRAY_PALETTE  # RGB同値でグレースケール
             else:
                 raw_palette = self.palette_list[0]  # 常にインデックス0
             
@@ -574,32 +674,25 @@ class SFFv1Reader:
                         print(f"[DEBUG] get_image: 画像index{index} -> 独自パレット使用（埋め込みパレット）")
                 else:
                     # パレットがない場合はデフォルト
-                    default_palette = []
-                    for i in range(256):
-                        default_palette.extend([i, i, i])
-                    raw_palette = default_palette
+                    raw_palette = _GRAY_PALETTE
                     if sprite_info:
                         print(f"[DEBUG] get_image: 画像({sprite_info['group_no']},{sprite_info['sprite_no']}) -> デフォルトパレット使用（埋め込みパレットなし）")
                     else:
                         print(f"[DEBUG] get_image: 画像index{index} -> デフォルトパレット使用（埋め込みパレットなし）")
             else:
-                default_palette = []
-                for i in range(256):
-                    default_palette.extend([i, i, i])
-                raw_palette = default_palette
+                raw_palette = _GRAY_PALETTE
         # フラットな 768 長のリストを [(r, g, b, a)] に変換
-        palette = []
-        for i in range(0, min(len(raw_palette), 768), 3):
-            try:
-                r, g, b = raw_palette[i], raw_palette[i+1], raw_palette[i+2]
-            except IndexError:
-                r, g, b = 0, 0, 0
-            # インデックス0は透明、それ以外は不透明
-            color_index = i // 3
-            a = 0 if color_index == 0 else 255
-            palette.append((r, g, b, a))
-
-        data = img.tobytes()
+        # 端数の要素しかない色は黒として扱う
+        flat = list(raw_palette[:768])
+        if len(flat) % 3:
+            flat[len(flat) - len(flat) % 3:] = (0, 0, 0)
+        # インデックス0は透明、それ以外は不透明
+        palette = list(zip(flat[0::3], flat[1::3], flat[2::3], _PALETTE_ALPHA))
+
+        # 画像データは不変なので、再描画のたびに tobytes() でコピーしない
+        data = self._indexed_bytes.get(index)
+        if data is None:
+            data = self._indexed_bytes[index] = img.tobytes()
         
         # 独自パレット使用フラグをインスタンス変数に保存（呼び出し元で参照可能）
         self.last_image_uses_embedded_palette = index not in self.shared_palette_range
@@ -608,12 +701,10 @@ class SFFv1Reader:
 
     def _convert_palette_to_flat(self, palette_rgba):
         """RGBA形式のパレット[(r,g,b,a), ...]をフラット形式[r,g,b,r,g,b,...]に変換"""
-        flat_palette = []
-        for r, g, b, a in palette_rgba:
-            flat_palette.extend([r, g, b])
+        flat_palette = [c for r, g, b, a in palette_rgba for c in (r, g, b)]
         # 768バイト（256色×3）まで埋める
-        while len(flat_palette) < 768:
-            flat_palette.append(0)
+        if len(flat_palette) < 768:
+            flat_palette.extend([0] * (768 - len(flat_palette)))
         return flat_palette[:768]
 
     def is_independent_palette_image(self, index):
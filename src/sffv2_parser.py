@@ -1,11 +1,23 @@
+import re
+import mmap
 import struct
+import contextlib
 from PIL import Image
 from io import BytesIO
 from typing import Optional, Tuple, List, Dict
 import sys
 import os
+import threading
 import numpy as np
 from pathlib import Path
+
+# Numba があれば LZ5 デコードをネイティブコードにコンパイルする（無ければ Python 実装）
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+except ImportError:
+    numba = None
+    NUMBA_AVAILABLE = False
 # ikemen_rle8モジュールをインポート - 移植により不要
 # sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 # from ikemen_rle8_true import rle8_decode
@@ -75,56 +87,72 @@ SYNTHESIZE_EMPTY_PALETTE = True  # 全黒/全透明パレット検出時に視
 FIX_SFFV2_ALPHA_CHANNEL = True   # SFFv2パレットのアルファ値を修正（index0=透明、他=不透明）
 DISABLE_BGRA_RGBA_CONVERSION = True  # BGRAからRGBAへの変換を無効化（色合い問題の修正）
 
-def debug_print(msg):
-    if DEBUG_SFF:
+# 無効時は何もしない関数を束縛し、呼び出しごとのフラグ判定を省く。
+# 引数の f-string 整形も省きたいホットパスでは呼び出し側を if DEBUG_SFF: で囲む
+if DEBUG_SFF:
+    def debug_print(msg):
         print(msg)
+else:
+    def debug_print(msg):
+        pass
 
 def debug_palette(msg):
     if DEBUG_PALETTE_DETAILS:
         print(msg)
 
+# PNG署名: 89 50 4E 47 0D 0A 1A 0A
+_PNG_SIGNATURE = b'\x89PNG\x0D\x0A\x1A\x0A'
+# 署名を探す位置（先頭が最も一般的。圧縮データでは4バイトのサイズの後ろ）
+_PNG_SIGNATURE_OFFSETS = (0, 4)
+
+def _png_offset(data):
+    """PNG署名の開始位置を返す（PNGでなければ None）"""
+    for ofs in _PNG_SIGNATURE_OFFSETS:
+        if data[ofs:ofs + 8] == _PNG_SIGNATURE:
+            return ofs
+    return None
+
 def is_png_data(data):
     """データがPNG形式かどうかを判定（最適化版）"""
-    if len(data) < 8:
-        return False
-    
-    # PNG署名: 89 50 4E 47 0D 0A 1A 0A（高速比較）
-    png_signature = b'\x89PNG\x0D\x0A\x1A\x0A'
-    
-    # 先頭から検索（最も一般的）
-    if data[:8] == png_signature:
-        return True
-    
-    # 4バイトオフセットから検索（圧縮データの場合）
-    if len(data) >= 12 and data[4:12] == png_signature:
-        return True
-    
-    return False
+    return _png_offset(data) is not None
 
 def extract_png_data(data):
     """データからPNG部分を抽出（最適化版）"""
-    if len(data) < 8:
+    ofs = _png_offset(data)
+    if ofs is None:
         return None
-    
-    png_signature = b'\x89PNG\x0D\x0A\x1A\x0A'
-    
-    # 先頭から検索（最も一般的）
-    if data[:8] == png_signature:
-        return data
-    
-    # 4バイトオフセットから検索
-    if len(data) >= 12 and data[4:12] == png_signature:
-        return data[4:]
-    
-    return None
+    return data[ofs:] if ofs else data
+
+# 全黒パレットの可視化用パレット（index0 は黒、他は彩度の高い擬似カラーを周期性で散らす）
+_synth_index = np.arange(256, dtype=np.uint16)
+_SYNTH_DEBUG_PALETTE = np.stack(((_synth_index * 37) & 0xFF,
+                                 (_synth_index * 73) & 0xFF,
+                                 (_synth_index * 151) & 0xFF), axis=1).astype(np.uint8)
+_SYNTH_DEBUG_PALETTE[0] = 0
+_SYNTH_DEBUG_PALETTE = _SYNTH_DEBUG_PALETTE.tobytes()
+del _synth_index
+
+def _count_non_black(rgb_values):
+    """RGB を3要素ずつ並べたパレット列のうち、黒以外の色の数を返す（末尾の端数は 0 で補う）"""
+    arr = np.frombuffer(bytes(rgb_values), dtype=np.uint8)
+    pad = -len(arr) % 3
+    if pad:
+        arr = np.concatenate((arr, np.zeros(pad, dtype=np.uint8)))
+    return int(arr.reshape(-1, 3).any(axis=1).sum())
 
-def decode_png(data, width, height):
-    """PNG画像データをデコード"""
+def decode_png(data, width, height, png_offset=None):
+    """PNG画像データをデコード
+
+    png_offset: 呼び出し側で _png_offset 済みなら署名の位置（再走査を省く）
+    """
     try:
         debug_print(f"[DEBUG] PNG decoding: data_size={len(data)}, expected_size={width}x{height}")
         
         # PNG データを抽出
-        png_data = extract_png_data(data)
+        if png_offset is None:
+            png_data = extract_png_data(data)
+        else:
+            png_data = data[png_offset:] if png_offset else data
         if png_data is None:
             debug_print(f"[ERROR] No PNG data found in provided data")
             return bytearray([0] * width * height), 'indexed', None
@@ -148,18 +176,18 @@ def decode_png(data, width, height):
                     ctype = raw[pos+4:pos+8]
                 except struct.error:
                     break
+                # PLTE / tRNS は IDAT より前にしか現れないので、画像データ本体は走査しない
+                if ctype == b'IDAT' or ctype == b'IEND':
+                    break
                 pos += 8
                 if pos + length + 4 > len(raw):
                     break
-                cdata = raw[pos:pos+length]
-                pos += length  # data終端
-                crc = raw[pos:pos+4]
-                pos += 4
                 if ctype == b'PLTE':
-                    plte = cdata  # 3*N bytes
+                    plte = raw[pos:pos+length]  # 3*N bytes
                 elif ctype == b'tRNS':
-                    trns = cdata
-                elif ctype == b'IEND':
+                    trns = raw[pos:pos+length]
+                pos += length + 4  # data + CRC
+                if plte is not None and trns is not None:
                     break
             return plte, trns
         
@@ -178,12 +206,13 @@ def decode_png(data, width, height):
             
             # 元の画像データを確認
             raw_data = img.tobytes()
-            debug_print(f"[DEBUG] Raw indexed data size: {len(raw_data)}")
-            if len(raw_data) >= 20:
-                indices = list(raw_data[:20])
-                debug_print(f"[DEBUG] First 20 pixel indices: {indices}")
-                unique_indices = set(raw_data)
-                debug_print(f"[DEBUG] Unique indices used: {sorted(unique_indices)[:20]}")  # 最初の20個
+            if DEBUG_SFF:
+                debug_print(f"[DEBUG] Raw indexed data size: {len(raw_data)}")
+                if len(raw_data) >= 20:
+                    indices = list(raw_data[:20])
+                    debug_print(f"[DEBUG] First 20 pixel indices: {indices}")
+                    unique_indices = set(raw_data)
+                    debug_print(f"[DEBUG] Unique indices used: {sorted(unique_indices)[:20]}")  # 最初の20個
             
             # パレット情報をデバッグ出力
             palette_data = img.getpalette()
@@ -201,13 +230,7 @@ def decode_png(data, width, height):
                 debug_print(f"[DEBUG] Original palette first 20 colors: {first_colors}")
                 
                 # 非黒色をカウント
-                non_black_count = 0
-                for i in range(0, len(palette_data), 3):
-                    r = palette_data[i] if i < len(palette_data) else 0
-                    g = palette_data[i+1] if i+1 < len(palette_data) else 0  
-                    b = palette_data[i+2] if i+2 < len(palette_data) else 0
-                    if r > 0 or g > 0 or b > 0:
-                        non_black_count += 1
+                non_black_count = _count_non_black(palette_data)
                 debug_print(f"[DEBUG] Non-black colors in original palette: {non_black_count}")
                 
                 # パレットが全て黒の場合の特別処理
@@ -218,10 +241,7 @@ def decode_png(data, width, height):
                         debug_print(f"[DEBUG] Raw PLTE chunk length={len(plte_chunk)}")
                         # PLTEチャンクから直接パレット再構築
                         rebuilt = list(plte_chunk)
-                        non_black_plte = 0
-                        for i in range(0, len(rebuilt), 3):
-                            if any(rebuilt[i+j] > 0 for j in range(3) if i+j < len(rebuilt)):
-                                non_black_plte += 1
+                        non_black_plte = _count_non_black(plte_chunk)
                         debug_print(f"[DEBUG] Non-black colors in PLTE chunk: {non_black_plte}")
                         if non_black_plte > 0:
                             # Pillow内部パレットを上書き（不足は0埋め）
@@ -235,18 +255,8 @@ def decode_png(data, width, height):
                         all_black_palette = True
                     if non_black_count == 0 and SYNTHESIZE_EMPTY_PALETTE:
                         debug_print("[INFO] Still all black. Synthesizing debug palette")
-                        synth = []
-                        for i in range(256):
-                            if i == 0:
-                                synth += [0,0,0]
-                            else:
-                                # 彩度の高い擬似カラー (周期性で散らす)
-                                r = (i * 37) & 0xFF
-                                g = (i * 73) & 0xFF
-                                b = (i * 151) & 0xFF
-                                synth += [r, g, b]
-                        img.putpalette(synth)
-                        palette_data = synth
+                        img.putpalette(_SYNTH_DEBUG_PALETTE)
+                        palette_data = _SYNTH_DEBUG_PALETTE
                         debug_print("[DEBUG] Synth palette applied")
             
             # すべて黒パレットの場合は SFF パレット適用前提でインデックスデータを返す
@@ -257,7 +267,13 @@ def decode_png(data, width, height):
                         debug_print("[DEBUG] Ignoring all-zero tRNS except index0")
                 return bytearray(raw_data), 'indexed', None
 
-            # 複数の変換方法を試行（正常パレット）
+            # 透明色指定（tRNS）が無ければどの変換方法でも結果は不透明な RGBA と同じになるので、
+            # 変換は1回だけにして試行を省く
+            if 'transparency' not in img.info:
+                debug_print("[DEBUG] Using RGBA conversion (no transparency)")
+                return bytearray(img.convert('RGBA').tobytes()), 'rgba', None
+            
+            # 複数の変換方法を試行（正常パレット、透明色あり）
             conversion_methods = [
                 ('RGB', lambda x: x.convert('RGB')),
                 ('RGBA', lambda x: x.convert('RGBA')),
@@ -283,11 +299,8 @@ def decode_png(data, width, height):
                         debug_print(f"[DEBUG] {method_name} - First 4 pixel colors: {pixel_colors[:4]}")
                         
                         # 非透明・非黒ピクセルをチェック
-                        non_black_pixels = 0
-                        for i in range(0, len(rgba_data), 4):
-                            r, g, b, a = rgba_data[i:i+4]
-                            if (r > 0 or g > 0 or b > 0) and a > 0:
-                                non_black_pixels += 1
+                        pixels = np.frombuffer(rgba_data, dtype=np.uint8).reshape(-1, 4)
+                        non_black_pixels = int((pixels[:, :3].any(axis=1) & (pixels[:, 3] > 0)).sum())
                         
                         debug_print(f"[DEBUG] {method_name} - Non-black visible pixels: {non_black_pixels}")
                         
@@ -329,6 +342,51 @@ def decode_png(data, width, height):
         decoded = bytearray([0] * width * height)
         return decoded, 'indexed', None
 
+# SFFv2 RLE8 のランヘッダー（上位2ビットが01のバイト）
+_RLE8_RUN_HEADER = re.compile(rb'[\x40-\x7f]')
+# NumPy でまとめて展開する RLE8 ストリームの最小バイト数（これ未満は Python ループの方が速い）
+_RLE8_NUMPY_MIN_BYTES = 256
+
+def _rle8_expand_np(data, expected_size: int) -> bytearray:
+    """
+    SFFv2 RLE8（0x40-0x7F がランヘッダー、次のバイトがその値）を NumPy で展開する。
+    ランヘッダーに当たるバイトが連続する区間では区間先頭からヘッダーと値が交互に並ぶため、
+    区間内の偶数番目をヘッダー、その直後を値として命令列を一括で求め、np.repeat で展開する。
+    出力は expected_size バイトで、足りない分は0。
+    """
+    out = bytearray(expected_size)
+    src = np.frombuffer(data, dtype=np.uint8)
+    n = len(src)
+    if n == 0 or expected_size == 0:
+        return out
+
+    is_class = (src & 0xC0) == 0x40
+    idx = np.arange(n)
+    run_start = is_class.copy()
+    run_start[1:] &= ~is_class[:-1]
+    start_pos = np.maximum.accumulate(np.where(run_start, idx, 0))
+    is_header = is_class & (((idx - start_pos) & 1) == 0)
+    if is_header[-1]:
+        # 値の無い末尾のヘッダーでは何も出力せずに終わる
+        n -= 1
+        src = src[:n]
+        is_header = is_header[:n]
+        if n == 0:
+            return out
+
+    is_value = np.zeros(n, dtype=bool)
+    is_value[1:] = is_header[:-1]
+    ops = np.flatnonzero(~is_value)
+    headers = is_header[ops]
+    counts = np.where(headers, src[ops] & 0x3F, 1)
+    values = src[ops + headers]
+
+    # 出力が埋まった後の命令は展開しない
+    last = int(np.searchsorted(np.cumsum(counts), expected_size)) + 1
+    pixels = np.repeat(values[:last], counts[:last])[:expected_size]
+    np.frombuffer(out, dtype=np.uint8)[:len(pixels)] = pixels
+    return out
+
 def _decode_elecbyte_rle8_enhanced(data: bytes, width: int, height: int) -> Optional[np.ndarray]:
     """
     Enhanced Elecbyte RLE8 decoder based on sff2_decode.py implementation.
@@ -354,46 +412,45 @@ def _decode_elecbyte_rle8_enhanced(data: bytes, width: int, height: int) -> Opti
     debug_print(f"[ENHANCED_RLE8] Uncompressed length from header: {uncompressed_length}")
     
     i = 4  # skip uncompressed length
-    out: List[int] = []
-    run_len = -1
-    iteration = 0
-    
-    # Process bytes until we've produced the required number of pixels
-    while len(out) < expected_pixels and i < len(data):
-        b = data[i]
-        i += 1
-        
-        if iteration < 10:  # Debug first few iterations
-            debug_print(f"[ENHANCED_RLE8] Iteration {iteration}: byte=0x{b:02x}, run_len={run_len}, out_len={len(out)}")
-        
-        # Top two bits 01 indicate a run header; only apply if no
-        # run length is currently pending.
-        if (b & 0xC0) == 0x40 and run_len == -1:
-            run_len = b & 0x3F
-            if iteration < 10:
-                debug_print(f"[ENHANCED_RLE8]   RLE header detected: run_len={run_len}")
-        else:
-            count = run_len if run_len != -1 else 1
-            out.extend([b] * count)
-            if iteration < 10:
-                debug_print(f"[ENHANCED_RLE8]   Output {count} copies of 0x{b:02x}, total_out={len(out)}")
-            run_len = -1
+    # Write into a pre-sized buffer: literal runs (bytes outside 0x40-0x7F)
+    # are copied with one slice each and RLE runs are filled with one slice,
+    # instead of building a [b] * count list per opcode.
+    # The original byte loop gave up after expected_pixels * 3 + 1 opcodes
+    limit = min(len(data), i + expected_pixels * 3 + 1)
+    if limit - i >= _RLE8_NUMPY_MIN_BYTES:
+        # Long streams: resolve all opcodes at once and expand with np.repeat
+        out = _rle8_expand_np(data[i:limit], expected_pixels)
+        return np.frombuffer(out, dtype=np.uint8)
+    
+    out = bytearray(expected_pixels)
+    pos = 0
+    search = _RLE8_RUN_HEADER.search
+    
+    while pos < expected_pixels and i < limit:
+        m = search(data, i, limit)
+        literal_end = m.start() if m is not None else limit
+        if literal_end > i:
+            n = min(literal_end - i, expected_pixels - pos)
+            out[pos:pos + n] = data[i:i + n]
+            pos += n
+            i += n
+            continue
         
-        iteration += 1
-        
-        # Safety break to prevent infinite loops
-        if iteration > expected_pixels * 3:
-            debug_print(f"[ENHANCED_RLE8] Safety break at iteration {iteration}")
+        # Top two bits 01 indicate a run header; the next byte is always
+        # the run value, even if it looks like another header.
+        run_len = data[i] & 0x3F
+        i += 1
+        if i >= limit:
             break
+        end_pos = min(pos + run_len, expected_pixels)
+        out[pos:end_pos] = bytes((data[i],)) * (end_pos - pos)
+        i += 1
+        pos = end_pos
     
-    # Pad with zeros if we didn't emit enough pixels
-    if len(out) < expected_pixels:
-        padding_needed = expected_pixels - len(out)
-        debug_print(f"[ENHANCED_RLE8] Padding with {padding_needed} zeros")
-        out.extend([0] * padding_needed)
-    
-    # Truncate if we have too many pixels
-    result = np.array(out[:expected_pixels], dtype=np.uint8)
+    # Bytes past pos stay zero (padding)
+    if pos < expected_pixels:
+        debug_print(f"[ENHANCED_RLE8] Padding with {expected_pixels - pos} zeros")
+    result = np.frombuffer(out, dtype=np.uint8)
     
     # Statistics for debugging
     non_zero_count = np.count_nonzero(result)
@@ -443,6 +500,10 @@ def decode_rle8(data, width, height):
         return bytearray(data)
     
     expected_size = width * height
+    if len(data) >= _RLE8_NUMPY_MIN_BYTES:
+        # 長いストリームは命令列を NumPy で一括解決して展開する
+        return _rle8_expand_np(data, expected_size)
+    
     p = bytearray(expected_size)  # 事前にサイズ確定
     i = 0
     j = 0
@@ -461,22 +522,44 @@ def decode_rle8(data, width, height):
                 d = data[i]
                 i += 1
             else:
-                # データ終端処理
-                remaining = expected_size - j
-                if remaining > 0:
-                    p[j:j+remaining] = [0] * remaining
+                # データ終端（残りは確保時の0のまま）
                 break
         else:
             n = 1
         
-        # 高速データコピー
+        # 高速データコピー（一時リストを作らず bytes の繰り返しで埋める）
         end_pos = min(j + n, expected_size)
         if end_pos > j:
-            p[j:end_pos] = [d] * (end_pos - j)
+            p[j:end_pos] = bytes((d,)) * (end_pos - j)
             j = end_pos
     
     return p
 
+# PCX 方式 RLE のランマーカー（上位2ビットが11のバイト）
+_PCX_RLE_MARKER = re.compile(rb'[\xc0-\xff]')
+_PCX_RLE_LITERAL = re.compile(rb'[\x00-\xbf]')
+
+def _has_pcx_zero_count_run(raw: bytes) -> bool:
+    """
+    カウント0のランマーカー（0xC0）を含むか。
+    0xC0 以上のバイトが連続する区間ではマーカーと値が交互に並ぶため、
+    区間先頭から偶数番目の 0xC0 だけがマーカーになる。
+    """
+    pos = raw.find(b'\xc0')
+    run_start = run_end = -1
+    while pos >= 0:
+        if pos >= run_end:
+            # pos を含む 0xC0 以上の連続区間を求める
+            run_start = pos
+            while run_start > 0 and raw[run_start - 1] >= 0xC0:
+                run_start -= 1
+            m = _PCX_RLE_LITERAL.search(raw, pos)
+            run_end = m.start() if m is not None else len(raw)
+        if (pos - run_start) % 2 == 0:
+            return True
+        pos = raw.find(b'\xc0', pos + 1)
+    return False
+
 def decode_rle8_pcx(data: bytes, width: int, height: int) -> bytearray:
     """PCX方式RLE8デコード（IkemenGO準拠版 - 正確な実装）"""
     expected_size = width * height
@@ -492,45 +575,52 @@ def decode_rle8_pcx(data: bytes, width: int, height: int) -> bytearray:
     header_hex = ' '.join(f'{b:02x}' for b in header_bytes)
     debug_print(f"[DEBUG] PCX RLE8 データ先頭: {header_hex}")
     
+    # ランが行内で閉じている通常の PCX ストリームは Pillow の C 実装 "pcx" デコーダーで一括展開する。
+    # 0xC0（カウント0を64とみなす）を含むもの、行を跨ぐラン、データ不足は下の Python 実装で処理する
+    raw = data if isinstance(data, bytes) else bytes(data)
+    if expected_size > 0 and not _has_pcx_zero_count_run(raw):
+        try:
+            img = Image.frombytes("L", (width, height), raw, "pcx", "L", width)
+            return bytearray(img.tobytes())
+        except (ValueError, OSError):
+            pass
+    
     out = bytearray(expected_size)
     i = 0          # input index
     j = 0          # output index
+    data_len = len(data)
+    search = _PCX_RLE_MARKER.search
     
     # IkemenGOのPCX RLE8アルゴリズムを厳密に再現
-    while j < len(out) and i < len(data):
-        d = data[i]
+    # リテラル（0xC0 未満）の連続は次のマーカーを正規表現で探して1回のスライス代入で写す
+    while j < expected_size and i < data_len:
+        m = search(data, i)
+        literal_end = m.start() if m is not None else data_len
+        if literal_end > i:
+            n = min(literal_end - i, expected_size - j)
+            out[j:j + n] = data[i:i + n]
+            i += n
+            j += n
+            continue
+        
+        # PCX RLEのエンコーディング判定（上位2ビットが11の場合はRLEカウント）
+        count = data[i] & 0x3F    # 下位6ビットがカウント
+        if count == 0:
+            count = 64      # 0の場合は64を意味する
         i += 1
         
-        # PCX RLEのエンコーディング判定
-        if (d & 0xC0) == 0xC0:  # 上位2ビットが11の場合はRLEカウント
-            count = d & 0x3F    # 下位6ビットがカウント
-            if count == 0:
-                count = 64      # 0の場合は64を意味する
-            
-            # 次のバイトが実際の値
-            if i >= len(data):
-                debug_print("[WARNING] PCX RLE8: データ不足（値バイトなし）")
-                break
-                
-            value = data[i]
-            i += 1
-            
-            # カウント分だけ値を出力
-            for _ in range(count):
-                if j >= len(out):
-                    break
-                out[j] = value
-                j += 1
-        else:
-            # 通常のバイト（RLEでない）
-            if j < len(out):
-                out[j] = d
-                j += 1
+        # 次のバイトが実際の値
+        if i >= data_len:
+            debug_print("[WARNING] PCX RLE8: データ不足（値バイトなし）")
+            break
+        
+        # カウント分だけ値を出力
+        end_pos = min(j + count, expected_size)
+        out[j:end_pos] = bytes((data[i],)) * (end_pos - j)
+        i += 1
+        j = end_pos
     
-    # 不足分を0で埋める
-    while j < len(out):
-        out[j] = 0
-        j += 1
+    # 不足分は bytearray の初期値（0）のまま
     
     # 結果検証
     actual_size = len(out)
@@ -538,59 +628,58 @@ def decode_rle8_pcx(data: bytes, width: int, height: int) -> bytearray:
     
     return out
 
+# RLE5 の後続パケット（上位3bit = 画素数-1、下位5bit = 色）をバイト値ごとに展開済みにしたテーブル
+_RLE5_PACKET_FILL = tuple(bytes((b & 0x1F,)) * ((b >> 5) + 1) for b in range(256))
+
 def decode_rle5(data, width, height):
     """SFFv2 RLE5デコード（IkemenGO準拠版）"""
     expected_size = width * height
     debug_print(f"[DEBUG] RLE5デコード開始: データサイズ={len(data)}, 期待サイズ={expected_size}")
     
     if len(data) == 0:
-        return bytearray([0] * expected_size)
+        return bytearray(expected_size)
     
     out = bytearray(expected_size)
+    last = len(data) - 1  # 読み取り位置は末尾バイトで止まる（IkemenGO と同じ）
     i = 0
     j = 0
     
-    while j < len(out) and i < len(data):
+    # 読み取り位置が末尾で止まるため、出力が埋まるまで続く
+    while j < expected_size:
         # rl (run length) を読み取り
         rl = data[i]
-        if i < len(data) - 1:
+        if i < last:
             i += 1
         
-        if i >= len(data):
-            break
-            
         # dl (data length) と c (color) を読み取り
         dl = data[i] & 0x7F
         c = 0
         
         if (data[i] >> 7) != 0:
-            if i < len(data) - 1:
+            if i < last:
                 i += 1
-            if i < len(data):
-                c = data[i]
+            c = data[i]
         
-        if i < len(data) - 1:
+        if i < last:
             i += 1
         
-        # データを出力
-        while True:
-            if j < len(out):
-                out[j] = c
-                j += 1
-            
-            rl -= 1
-            if rl < 0:
-                dl -= 1
-                if dl < 0:
-                    break
-                
-                if i < len(data):
-                    c = data[i] & 0x1F
-                    rl = (data[i] >> 5)
-                    if i < len(data) - 1:
-                        i += 1
-                else:
-                    break
+        # 最初のランは rl+1 画素、続く dl 個のパケットは (上位3bit)+1 画素を1回のスライス代入で書く
+        end_pos = min(j + rl + 1, expected_size)
+        out[j:end_pos] = bytes((c,)) * (end_pos - j)
+        j = end_pos
+        
+        for _ in range(dl):
+            if j >= expected_size:
+                break
+            fill = _RLE5_PACKET_FILL[data[i]]
+            if i < last:
+                i += 1
+            end_pos = j + len(fill)
+            if end_pos > expected_size:
+                end_pos = expected_size
+                fill = fill[:end_pos - j]
+            out[j:end_pos] = fill
+            j = end_pos
     
     # サイズ調整
     if len(out) < expected_size:
@@ -603,6 +692,92 @@ def decode_rle5(data, width, height):
     debug_print(f"[DEBUG] RLE5デコード完了: 出力サイズ={len(out)}")
     return out
 
+def _lz5_decode_kernel(src, dst, limit):
+    """
+    LZ5 を dst（uint8 配列）の先頭 limit バイトまで展開し、書き込んだバイト数を返す。
+    decode_lz5 の Python 実装と同じ手順を、Numba で型付きループにできる形で書いたもの。
+    """
+    n = src.shape[0]
+    srcpos = 4
+    dstpos = 0
+    recycle_byte = 0
+    recycle_count = 0
+    
+    while srcpos < n and dstpos < limit:
+        ctrl = int(src[srcpos])
+        srcpos += 1
+        
+        for bit in range(8):
+            if srcpos >= n or dstpos >= limit:
+                break
+            
+            if (ctrl >> bit) & 1:
+                # 辞書参照
+                b1 = int(src[srcpos])
+                srcpos += 1
+                
+                if (b1 & 0x3F) == 0x00:
+                    # 長い距離・長い長さ
+                    if srcpos + 1 >= n:
+                        break
+                    offset = (((b1 & 0xC0) << 2) | int(src[srcpos])) + 1
+                    length = int(src[srcpos + 1]) + 3
+                    srcpos += 2
+                else:
+                    # 短い距離・短い長さ
+                    length = (b1 & 0x3F) + 1
+                    recycle_byte |= ((b1 & 0xC0) >> 6) << (6 - 2 * recycle_count)
+                    recycle_count += 1
+                    
+                    if recycle_count == 4:
+                        offset = recycle_byte + 1
+                        recycle_byte = 0
+                        recycle_count = 0
+                    else:
+                        if srcpos >= n:
+                            break
+                        offset = int(src[srcpos]) + 1
+                        srcpos += 1
+                
+                # 辞書データをコピー（重なりがあるので1バイトずつ前から）
+                end = min(dstpos + length, limit)
+                if offset > dstpos:
+                    # 出力の先頭より前を指す部分は0
+                    while dstpos < end and offset > dstpos:
+                        dst[dstpos] = 0
+                        dstpos += 1
+                while dstpos < end:
+                    dst[dstpos] = dst[dstpos - offset]
+                    dstpos += 1
+            else:
+                # リテラル
+                b1 = int(src[srcpos])
+                srcpos += 1
+                count = b1 >> 5
+                
+                if count == 0:
+                    if srcpos >= n:
+                        break
+                    count = int(src[srcpos]) + 8
+                    srcpos += 1
+                
+                end = min(dstpos + count, limit)
+                while dstpos < end:
+                    dst[dstpos] = b1 & 0x1F
+                    dstpos += 1
+    
+    return dstpos
+
+_lz5_decode_nb = None
+if NUMBA_AVAILABLE:
+    # PyInstaller などの凍結環境や読み取り専用のインストール先ではキャッシュ先が無く、
+    # njit(cache=True) 自体が例外になるので、その場合は Python 実装を使う
+    try:
+        _lz5_decode_nb = numba.njit(cache=not getattr(sys, 'frozen', False),
+                                    boundscheck=False)(_lz5_decode_kernel)
+    except Exception as e:
+        debug_print(f"[WARNING] Numba LZ5 kernel unavailable, using Python decoder: {e}")
+
 def decode_lz5(data, width, height):
     """SFFv2 LZ5デコード（IkemenGO準拠版）"""
     if len(data) < 4:
@@ -612,6 +787,19 @@ def decode_lz5(data, width, height):
     decompressed_size = struct.unpack_from('<I', data, 0)[0]
     debug_print(f"[DEBUG] LZ5デコード: 期待サイズ={decompressed_size}, 実際={width*height}")
     
+    global _lz5_decode_nb
+    if _lz5_decode_nb is not None:
+        # 結果は width*height で切り詰めるため、それ以降は展開しない
+        # （後方参照は常に書き込み位置より前を指すので、先頭側の結果は変わらない）
+        out = np.zeros(width * height, dtype=np.uint8)
+        try:
+            _lz5_decode_nb(np.frombuffer(data, dtype=np.uint8), out, min(decompressed_size, width * height))
+            return bytearray(out)
+        except Exception as e:
+            # 初回呼び出し時のコンパイルに失敗した場合は以降 Python 実装に切り替える
+            debug_print(f"[WARNING] Numba LZ5 kernel failed, using Python decoder: {e}")
+            _lz5_decode_nb = None
+    
     dst = bytearray()
     srcpos = 4
     recycle_byte = 0
@@ -663,14 +851,22 @@ def decode_lz5(data, width, height):
                         offset = data[srcpos] + 1
                         srcpos += 1
                 
-                # 辞書データをコピー
-                for _ in range(length):
-                    if len(dst) >= decompressed_size:
-                        break
-                    if offset <= len(dst):
-                        dst.append(dst[-offset])
+                # 辞書データをコピー（1バイトずつ append せずブロック単位で）
+                length = min(length, decompressed_size - len(dst))
+                if offset > len(dst):
+                    # 出力の先頭より前を指す部分は0
+                    zeros = min(length, offset - len(dst))
+                    dst += bytes(zeros)
+                    length -= zeros
+                if length > 0:
+                    start = len(dst) - offset
+                    if offset >= length:
+                        # 重なりなし: 1回のスライスコピー
+                        dst += dst[start:start + length]
                     else:
-                        dst.append(0)
+                        # 重なりあり: 直前 offset バイトの周期を繰り返す
+                        period = dst[start:]
+                        dst += (period * (length // offset + 1))[:length]
             else:
                 # リテラル
                 if srcpos >= len(data):
@@ -689,10 +885,7 @@ def decode_lz5(data, width, height):
                     count = b2 + 8
                 
                 # リテラル値を追加
-                for _ in range(count):
-                    if len(dst) >= decompressed_size:
-                        break
-                    dst.append(val)
+                dst += bytes((val,)) * min(count, decompressed_size - len(dst))
     
     # サイズ調整
     result = dst[:width * height]
@@ -703,7 +896,8 @@ def decode_lz5(data, width, height):
     return result
 
 def decode_sprite(fmt, data, width, height):
-    debug_print(f"[DEBUG] decode_sprite: fmt={fmt}, data_size={len(data)}, size={width}x{height}")
+    if DEBUG_SFF:
+        debug_print(f"[DEBUG] decode_sprite: fmt={fmt}, data_size={len(data)}, size={width}x{height}")
     
     try:
         # 初期化
@@ -711,19 +905,20 @@ def decode_sprite(fmt, data, width, height):
         mode = 'indexed'
         
         # PNG形式の場合（fmt=10 かつ 署名で確認）
+        png_offset = _png_offset(data)
         if fmt == 10:
-            if is_png_data(data):
+            if png_offset is not None:
                 debug_print(f"[DEBUG] Valid PNG signature confirmed, processing as PNG")
-                decoded, mode, png_palette = decode_png(data, width, height)
+                decoded, mode, png_palette = decode_png(data, width, height, png_offset)
                 return decoded, mode
             else:
                 debug_print(f"[WARNING] fmt=10 but invalid PNG signature, treating as unknown format")
                 decoded = bytearray([0] * width * height)
         
         # 署名による自動PNG検出（fmt=10以外でも）
-        elif is_png_data(data):
+        elif png_offset is not None:
             debug_print(f"[DEBUG] PNG signature detected in fmt={fmt}, processing as PNG")
-            decoded, mode, png_palette = decode_png(data, width, height)
+            decoded, mode, png_palette = decode_png(data, width, height, png_offset)
             return decoded, mode
             
         elif fmt in (0, 1):
@@ -794,6 +989,17 @@ def decode_sprite(fmt, data, width, height):
     
     return decoded, mode
 
+# SFF2スプライトレコード（28バイト）を1回のunpackで読む
+# group, number, width, height, axis_x, axis_y, index_next, fmt, coldepth, file_off, file_len, pal_index, flags
+_SFF2_SPRITE_RECORD = struct.Struct('<hhHHhhHBBIIHH')
+# SFF2パレットレコード（16バイト）: groupid, palid, numcol, linkid, file_off, file_len
+_SFF2_PALETTE_RECORD = struct.Struct('<HHHHII')
+
+def _table_records(data, offset: int, count: int, record: struct.Struct) -> bytes:
+    """offset から固定長レコードが count 個並ぶテーブルを、ファイル内に収まる分だけ切り出す"""
+    available = max(0, len(data) - offset) // record.size
+    return data[offset:offset + min(count, available) * record.size]
+
 class SFF2:
     """
     Enhanced SFFv2 reader with improved RLE8 support based on sff2_decode.py
@@ -802,9 +1008,10 @@ class SFF2:
     designed for handling RLE8 compression (format code 2, colour depth 8).
     """
 
-    def __init__(self, file_path: Path) -> None:
+    def __init__(self, file_path: Path, data=None) -> None:
+        """``data`` may be the whole file (bytes or mmap) when the caller already has it open."""
         self.file_path = file_path
-        self.data = file_path.read_bytes()
+        self.data = data if data is not None else file_path.read_bytes()
         # Parse header fields
         header = self.data[:0x80]
         try:
@@ -825,15 +1032,10 @@ class SFF2:
 
     def _load_palettes(self) -> None:
         """Load palette records from the palette table."""
-        for i in range(self.pal_count):
-            base = self.pal_offset + i * 16
-            if base + 16 > len(self.data):
-                break
-            # Layout: uint16 groupid, uint16 palid, uint16 numcol,
-            # uint16 linkid, uint32 file_off, uint32 file_len
-            groupid, palid, numcol, linkid, file_off, file_len = struct.unpack_from(
-                '<HHHHII', self.data, base
-            )
+        # Layout: uint16 groupid, uint16 palid, uint16 numcol,
+        # uint16 linkid, uint32 file_off, uint32 file_len
+        table = _table_records(self.data, self.pal_offset, self.pal_count, _SFF2_PALETTE_RECORD)
+        for groupid, palid, numcol, linkid, file_off, file_len in _SFF2_PALETTE_RECORD.iter_unpack(table):
             self.palettes.append(
                 {
                     'groupid': groupid,
@@ -855,20 +1057,9 @@ class SFF2:
 
     def _load_sprites(self) -> None:
         """Load sprite records into a dictionary keyed by (group, number)."""
-        for i in range(self.spr_count):
-            base = self.spr_offset + i * 28
-            if base + 28 > len(self.data):
-                break
-            group, number = struct.unpack_from('<hh', self.data, base)
-            width, height = struct.unpack_from('<HH', self.data, base + 4)
-            axis_x, axis_y = struct.unpack_from('<hh', self.data, base + 8)
-            index_next = struct.unpack_from('<H', self.data, base + 12)[0]
-            fmt = self.data[base + 14]
-            coldepth = self.data[base + 15]
-            file_off = struct.unpack_from('<I', self.data, base + 16)[0]
-            file_len = struct.unpack_from('<I', self.data, base + 20)[0]
-            pal_index = struct.unpack_from('<H', self.data, base + 24)[0]
-            flags = struct.unpack_from('<H', self.data, base + 26)[0]
+        table = _table_records(self.data, self.spr_offset, self.spr_count, _SFF2_SPRITE_RECORD)
+        for (group, number, width, height, axis_x, axis_y, index_next,
+             fmt, coldepth, file_off, file_len, pal_index, flags) in _SFF2_SPRITE_RECORD.iter_unpack(table):
             # Compute the absolute data offset
             rel_tdata = bool(flags & 0x0001)
             actual_off = file_off + (self.tdata_offset if rel_tdata else self.ldata_offset)
@@ -992,6 +1183,18 @@ class SFF2:
         
         return out
 
+# SFFv2Reader 用ヘッダー: 0x24 から sprite_offset, num_sprites, palette_offset, num_palettes,
+# l_offset, l_len, t_offset, t_len の順に並ぶ uint32 × 8
+_V2_HEADER_FIELDS = struct.Struct('<8I')
+# パレットテーブルの1エントリ（16バイト）: group no, index no, _, link, ofs, siz
+_V2_PALETTE_ENTRY = struct.Struct('<3hHII')
+# スプライトテーブルの1エントリ（28バイト）。テーブル全体を構造化配列として一度に解析する
+_V2_SPRITE_ENTRY = np.dtype([
+    ('group_no', '<u2'), ('sprite_no', '<u2'), ('width', '<u2'), ('height', '<u2'),
+    ('x_axis', '<i2'), ('y_axis', '<i2'), ('link_idx', '<u2'), ('fmt', 'u1'), ('coldepth', 'u1'),
+    ('data_ofs', '<u4'), ('data_len', '<u4'), ('pal_idx', '<u2'), ('flags', '<u2'),
+])
+
 class SFFv2Reader:
     def __init__(self, file_path):
         # 基本コンテナ
@@ -1002,6 +1205,65 @@ class SFFv2Reader:
         # パレット使用状況
         self.palette_usage_count = []
         self.dedicated_palette_indices = set()  # 使用回数1回のパレット = 専用パレット
+        # ファイル全体の mmap（設定されていれば decode_sprite_v2 がファイルを開かずに参照する）
+        self.mapped_data = None
+        # 展開済みスプライトのLRUキャッシュ（decode_sprite_v2 が管理する）。
+        # 同じスプライトを繰り返し表示するGUI向けの opt-in で、既定は無効（バッチ抽出は1回しか読まない）
+        self.decode_cache = None
+        self.decode_cache_bytes = 0
+
+    def load(self, keep_mapped=True):
+        """ファイルを一度だけ読み取り専用 mmap で開き、ヘッダー・パレット・スプライト表を読み込む
+
+        keep_mapped=True なら mmap を mapped_data に保持し、以降のスプライトデコードはファイルを開かずに
+        スライスを参照する（ヘッドレスのバッチ処理向け。使い終わったら close() すること）。
+        False なら表の読み込み後すぐに閉じ、デコードはスプライト毎にファイルを読む。
+        mmap できない環境では通常のファイル読み込みにフォールバックする
+        """
+        with open(self.file_path, 'rb') as f:
+            try:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                mm = None
+            src = f if mm is None else mm
+            self.read_header(src)
+            self.read_palettes(src)
+            self.read_sprites(src)
+        if keep_mapped:
+            self.mapped_data = mm
+        elif mm is not None:
+            mm.close()
+        return self
+
+    def enable_decode_cache(self):
+        """decode_sprite_v2 の展開結果キャッシュを有効にする（合計 _decode_cache_max_bytes まで）"""
+        with _decode_cache_lock:
+            if self.decode_cache is None:
+                self.decode_cache = {}
+                self.decode_cache_bytes = 0
+
+    def close(self):
+        """mmap を解放する（以降のデコードはスプライト毎にファイルを開いて読む）"""
+        mm, self.mapped_data = self.mapped_data, None
+        if mm is not None:
+            try:
+                mm.close()
+            except BufferError:
+                # デコード中のスライスが残っている場合は参照が無くなった時点で GC に任せる
+                pass
+
+    @staticmethod
+    def apply_palette(decoded, palette):
+        """インデックスデータにパレットを適用し、(ピクセル数, 4) の uint8 RGBA 配列を返す
+
+        decode_sprite_v2 の indexed 結果を RGBA にする場合はピクセル単位のループではなくこれを使う。
+        palette は (色数, 4) の配列または RGBA タプルのリスト。範囲外のインデックスは透明な黒になる
+        """
+        lut = np.zeros((256, 4), dtype=np.uint8)
+        if palette is not None and len(palette):
+            pal = np.asarray(palette, dtype=np.uint8)[:256, :4]
+            lut[:len(pal)] = pal
+        return lut[np.frombuffer(decoded, dtype=np.uint8)]
 
     def read_header(self, f):
         f.seek(0)
@@ -1014,30 +1276,12 @@ class SFFv2Reader:
         if self.header['version'] not in [(0, 0, 0, 2), (0, 1, 0, 2)]:
             raise ValueError("Not an SFFv2 file")
         
-        # Read header fields at correct positions
-        f.seek(0x24)  # 36: sprite offset
-        self.header['sprite_offset'] = struct.unpack('<I', f.read(4))[0]
-        
-        f.seek(0x28)  # 40: sprite count
-        self.header['num_sprites'] = struct.unpack('<I', f.read(4))[0]
-        
-        f.seek(0x2C)  # 44: palette offset  
-        self.header['palette_offset'] = struct.unpack('<I', f.read(4))[0]
-        
-        f.seek(0x30)  # 48: palette count
-        self.header['num_palettes'] = struct.unpack('<I', f.read(4))[0]
-        
-        f.seek(0x34)  # 52: ldata offset
-        self.header['l_offset'] = struct.unpack('<I', f.read(4))[0]
-        
-        f.seek(0x38)  # 56: ldata length
-        self.header['l_len'] = struct.unpack('<I', f.read(4))[0]
-        
-        f.seek(0x3C)  # 60: tdata offset
-        self.header['t_offset'] = struct.unpack('<I', f.read(4))[0]
-        
-        f.seek(0x40)  # 64: tdata length
-        self.header['t_len'] = struct.unpack('<I', f.read(4))[0]
+        # Read header fields at correct positions (0x24-0x43, one read)
+        f.seek(0x24)
+        (self.header['sprite_offset'], self.header['num_sprites'],
+         self.header['palette_offset'], self.header['num_palettes'],
+         self.header['l_offset'], self.header['l_len'],
+         self.header['t_offset'], self.header['t_len']) = _V2_HEADER_FIELDS.unpack(f.read(_V2_HEADER_FIELDS.size))
         
         debug_print(f"[DEBUG] SFF header info:")
         debug_print(f"  - sprite_offset: 0x{self.header['sprite_offset']:x}")
@@ -1051,42 +1295,38 @@ class SFFv2Reader:
 
     def read_palettes(self, f):
         self.palettes = []
-        for i in range(self.header['num_palettes']):
-            f.seek(self.header['palette_offset'] + i * 16)
-            _, _, _ = struct.unpack('<3h', f.read(6))  # group no, index no, _
-            link = struct.unpack('<H', f.read(2))[0]
-            ofs, siz = struct.unpack('<II', f.read(8))
+        # パレットテーブルは連続しているので一度に読み、シークはパレット本体の読み込みだけにする
+        num_palettes = self.header['num_palettes']
+        f.seek(self.header['palette_offset'])
+        table = f.read(num_palettes * _V2_PALETTE_ENTRY.size)
+        for i in range(num_palettes):
+            _, _, _, link, ofs, siz = _V2_PALETTE_ENTRY.unpack_from(table, i * _V2_PALETTE_ENTRY.size)
             if siz == 0:
                 self.palettes.append(None)
                 continue
             f.seek(self.header['l_offset'] + ofs)
             data = f.read(siz)
             
+            # パレットは (色数, 4) の uint8 配列（RGBA）で保持する。
+            # インデックス画像は palette[indices] の1回の gather で RGBA にできる
+            count = len(data) // 4
+            palette = np.frombuffer(data, dtype=np.uint8, count=count * 4).reshape(count, 4)
+            if count < 256:
+                # 不足分は不透明な黒で埋める
+                palette = np.vstack((palette, np.full((256 - count, 4), (0, 0, 0, 255), dtype=np.uint8)))
+            else:
+                palette = palette.copy()
+            
             # Fix alpha channel values: ignore stored alpha, set index 0 = transparent, others = opaque
-            palette = []
             if FIX_SFFV2_ALPHA_CHANNEL:
-                for idx, (r, g, b, a) in enumerate(struct.iter_unpack('BBBB', data)):
-                    if idx == 0:
-                        # Index 0 = transparent background
-                        palette.append((r, g, b, 0))
-                    else:
-                        # All other indices = opaque (ignore stored alpha value)
-                        palette.append((r, g, b, 255))
+                palette[:, 3] = 255
                 debug_print(f"[DEBUG] Palette {i}: Fixed alpha values (index0=transparent, others=opaque)")
             else:
                 # Use original alpha values from file
-                for idx, (r, g, b, a) in enumerate(struct.iter_unpack('BBBB', data)):
-                    palette.append((r, g, b, a))
                 debug_print(f"[DEBUG] Palette {i}: Using original alpha values from file")
             
-            while len(palette) < 256:
-                palette.append((0, 0, 0, 255))
-            
             # Ensure index 0 transparency (always apply this)
-            if len(palette) > 0:
-                r, g, b, _ = palette[0]
-                palette[0] = (r, g, b, 0)
-                
+            palette[0, 3] = 0
             self.palettes.append(palette)
             
         for i, p in enumerate(self.palettes):
@@ -1095,46 +1335,42 @@ class SFFv2Reader:
 
     def read_sprites(self, f):
         self.sprites = []
+        # スプライトテーブルは連続しているので一度に読み、構造化配列として列単位で解析する
         f.seek(self.header['sprite_offset'])
-        # 使用回数カウンタ初期化
-        self.palette_usage_count = [0] * self.header.get('num_palettes', 0)
-        for sprite_index in range(self.header['num_sprites']):
-            d = f.read(28)
-            if len(d) < 28:
-                break
-            
-            # デバッグ: バイナリデータをダンプ
-            debug_hex = ' '.join(f'{b:02x}' for b in d)
-            debug_print(f"[DEBUG] Sprite {sprite_index} raw data: {debug_hex}")
-            
-            (
-                group_no, sprite_no, width, height,
-                x_axis, y_axis, link_idx, fmt, coldepth,
-                data_ofs, data_len, pal_idx, flags
-            ) = struct.unpack('<HHHHhhHBBIIHH', d)
-            
-            # デバッグ: 解析結果を出力
-            debug_print(f"[DEBUG] Sprite {sprite_index}: group={group_no}, sprite={sprite_no}, "
-                  f"size={width}x{height}, fmt={fmt}, pal_idx={pal_idx}")
-            
-            # fmt値の妥当性チェック
-            if fmt > 100:  # 異常に大きな値の場合
-                debug_print(f"[WARNING] Suspicious fmt value {fmt} for sprite {sprite_index} "
-                      f"(group {group_no}, sprite {sprite_no})")
-                # バイト順を試してみる
-                alt_unpack = struct.unpack('>HHHHhhHBBIIHH', d)
-                debug_print(f"[DEBUG] Alternative big-endian unpack: fmt={alt_unpack[7]}")
-            
-            # flags の bit0 で領域を選ぶ
-            rel_offset = data_ofs  # 元の相対オフセットを保存
-            if (flags & 1) == 0:
-                base = self.header['l_offset']
-                data_ofs += base
-                debug_print(f"[DEBUG] Sprite {sprite_index}: flags bit0=0 → using ldata (l_offset=0x{base:x})")
-            else:
-                base = self.header['t_offset']
-                data_ofs += base
-                debug_print(f"[DEBUG] Sprite {sprite_index}: flags bit0=1 → using tdata (t_offset=0x{base:x})")
+        table = f.read(self.header['num_sprites'] * _V2_SPRITE_ENTRY.itemsize)
+        records = np.frombuffer(table, dtype=_V2_SPRITE_ENTRY, count=len(table) // _V2_SPRITE_ENTRY.itemsize)
+        
+        if DEBUG_SFF:
+            for sprite_index, rec in enumerate(records):
+                # デバッグ: バイナリデータと解析結果をダンプ
+                d = rec.tobytes()
+                debug_print(f"[DEBUG] Sprite {sprite_index} raw data: {' '.join(f'{b:02x}' for b in d)}")
+                debug_print(f"[DEBUG] Sprite {sprite_index}: group={rec['group_no']}, sprite={rec['sprite_no']}, "
+                      f"size={rec['width']}x{rec['height']}, fmt={rec['fmt']}, pal_idx={rec['pal_idx']}")
+        
+        # fmt値の妥当性チェック（異常に大きな値の場合）
+        for sprite_index in np.flatnonzero(records['fmt'] > 100).tolist():
+            rec = records[sprite_index]
+            debug_print(f"[WARNING] Suspicious fmt value {rec['fmt']} for sprite {sprite_index} "
+                  f"(group {rec['group_no']}, sprite {rec['sprite_no']})")
+            # バイト順を試してみる
+            alt_unpack = struct.unpack('>HHHHhhHBBIIHH', rec.tobytes())
+            debug_print(f"[DEBUG] Alternative big-endian unpack: fmt={alt_unpack[7]}")
+        
+        # flags の bit0 で領域を選ぶ（0: ldata, 1: tdata）。元の相対オフセットも保存する
+        rel_offsets = records['data_ofs'].astype(np.int64)
+        data_offsets = rel_offsets + np.where(records['flags'] & 1, self.header['t_offset'], self.header['l_offset'])
+        
+        columns = zip(
+            records['group_no'].tolist(), records['sprite_no'].tolist(),
+            records['width'].tolist(), records['height'].tolist(),
+            records['x_axis'].tolist(), records['y_axis'].tolist(),
+            records['link_idx'].tolist(), data_offsets.tolist(), records['data_len'].tolist(),
+            records['coldepth'].tolist(), records['pal_idx'].tolist(), records['fmt'].tolist(),
+            records['flags'].tolist(), rel_offsets.tolist(),
+        )
+        for (group_no, sprite_no, width, height, x_axis, y_axis, link_idx,
+             data_ofs, data_len, coldepth, pal_idx, fmt, flags, rel_offset) in columns:
             self.sprites.append({
                 'group_no': group_no,
                 'sprite_no': sprite_no,
@@ -1152,9 +1388,10 @@ class SFFv2Reader:
                 'rel_offset': rel_offset,  # 相対オフセットも保存
                 'image_data': None  # SFFv2では遅延読み込み（必要時にdecode_sprite_v2で取得）
             })
-            # パレット使用回数カウント
-            if 0 <= pal_idx < len(self.palette_usage_count):
-                self.palette_usage_count[pal_idx] += 1
+        
+        # パレット使用回数カウント（範囲外のパレット番号は数えない）
+        num_palettes = self.header.get('num_palettes', 0)
+        self.palette_usage_count = np.bincount(records['pal_idx'], minlength=num_palettes)[:num_palettes].tolist()
 
         # 専用パレット集合作成（使用1回）
         self.dedicated_palette_indices = {i for i, c in enumerate(self.palette_usage_count) if c == 1}
@@ -1163,6 +1400,7 @@ class SFFv2Reader:
 # グローバルキャッシュ for Enhanced SFF2 readers（最大10ファイルまで）
 _enhanced_sff2_cache = {}
 _cache_max_size = 10
+_enhanced_sff2_cache_lock = threading.Lock()
 
 def create_enhanced_sff2_reader(file_path):
     """
@@ -1172,27 +1410,29 @@ def create_enhanced_sff2_reader(file_path):
     # キャッシュキーとして絶対パスを使用
     cache_key = os.path.abspath(file_path)
     
-    if cache_key in _enhanced_sff2_cache:
-        # LRU: アクセスしたアイテムを最後に移動
-        value = _enhanced_sff2_cache.pop(cache_key)
-        _enhanced_sff2_cache[cache_key] = value
-        debug_print(f"[DEBUG] Using cached Enhanced SFF2 reader for {file_path}")
-        return value
+    with _enhanced_sff2_cache_lock:
+        value = _enhanced_sff2_cache.pop(cache_key, None)
+        if value is not None:
+            # LRU: アクセスしたアイテムを最後に移動
+            _enhanced_sff2_cache[cache_key] = value
+            debug_print(f"[DEBUG] Using cached Enhanced SFF2 reader for {file_path}")
+            return value
     
     try:
         sff2 = SFF2(Path(file_path))
         debug_print(f"[DEBUG] Enhanced SFF2 reader created for {file_path}")
         debug_print(f"[DEBUG] Found {len(sff2.sprites)} sprites and {len(sff2.palettes)} palettes")
         
-        # キャッシュサイズ管理（LRU削除）
-        if len(_enhanced_sff2_cache) >= _cache_max_size:
-            # 最も古いアイテムを削除
-            oldest_key = next(iter(_enhanced_sff2_cache))
-            del _enhanced_sff2_cache[oldest_key]
-            debug_print(f"[DEBUG] Removed oldest cache entry: {oldest_key}")
-        
-        # キャッシュに保存
-        _enhanced_sff2_cache[cache_key] = sff2
+        with _enhanced_sff2_cache_lock:
+            # キャッシュサイズ管理（LRU削除）
+            if len(_enhanced_sff2_cache) >= _cache_max_size:
+                # 最も古いアイテムを削除
+                oldest_key = next(iter(_enhanced_sff2_cache))
+                del _enhanced_sff2_cache[oldest_key]
+                debug_print(f"[DEBUG] Removed oldest cache entry: {oldest_key}")
+            
+            # キャッシュに保存
+            _enhanced_sff2_cache[cache_key] = sff2
         return sff2
     except Exception as e:
         debug_print(f"[WARNING] Failed to create enhanced SFF2 reader: {e}")
@@ -1361,6 +1601,102 @@ def _try_enhanced_sff2_decode(reader, sprite, palette_override=None):
         debug_print(f"[WARNING] Enhanced SFF2 decoder error: {e}")
         return None
 
+# スプライトデータ読み込み用のスレッドごとの再利用バッファ
+_tls = threading.local()
+
+def _read_into_scratch(f, size):
+    """スレッドローカルの読み込みバッファへ size バイト読み込み、そのmemoryviewを返す
+
+    バッファは次の読み込みで上書きされるため、呼び出し側はデコード結果を別バッファに持つこと
+    """
+    buf = getattr(_tls, 'scratch', None)
+    if buf is None or len(buf) < size:
+        buf = _tls.scratch = bytearray(max(size, 1 << 20))
+    mv = memoryview(buf)[:size]
+    n = f.readinto(mv)
+    return mv[:n]
+
+# デコード済みスプライトのキャッシュ（リーダーごと、(data_ofs, data_len, fmt, width, height) をキーとするLRU）。
+# 件数ではなく展開後のバイト数の合計で上限を設ける（大きな RGBA スプライトでもメモリを抱え込まない）
+_decode_cache_max_bytes = 48 << 20
+_decode_cache_lock = threading.Lock()
+
+def _decode_sprite_pixels(reader, sprite, index):
+    """スプライトのデータを読み込んでピクセル列へ展開する
+
+    戻り値: (decoded, mode, png_palette, is_png)
+    """
+    # データ読み取り（高速化版）
+    # ファイル全体が mmap 済みのリーダー（ヘッドレスAPI）はコピーせずにスライスを参照する
+    mapped = getattr(reader, 'mapped_data', None)
+    if mapped is not None:
+        try:
+            data = memoryview(mapped)[sprite['data_ofs']:sprite['data_ofs'] + sprite['data_len']]
+        except ValueError:
+            # 別スレッドで close() 済みの mmap はファイル読み込みに切り替える
+            mapped = None
+    with (open(reader.file_path, 'rb') if mapped is None else contextlib.nullcontext()) as f:
+        if mapped is None:
+            f.seek(sprite['data_ofs'])
+            data = _read_into_scratch(f, sprite['data_len'])
+        
+        if DEBUG_SFF:
+            debug_print(f"[DEBUG] Sprite {index}: Reading from absolute offset 0x{sprite['data_ofs']:x}, size={sprite['data_len']}")
+        
+        # fmt=2でデータが疑わしい場合のみフォールバック試行
+        if sprite['fmt'] == 2 and len(data) >= 16:
+            first_16_zeros = bytes(data[:16]).count(b'\x00')
+            
+            # より簡単な判定：先頭16バイトの14個以上が0x00
+            if first_16_zeros >= 14:
+                debug_print(f"[DEBUG] Suspicious data detected, trying fallback...")
+                # 逆の領域を試行
+                flags = sprite.get('flags', 0)
+                rel_offset = sprite.get('rel_offset', 0)
+                if (flags & 1) == 0:
+                    # 現在ldata、tdataを試行
+                    alt_offset = reader.header['t_offset'] + rel_offset
+                else:
+                    # 現在tdata、ldataを試行
+                    alt_offset = reader.header['l_offset'] + rel_offset
+                
+                if mapped is not None:
+                    fallback_data = mapped[alt_offset:alt_offset + sprite['data_len']]
+                else:
+                    f.seek(alt_offset)
+                    fallback_data = f.read(sprite['data_len'])
+                
+                # 簡単な妥当性チェック
+                fallback_zeros = fallback_data[:16].count(b'\x00')
+                if fallback_zeros < first_16_zeros:
+                    debug_print(f"[DEBUG] Using fallback data (fewer zeros: {fallback_zeros} < {first_16_zeros})")
+                    data = fallback_data
+    
+    is_fmt10 = (sprite['fmt'] == 10)
+    png_offset = _png_offset(data)
+    has_png_signature = png_offset is not None
+    if DEBUG_SFF:
+        debug_print(f"[DEBUG] Sprite {index}: fmt={sprite['fmt']}, is_fmt10={is_fmt10}, has_png_signature={has_png_signature}")
+    
+    if is_fmt10 and has_png_signature:
+        debug_print(f"[DEBUG] Processing confirmed PNG sprite at index {index}")
+        decoded, mode, png_palette = decode_png(data, sprite['width'], sprite['height'], png_offset)
+        return decoded, mode, png_palette, True
+    
+    # 従来形式の処理（fmt=10でもPNG署名がない場合を含む）
+    if is_fmt10 and not has_png_signature:
+        debug_print(f"[WARNING] fmt=10 but no PNG signature, treating as standard format")
+    
+    decoded, mode = decode_sprite(sprite['fmt'], data, sprite['width'], sprite['height'])
+    
+    # デコード結果のNoneチェック
+    if decoded is None:
+        debug_print(f"[ERROR] decode_sprite returned None, creating fallback")
+        decoded = bytearray([0] * sprite['width'] * sprite['height'])
+        mode = 'indexed'
+    
+    return decoded, mode, None, False
+
 def decode_sprite_v2(reader, index, palette_override=None, visited_indices=None):
     if visited_indices is None:
         visited_indices = set()
@@ -1389,21 +1725,22 @@ def decode_sprite_v2(reader, index, palette_override=None, visited_indices=None)
             return result
         debug_print(f"[DEBUG] Enhanced SFF2 decoder failed, falling back to standard decoder")
     
-    # ファイルパスとスプライト情報を出力
-    debug_print(f"[DEBUG] 処理中のSFFファイル: {reader.file_path}")
-    
-    # SFFv1とSFFv2で異なるキー名に対応
-    offset_info = ""
-    if 'absolute_offset' in sprite:
-        offset_info = f"absolute offset 0x{sprite['absolute_offset']:x}"
-    elif 'offset' in sprite:
-        offset_info = f"offset 0x{sprite['offset']:x}"
-    elif 'data_offset' in sprite:
-        offset_info = f"data offset 0x{sprite['data_offset']:x}"
-    else:
-        offset_info = "offset unknown"
-    
-    debug_print(f"[DEBUG] Sprite {index}: Reading from {offset_info}, size={sprite.get('data_len', sprite.get('data_size', 0))}")
+    # ファイルパスとスプライト情報を出力（デバッグ時のみ。オフセット表記の組み立てごと省く）
+    if DEBUG_SFF:
+        debug_print(f"[DEBUG] 処理中のSFFファイル: {reader.file_path}")
+        
+        # SFFv1とSFFv2で異なるキー名に対応
+        offset_info = ""
+        if 'absolute_offset' in sprite:
+            offset_info = f"absolute offset 0x{sprite['absolute_offset']:x}"
+        elif 'offset' in sprite:
+            offset_info = f"offset 0x{sprite['offset']:x}"
+        elif 'data_offset' in sprite:
+            offset_info = f"data offset 0x{sprite['data_offset']:x}"
+        else:
+            offset_info = "offset unknown"
+        
+        debug_print(f"[DEBUG] Sprite {index}: Reading from {offset_info}, size={sprite.get('data_len', sprite.get('data_size', 0))}")
     
     # リンク判定
     # SFFv2 では data_len==0 かつ link_idx 指定、もしくは互換的対応で width/height==0 の場合にリンク扱い
@@ -1421,50 +1758,37 @@ def decode_sprite_v2(reader, index, palette_override=None, visited_indices=None)
             # 無効リンク → 透明 1x1
             return bytearray([0]), [(0,0,0,0)]*256, 1, 1, 'indexed'
     
-    # データ読み取り（高速化版）
-    with open(reader.file_path, 'rb') as f:
-        f.seek(sprite['data_ofs'])
-        data = f.read(sprite['data_len'])
-        
-        debug_print(f"[DEBUG] Sprite {index}: Reading from absolute offset 0x{sprite['data_ofs']:x}, size={sprite['data_len']}")
-        
-        # fmt=2でデータが疑わしい場合のみフォールバック試行
-        if sprite['fmt'] == 2 and len(data) >= 16:
-            first_16_zeros = data[:16].count(b'\x00')
-            
-            # より簡単な判定：先頭16バイトの14個以上が0x00
-            if first_16_zeros >= 14:
-                debug_print(f"[DEBUG] Suspicious data detected, trying fallback...")
-                # 逆の領域を試行
-                flags = sprite.get('flags', 0)
-                rel_offset = sprite.get('rel_offset', 0)
-                if (flags & 1) == 0:
-                    # 現在ldata、tdataを試行
-                    alt_offset = reader.header['t_offset'] + rel_offset
-                else:
-                    # 現在tdata、ldataを試行
-                    alt_offset = reader.header['l_offset'] + rel_offset
-                
-                f.seek(alt_offset)
-                fallback_data = f.read(sprite['data_len'])
-                
-                # 簡単な妥当性チェック
-                fallback_zeros = fallback_data[:16].count(b'\x00')
-                if fallback_zeros < first_16_zeros:
-                    debug_print(f"[DEBUG] Using fallback data (fewer zeros: {fallback_zeros} < {first_16_zeros})")
-                    data = fallback_data
-    
-    # PNG形式の判定をより厳密に行う
-    is_fmt10 = (sprite['fmt'] == 10)
-    has_png_signature = is_png_data(data)
-    
-    debug_print(f"[DEBUG] Sprite {index}: fmt={sprite['fmt']}, is_fmt10={is_fmt10}, has_png_signature={has_png_signature}")
+    # 同じデータ領域（リンク先の再訪や再描画）は展開済みの結果を再利用する
+    cache = getattr(reader, 'decode_cache', None)
+    cache_key = (sprite['data_ofs'], sprite['data_len'], sprite['fmt'], sprite['width'], sprite['height'])
+    cached = None
+    if cache is not None:
+        with _decode_cache_lock:
+            cached = cache.pop(cache_key, None)
+            if cached is not None:
+                cache[cache_key] = cached
+    
+    if cached is not None:
+        raw, mode, png_palette, is_png = cached
+        # 呼び出し側が書き換えても共有されないよう毎回コピーを返す
+        decoded = bytearray(raw)
+        if DEBUG_SFF:
+            debug_print(f"[DEBUG] Sprite {index}: using cached decode")
+    else:
+        decoded, mode, png_palette, is_png = _decode_sprite_pixels(reader, sprite, index)
+        # 予算の1/4を超える大きなスプライトは保持しない
+        if cache is not None and decoded is not None and len(decoded) <= _decode_cache_max_bytes // 4:
+            size = len(decoded)
+            with _decode_cache_lock:
+                while cache and reader.decode_cache_bytes + size > _decode_cache_max_bytes:
+                    oldest = cache.pop(next(iter(cache)))
+                    reader.decode_cache_bytes -= len(oldest[0])
+                if cache_key not in cache:
+                    cache[cache_key] = (bytes(decoded), mode, png_palette, is_png)
+                    reader.decode_cache_bytes += size
     
     # PNG形式の場合は特別な処理
-    if is_fmt10 and has_png_signature:
-        debug_print(f"[DEBUG] Processing confirmed PNG sprite at index {index}")
-        decoded, mode, png_palette = decode_png(data, sprite['width'], sprite['height'])
-        
+    if is_png:
         # PNG画像は常にRGBAモードで処理（パレット問題を回避）
         if mode == 'rgba':
             palette = []  # viewer側でNone扱いエラー回避
@@ -1501,23 +1825,12 @@ def decode_sprite_v2(reader, index, palette_override=None, visited_indices=None)
                 palette = reader.palettes[pal_idx] if pal_idx < len(reader.palettes) else []
                 debug_print(f"[DEBUG] PNG fallback to SFF palette index {pal_idx}")
     else:
-        # 従来形式の処理（fmt=10でもPNG署名がない場合を含む）
-        if is_fmt10 and not has_png_signature:
-            debug_print(f"[WARNING] fmt=10 but no PNG signature, treating as standard format")
-        
-        decoded, mode = decode_sprite(sprite['fmt'], data, sprite['width'], sprite['height'])
-        
-        # デコード結果のNoneチェック
-        if decoded is None:
-            debug_print(f"[ERROR] decode_sprite returned None, creating fallback")
-            decoded = bytearray([0] * sprite['width'] * sprite['height'])
-            mode = 'indexed'
-        
         # 専用パレットは強制適用
         sprite_pal = sprite['pal_idx']
         if sprite_pal in getattr(reader, 'dedicated_palette_indices', set()):
             pal_idx = sprite_pal
-            debug_print(f"[DEBUG] Forcing dedicated palette {pal_idx} (standard decode)")
+            if DEBUG_SFF:
+                debug_print(f"[DEBUG] Forcing dedicated palette {pal_idx} (standard decode)")
         else:
             pal_idx = palette_override if palette_override is not None else sprite_pal
         
@@ -1525,7 +1838,8 @@ def decode_sprite_v2(reader, index, palette_override=None, visited_indices=None)
         palette = None
         if pal_idx is not None and pal_idx < len(reader.palettes):
             palette = reader.palettes[pal_idx]
-            debug_print(f"[DEBUG] Using palette {pal_idx} with {len(palette)} colors (fmt={sprite['fmt']})")
+            if DEBUG_SFF:
+                debug_print(f"[DEBUG] Using palette {pal_idx} with {len(palette)} colors (fmt={sprite['fmt']})")
         else:
             debug_print(f"[WARNING] Invalid palette index {pal_idx}, available palettes: {len(reader.palettes) if hasattr(reader, 'palettes') else 0}")
             # フォールバック：最初のパレットを使用